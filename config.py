@@ -32,13 +32,29 @@ DATA_CONFIG = {
     'num_products': int(os.getenv('NUM_PRODUCTS', 1000)),
     'num_transactions': int(os.getenv('NUM_TRANSACTIONS', 500000)),
     'start_date': os.getenv('START_DATE', '2022-01-01'),
-    'end_date': os.getenv('END_DATE', '2024-01-01')
+    'end_date': os.getenv('END_DATE', '2024-01-01'),
+    'chunk_size': int(os.getenv('CHUNK_SIZE', 100000)),  # Rows per streamed output chunk
+    'output_format': os.getenv('DATA_FORMAT', 'csv'),  # 'csv' or 'parquet'
+    'workers': int(os.getenv('DATA_WORKERS', 1)),
+    'seed': int(os.getenv('DATA_SEED', 42))
+}
+
+# Database Loading Configuration
+LOAD_CONFIG = {
+    'parallelism': int(os.getenv('LOAD_PARALLELISM', 4)),  # Concurrent fact partitions / pooled connections
+    'partition_rows': int(os.getenv('LOAD_PARTITION_ROWS', 250000)),
+    'max_retries': int(os.getenv('LOAD_MAX_RETRIES', 3)),
+    'retry_delay': float(os.getenv('LOAD_RETRY_DELAY', 2.0)),  # Seconds, doubled per retry
+    'maintenance_work_mem': os.getenv('LOAD_MAINTENANCE_WORK_MEM', '256MB'),  # Per index build
+    'lookback_days': int(os.getenv('LOAD_LOOKBACK_DAYS', 3)),  # Days re-merged before the high-water mark
+    'chunk_rows': int(os.getenv('LOAD_CHUNK_ROWS', 500000))  # Raw fact rows read per chunk
 }
 
 # Paths
 PATHS = {
     'data_raw': PROJECT_ROOT / 'data' / 'raw',
     'data_processed': PROJECT_ROOT / 'data' / 'processed',
+    'data_cache': PROJECT_ROOT / 'data' / 'cache',
     'models': PROJECT_ROOT / 'models',
     'reports': PROJECT_ROOT / 'reports',
     'notebooks': PROJECT_ROOT / 'notebooks'
@@ -9,7 +9,7 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -17,6 +17,8 @@ from datetime import datetime, timedelta
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 from config import DATABASE_URL, PATHS
+from src.data_access import load_sales, drop_unused_categories
+from src.cohort_store import CohortStore
 
 # Page configuration
 st.set_page_config(
@@ -55,17 +57,16 @@ st.markdown("""
 st.markdown('<div class="main-header"> E-Commerce Sales Analytics Dashboard</div>', unsafe_allow_html=True)
 st.markdown("---")
 
+# vw_sales_overview columns the tabs use
+DASHBOARD_COLUMNS = ['transaction_id', 'transaction_date', 'year_month', 'customer_id', 'customer_segment',
+                     'product_id', 'category', 'country', 'payment_method', 'quantity', 'total_amount', 'profit']
+
 # Cache data loading
 @st.cache_data(ttl=600)
 def load_sales_data():
     """Load sales data from database"""
-    engine = create_engine(DATABASE_URL)
-    query = """
-    SELECT * FROM vw_sales_overview
-    WHERE order_status = 'Completed'
-    """
-    df = pd.read_sql(query, engine)
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+    # Only the columns the tabs use; exact (float64) amounts for the headline totals
+    df = load_sales(DASHBOARD_COLUMNS, amount_dtype='float64')
     
     # Calculate profit_margin if not present
     if 'profit_margin' not in df.columns and 'profit' in df.columns and 'total_amount' in df.columns:
@@ -89,6 +90,19 @@ def load_product_data():
     df = pd.read_sql(query, engine)
     return df
 
+@st.cache_data(ttl=600)
+def load_cohort_retention():
+    """Monthly cohort retention (%) from the cohort state the analysis pipeline maintains (read-only)"""
+    return CohortStore.load('M').retention()
+
+@st.cache_data(ttl=600)
+def load_top_products(start_date, end_date, limit=50):
+    """Top products by revenue in a date range (from the daily product rollup)"""
+    engine = create_engine(DATABASE_URL)
+    query = text("SELECT * FROM top_products(:start_date, :end_date, :limit)")
+    df = pd.read_sql(query, engine, params={'start_date': start_date, 'end_date': end_date, 'limit': limit})
+    return df
+
 # Load data
 with st.spinner("Loading data..."):
     try:
@@ -142,6 +156,8 @@ if selected_segment != 'All':
 if selected_country != 'All':
     filtered_df = filtered_df[filtered_df['country'] == selected_country]
 
+filtered_df = drop_unused_categories(filtered_df)
+
 # Display record count
 st.sidebar.markdown("---")
 st.sidebar.metric("Filtered Records", f"{len(filtered_df):,}")
@@ -208,12 +224,13 @@ with tab1:
     
     # Monthly Revenue and Profit
     st.subheader(" Monthly Performance")
-    filtered_df['year_month'] = filtered_df['transaction_date'].dt.to_period('M').astype(str)
     monthly = filtered_df.groupby('year_month').agg({
         'total_amount': 'sum',
         'profit': 'sum',
         'transaction_id': 'count'
     }).reset_index()
+    # Integer YYYYMM keys from dim_time; label only the grouped rows
+    monthly['year_month'] = [f"{key // 100}-{key % 100:02d}" for key in monthly['year_month'].astype(int)]
     
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     fig.add_trace(
@@ -281,6 +298,21 @@ with tab2:
                            labels={'total_revenue': 'Customer LTV ($)'},
                            color_discrete_sequence=['#4ECDC4'])
         st.plotly_chart(fig, use_container_width=True)
+    
+    # Cohort Retention (all customers; not affected by the sidebar filters)
+    st.subheader(" Monthly Cohort Retention")
+    cohort_retention = load_cohort_retention()
+    if len(cohort_retention) > 0:
+        cohort_view = cohort_retention.iloc[-12:, :12]
+        fig = px.imshow(cohort_view.values,
+                        x=[str(period) for period in cohort_view.columns],
+                        y=[str(cohort) for cohort in cohort_view.index],
+                        color_continuous_scale='RdYlGn', zmin=0, zmax=100, text_auto='.1f',
+                        labels={'x': 'Months Since First Purchase', 'y': 'Cohort', 'color': 'Retention (%)'},
+                        title='Retention of the Last 12 Cohorts (%)')
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info(" No cohort state yet. Run: python src/statistical_analysis.py")
 
 ### TAB 3: PRODUCTS ###
 with tab3:
@@ -317,10 +349,13 @@ with tab3:
         fig.update_yaxes(title_text="")
         st.plotly_chart(fig, use_container_width=True)
     
-    # Product Performance Table
+    # Product Performance Table (for the selected dates when a range is set)
     st.subheader(" Top 50 Products by Revenue")
-    if len(products_df) > 0:
+    if len(date_range) == 2:
+        top_products = load_top_products(date_range[0], date_range[1], 50)
+    else:
         top_products = products_df.nlargest(50, 'total_revenue')
+    if len(top_products) > 0:
         top_products_display = top_products[['product_name', 'category', 'total_revenue', 
                                                'total_orders', 'total_units_sold', 'total_profit']].copy()
         top_products_display['total_revenue'] = top_products_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
@@ -1,6 +1,6 @@
 """
 E-Commerce Sales Analytics Dashboard - Cloud Version
-Uses CSV files instead of PostgreSQL for Streamlit Cloud deployment
+Uses processed Parquet/CSV exports instead of PostgreSQL for Streamlit Cloud deployment
 """
 
 import streamlit as st
@@ -11,6 +11,17 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from pathlib import Path
 from datetime import datetime
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from src.storage import read_dataset
+
+PROCESSED_DIR = Path(__file__).parent.parent / 'data' / 'processed'
+
+# Columns the dashboard actually uses; Parquet exports read only these
+SALES_COLUMNS = ['transaction_id', 'transaction_date', 'customer_id', 'customer_segment',
+                 'product_id', 'category', 'country', 'quantity', 'total_amount', 'profit']
 
 # Page configuration
 st.set_page_config(
@@ -46,9 +57,10 @@ st.markdown("---")
 # Cache data loading
 @st.cache_data
 def load_sales_data():
-    """Load sales data from CSV"""
+    """Load sales data from the processed export (Parquet if present, else CSV)"""
     try:
-        df = pd.read_csv('data/processed/sales_for_cloud.csv')
+        # Plain strings rather than categoricals so groupbys only show filtered values
+        df = read_dataset('sales_for_cloud', PROCESSED_DIR, columns=SALES_COLUMNS, categories=False)
         df['transaction_date'] = pd.to_datetime(df['transaction_date'])
         
         # Calculate profit_margin if not present
@@ -62,18 +74,18 @@ def load_sales_data():
 
 @st.cache_data
 def load_customer_data():
-    """Load customer data from CSV"""
+    """Load customer data from the processed export"""
     try:
-        df = pd.read_csv('data/processed/customers_for_cloud.csv')
+        df = read_dataset('customers_for_cloud', PROCESSED_DIR, categories=False)
         return df
     except FileNotFoundError:
         return pd.DataFrame()
 
 @st.cache_data
 def load_product_data():
-    """Load product data from CSV"""
+    """Load product data from the processed export"""
     try:
-        df = pd.read_csv('data/processed/products_for_cloud.csv')
+        df = read_dataset('products_for_cloud', PROCESSED_DIR, categories=False)
         return df
     except FileNotFoundError:
         return pd.DataFrame()
@@ -9,306 +9,528 @@ Generates realistic e-commerce data with:
 
 import pandas as pd
 import numpy as np
-from faker import Faker
 from datetime import datetime, timedelta
-import random
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
 import sys
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 from config import DATA_CONFIG, PATHS, PRODUCT_CATEGORIES, PAYMENT_METHODS, COUNTRIES
+from src.text_pools import TextPools
+from src.storage import DatasetWriter, clear_dataset, write_dataset, read_dataset
 
 # Initialize
-fake = Faker()
-Faker.seed(42)
-np.random.seed(42)
-random.seed(42)
+np.random.seed(DATA_CONFIG['seed'])
 
-print(" Starting E-Commerce Data Generation...")
-print(f"Target: {DATA_CONFIG['num_customers']:,} customers, {DATA_CONFIG['num_products']:,} products, {DATA_CONFIG['num_transactions']:,} transactions\n")
 
+def _days_before_today(rng, n, min_days, max_days):
+    """Random dates between max_days and min_days before today"""
+    today = np.datetime64(datetime.now().date(), 'D')
+    return today - rng.integers(min_days, max_days + 1, size=n).astype('timedelta64[D]')
 
-def generate_customers(n=50000):
+
+def generate_customers(n=50000, rng=None, pools=None, output_format='csv'):
     """Generate customer data with realistic attributes"""
     print(f" Generating {n:,} customers...")
-    
-    customers = []
-    for i in range(n):
+    rng = rng if rng is not None else np.random.default_rng(DATA_CONFIG['seed'])
+    pools = pools if pools is not None else TextPools.load(seed=DATA_CONFIG['seed'])
+    
+    first_name = pools.sample('first_name', n, rng)
+    last_name = pools.sample('last_name', n, rng)
+    email = (pd.Series(first_name).str.lower() + '.' + pd.Series(last_name).str.lower()
+             + rng.integers(1, 1000, size=n).astype(str) + '@'
+             + pd.Series(pools.sample('email_domain', n, rng)).astype(str))
+    
+    df = pd.DataFrame({
+        'customer_id': _format_ids('CUST', 1, n, 6),
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': email.str.replace(' ', '', regex=False),
+        'phone': pools.sample('phone_number', n, rng, missing_rate=0.10),  # 10% missing
+        'registration_date': _days_before_today(rng, n, 365, 3 * 365),
+        'country': rng.choice(COUNTRIES, size=n, p=[0.45, 0.15, 0.10, 0.08, 0.07, 0.06, 0.05, 0.04]),
+        'state': pools.sample('state', n, rng, missing_rate=0.05),  # 5% missing
+        'city': pools.sample('city', n, rng),
+        'zip_code': pools.sample('zip_code', n, rng, missing_rate=0.08),  # 8% missing
         # Create customer segments (VIP, Regular, Occasional)
-        segment = np.random.choice(['VIP', 'Regular', 'Occasional'], p=[0.05, 0.45, 0.50])
-        
-        customer = {
-            'customer_id': f'CUST{i+1:06d}',
-            'first_name': fake.first_name(),
-            'last_name': fake.last_name(),
-            'email': fake.email(),
-            'phone': fake.phone_number() if random.random() > 0.10 else None,  # 10% missing
-            'registration_date': fake.date_between(start_date='-3y', end_date='-1y'),
-            'country': np.random.choice(COUNTRIES, p=[0.45, 0.15, 0.10, 0.08, 0.07, 0.06, 0.05, 0.04]),
-            'state': fake.state() if random.random() > 0.05 else None,  # 5% missing
-            'city': fake.city(),
-            'zip_code': fake.zipcode() if random.random() > 0.08 else None,  # 8% missing
-            'customer_segment': segment,
-            'age': int(np.random.normal(38, 12)),
-            'gender': np.random.choice(['Male', 'Female', 'Other'], p=[0.48, 0.48, 0.04])
-        }
-        customers.append(customer)
-        
-        if (i + 1) % 10000 == 0:
-            print(f"   Generated {i+1:,} customers")
-    
-    df = pd.DataFrame(customers)
+        'customer_segment': rng.choice(['VIP', 'Regular', 'Occasional'], size=n, p=[0.05, 0.45, 0.50]),
+        'age': rng.normal(38, 12, size=n).astype(int),
+        'gender': rng.choice(['Male', 'Female', 'Other'], size=n, p=[0.48, 0.48, 0.04])
+    })
     
-    # Save to CSV
-    output_path = PATHS['data_raw'] / 'customers.csv'
-    df.to_csv(output_path, index=False)
+    clear_dataset('customers', PATHS['data_raw'], parts=False)
+    output_path = write_dataset(df, 'customers', PATHS['data_raw'], output_format)
     print(f" Saved to {output_path}\n")
     
     return df
 
 
-def generate_products(n=1000):
+# Category-based pricing
+PRICE_RANGES = {
+    'Electronics': (50, 2000),
+    'Clothing': (15, 300),
+    'Home & Garden': (20, 500),
+    'Sports & Outdoors': (25, 800),
+    'Books & Media': (10, 100),
+    'Toys & Games': (15, 200),
+    'Beauty & Health': (10, 150),
+    'Food & Beverages': (5, 80),
+    'Automotive': (30, 1500),
+    'Office Supplies': (5, 300)
+}
+
+
+def generate_products(n=1000, rng=None, pools=None, output_format='csv'):
     """Generate product catalog with categories and pricing"""
     print(f" Generating {n:,} products...")
-    
-    products = []
-    for i in range(n):
-        category = np.random.choice(PRODUCT_CATEGORIES)
-        
-        # Category-based pricing
-        price_ranges = {
-            'Electronics': (50, 2000),
-            'Clothing': (15, 300),
-            'Home & Garden': (20, 500),
-            'Sports & Outdoors': (25, 800),
-            'Books & Media': (10, 100),
-            'Toys & Games': (15, 200),
-            'Beauty & Health': (10, 150),
-            'Food & Beverages': (5, 80),
-            'Automotive': (30, 1500),
-            'Office Supplies': (5, 300)
-        }
-        
-        min_price, max_price = price_ranges[category]
-        base_price = round(np.random.uniform(min_price, max_price), 2)
-        
-        product = {
-            'product_id': f'PROD{i+1:05d}',
-            'product_name': fake.catch_phrase()[:50],
-            'category': category,
-            'subcategory': fake.word().capitalize(),
-            'brand': fake.company()[:30] if random.random() > 0.05 else None,  # 5% missing
-            'price': base_price,
-            'cost': round(base_price * np.random.uniform(0.4, 0.7), 2),  # 30-60% margin
-            'weight_kg': round(np.random.uniform(0.1, 20), 2),
-            'stock_quantity': int(np.random.uniform(0, 1000)),
-            'rating': round(np.random.uniform(3.0, 5.0), 1) if random.random() > 0.10 else None,  # 10% missing
-            'num_reviews': int(np.random.exponential(50)),
-            'launch_date': fake.date_between(start_date='-5y', end_date='today')
-        }
-        products.append(product)
-        
-        if (i + 1) % 200 == 0:
-            print(f"   Generated {i+1:,} products")
-    
-    df = pd.DataFrame(products)
-    
-    # Save to CSV
-    output_path = PATHS['data_raw'] / 'products.csv'
-    df.to_csv(output_path, index=False)
+    rng = rng if rng is not None else np.random.default_rng(DATA_CONFIG['seed'])
+    pools = pools if pools is not None else TextPools.load(seed=DATA_CONFIG['seed'])
+    
+    category = rng.choice(PRODUCT_CATEGORIES, size=n)
+    min_price = pd.Series(category).map({c: r[0] for c, r in PRICE_RANGES.items()}).to_numpy()
+    max_price = pd.Series(category).map({c: r[1] for c, r in PRICE_RANGES.items()}).to_numpy()
+    base_price = np.round(rng.uniform(min_price, max_price), 2)
+    
+    rating = np.round(rng.uniform(3.0, 5.0, size=n), 1)
+    rating[rng.random(n) <= 0.10] = np.nan  # 10% missing
+    
+    df = pd.DataFrame({
+        'product_id': _format_ids('PROD', 1, n, 5),
+        'product_name': pools.sample('catch_phrase', n, rng),
+        'category': category,
+        'subcategory': pools.sample('word', n, rng),
+        'brand': pools.sample('company', n, rng, missing_rate=0.05),  # 5% missing
+        'price': base_price,
+        'cost': np.round(base_price * rng.uniform(0.4, 0.7, size=n), 2),  # 30-60% margin
+        'weight_kg': np.round(rng.uniform(0.1, 20, size=n), 2),
+        'stock_quantity': rng.uniform(0, 1000, size=n).astype(int),
+        'rating': rating,
+        'num_reviews': rng.exponential(50, size=n).astype(int),
+        'launch_date': _days_before_today(rng, n, 0, 5 * 365)
+    })
+    
+    clear_dataset('products', PATHS['data_raw'], parts=False)
+    output_path = write_dataset(df, 'products', PATHS['data_raw'], output_format)
     print(f" Saved to {output_path}\n")
     
     return df
 
 
-def generate_transactions(customers_df, products_df, n=500000):
-    """Generate transaction data with realistic patterns"""
-    print(f" Generating {n:,} transactions...")
-    
-    start_date = datetime.strptime(DATA_CONFIG['start_date'], '%Y-%m-%d')
-    end_date = datetime.strptime(DATA_CONFIG['end_date'], '%Y-%m-%d')
-    
-    transactions = []
-    
-    # Customer behavior patterns
-    customer_behavior = {
-        'VIP': {'transaction_prob': 0.30, 'avg_items': 3, 'discount_prob': 0.15},
-        'Regular': {'transaction_prob': 0.15, 'avg_items': 2, 'discount_prob': 0.08},
-        'Occasional': {'transaction_prob': 0.05, 'avg_items': 1.5, 'discount_prob': 0.05}
-    }
-    
-    transaction_id = 1
-    
-    # Generate transactions with realistic timing
-    for _, customer in customers_df.iterrows():
-        segment = customer['customer_segment']
-        behavior = customer_behavior[segment]
-        
-        # Customer registration date is their first possible purchase
-        customer_start = max(customer['registration_date'], start_date.date())
-        
-        # Number of transactions for this customer
-        days_active = (end_date.date() - customer_start).days
-        if days_active <= 0:
-            continue
-            
-        num_transactions = int(np.random.poisson(days_active * behavior['transaction_prob'] / 30))
-        
-        if num_transactions == 0:
-            continue
-        
-        # Generate transactions for this customer
-        for _ in range(num_transactions):
-            # Random transaction date
-            random_days = random.randint(0, days_active)
-            transaction_date = customer_start + timedelta(days=random_days)
-            
-            # Add seasonality (more sales in Nov-Dec, less in Jan-Feb)
-            month = transaction_date.month
-            if month in [11, 12]:  # Holiday season
-                if random.random() > 0.3:  # Skip 30% to create spike
-                    transaction_date = transaction_date
-                else:
-                    continue
-            elif month in [1, 2]:  # Post-holiday slump
-                if random.random() > 0.7:  # Skip 30% to create dip
-                    continue
-            
-            # Number of items in this transaction
-            num_items = max(1, int(np.random.poisson(behavior['avg_items'])))
-            
-            # Select products
-            selected_products = products_df.sample(n=min(num_items, len(products_df)))
-            
-            for _, product in selected_products.iterrows():
-                quantity = int(np.random.poisson(1.5)) + 1  # At least 1
-                unit_price = product['price']
-                
-                # Apply discount randomly
-                discount_pct = 0
-                if random.random() < behavior['discount_prob']:
-                    discount_pct = np.random.choice([5, 10, 15, 20, 25], p=[0.4, 0.3, 0.15, 0.10, 0.05])
-                
-                subtotal = unit_price * quantity
-                discount_amount = round(subtotal * discount_pct / 100, 2)
-                
-                # Shipping
-                shipping_cost = 0 if subtotal > 50 else round(np.random.uniform(5, 15), 2)
-                
-                # Tax (8%)
-                tax_amount = round((subtotal - discount_amount) * 0.08, 2)
-                
-                total_amount = round(subtotal - discount_amount + shipping_cost + tax_amount, 2)
-                
-                transaction = {
-                    'transaction_id': f'TXN{transaction_id:08d}',
-                    'customer_id': customer['customer_id'],
-                    'product_id': product['product_id'],
-                    'transaction_date': transaction_date,
-                    'quantity': quantity,
-                    'unit_price': unit_price,
-                    'discount_percent': discount_pct,
-                    'discount_amount': discount_amount,
-                    'subtotal': subtotal,
-                    'tax_amount': tax_amount,
-                    'shipping_cost': shipping_cost,
-                    'total_amount': total_amount,
-                    'payment_method': np.random.choice(PAYMENT_METHODS, p=[0.40, 0.25, 0.20, 0.10, 0.05]),
-                    'order_status': np.random.choice(['Completed', 'Pending', 'Cancelled', 'Returned'], 
-                                                     p=[0.90, 0.03, 0.03, 0.04]),
-                    'shipping_address': fake.address().replace('\n', ', ') if random.random() > 0.02 else None,  # 2% missing
-                    'order_notes': fake.sentence() if random.random() < 0.05 else None  # 5% have notes
-                }
-                
-                transactions.append(transaction)
-                transaction_id += 1
-                
-                if transaction_id % 50000 == 0:
-                    print(f"   Generated {transaction_id:,} transactions")
-                
-                if transaction_id > n:
-                    break
-            
-            if transaction_id > n:
-                break
-        
-        if transaction_id > n:
+# Customer behavior patterns
+CUSTOMER_BEHAVIOR = {
+    'VIP': {'transaction_prob': 0.30, 'avg_items': 3, 'discount_prob': 0.15},
+    'Regular': {'transaction_prob': 0.15, 'avg_items': 2, 'discount_prob': 0.08},
+    'Occasional': {'transaction_prob': 0.05, 'avg_items': 1.5, 'discount_prob': 0.05}
+}
+
+# Seasonality: share of orders dropped per month (Nov-Dec spike, Jan-Feb dip)
+SEASONAL_SKIP_PROB = {1: 0.3, 2: 0.3, 11: 0.3, 12: 0.3}
+
+DISCOUNT_LEVELS = [5, 10, 15, 20, 25]
+DISCOUNT_PROBS = [0.4, 0.3, 0.15, 0.10, 0.05]
+PAYMENT_PROBS = [0.40, 0.25, 0.20, 0.10, 0.05]
+ORDER_STATUSES = ['Completed', 'Pending', 'Cancelled', 'Returned']
+ORDER_STATUS_PROBS = [0.90, 0.03, 0.03, 0.04]
+
+# Customers per shard; each shard has its own seed and transaction part file
+CUSTOMER_BLOCK_SIZE = 5000
+
+# Written next to the raw data after every run; --append-days continues from it
+GENERATION_STATE_FILE = 'generation_state.json'
+
+
+def _draw_orders(customers_df, start_date, end_date, rng):
+    """
+    Draw every order for every customer in one pass
+
+    Orders fall in the half-open window [start_date, end_date), so
+    consecutive windows tile without overlap. Returns per-order arrays:
+    customer row index, order date (datetime64[D]) and basket size.
+    Orders are grouped by customer in customers_df order.
+    """
+    segments = customers_df['customer_segment'].to_numpy()
+    transaction_prob = pd.Series(segments).map(
+        {seg: b['transaction_prob'] for seg, b in CUSTOMER_BEHAVIOR.items()}).to_numpy()
+    avg_items = pd.Series(segments).map(
+        {seg: b['avg_items'] for seg, b in CUSTOMER_BEHAVIOR.items()}).to_numpy()
+    
+    # Customer registration date is their first possible purchase
+    registration = pd.to_datetime(customers_df['registration_date']).to_numpy().astype('datetime64[D]')
+    customer_start = np.maximum(registration, np.datetime64(start_date, 'D'))
+    days_active = (np.datetime64(end_date, 'D') - customer_start).astype(np.int64)
+    days_active = np.maximum(days_active, 0)
+    
+    # Number of transactions per customer
+    num_orders = rng.poisson(days_active * transaction_prob / 30)
+    num_orders[days_active <= 0] = 0
+    
+    cust_idx = np.repeat(np.arange(len(customers_df)), num_orders)
+    
+    # Random transaction date within the customer's active window
+    offsets = rng.integers(0, days_active[cust_idx])
+    order_dates = customer_start[cust_idx] + offsets.astype('timedelta64[D]')
+    
+    # Seasonality skip rules
+    months = order_dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    skip_prob = np.zeros(13)
+    for month, prob in SEASONAL_SKIP_PROB.items():
+        skip_prob[month] = prob
+    keep = rng.random(len(cust_idx)) >= skip_prob[months]
+    cust_idx = cust_idx[keep]
+    order_dates = order_dates[keep]
+    
+    # Number of items in each transaction
+    basket_sizes = np.maximum(1, rng.poisson(avg_items[cust_idx]))
+    
+    return cust_idx, order_dates, basket_sizes
+
+
+def _draw_basket_products(basket_sizes, num_products, rng):
+    """Pick product indices for every basket, without repeats inside a basket"""
+    basket_sizes = np.minimum(basket_sizes, num_products)
+    basket_id = np.repeat(np.arange(len(basket_sizes)), basket_sizes)
+    product_idx = rng.integers(0, num_products, size=len(basket_id))
+    
+    # Redraw duplicates until every basket holds distinct products
+    while True:
+        order = np.lexsort((product_idx, basket_id))
+        sorted_basket = basket_id[order]
+        sorted_product = product_idx[order]
+        dup = np.zeros(len(order), dtype=bool)
+        dup[1:] = (sorted_basket[1:] == sorted_basket[:-1]) & (sorted_product[1:] == sorted_product[:-1])
+        if not dup.any():
             break
+        redraw = order[dup]
+        product_idx[redraw] = rng.integers(0, num_products, size=len(redraw))
     
-    df = pd.DataFrame(transactions)
+    return basket_id, product_idx
+
+
+def _draw_line_items(customers_df, products_df, cust_idx, order_dates, basket_sizes, rng, text_pools):
+    """Expand orders into line items and draw all per-line attributes as arrays"""
+    basket_id, product_idx = _draw_basket_products(basket_sizes, len(products_df), rng)
+    n_lines = len(basket_id)
+    line_cust = cust_idx[basket_id]
+    
+    segments = customers_df['customer_segment'].to_numpy()[line_cust]
+    discount_prob = pd.Series(segments).map(
+        {seg: b['discount_prob'] for seg, b in CUSTOMER_BEHAVIOR.items()}).to_numpy()
+    
+    quantity = rng.poisson(1.5, size=n_lines) + 1  # At least 1
+    unit_price = products_df['price'].to_numpy()[product_idx]
+    
+    # Apply discount randomly
+    discount_pct = np.where(
+        rng.random(n_lines) < discount_prob,
+        rng.choice(DISCOUNT_LEVELS, size=n_lines, p=DISCOUNT_PROBS),
+        0
+    )
+    
+    subtotal = unit_price * quantity
+    discount_amount = np.round(subtotal * discount_pct / 100, 2)
+    
+    # Shipping
+    shipping_cost = np.where(subtotal > 50, 0, np.round(rng.uniform(5, 15, size=n_lines), 2))
+    
+    # Tax (8%)
+    tax_amount = np.round((subtotal - discount_amount) * 0.08, 2)
+    
+    total_amount = np.round(subtotal - discount_amount + shipping_cost + tax_amount, 2)
+    
+    # Low-cardinality and free-text columns are kept as categorical codes
+    payment_method = pd.Categorical.from_codes(
+        rng.choice(len(PAYMENT_METHODS), size=n_lines, p=PAYMENT_PROBS), categories=PAYMENT_METHODS)
+    order_status = pd.Categorical.from_codes(
+        rng.choice(len(ORDER_STATUSES), size=n_lines, p=ORDER_STATUS_PROBS), categories=ORDER_STATUSES)
+    
+    return pd.DataFrame({
+        'customer_id': customers_df['customer_id'].to_numpy()[line_cust],
+        'product_id': products_df['product_id'].to_numpy()[product_idx],
+        'transaction_date': order_dates[basket_id],
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'discount_percent': discount_pct,
+        'discount_amount': discount_amount,
+        'subtotal': subtotal,
+        'tax_amount': tax_amount,
+        'shipping_cost': shipping_cost,
+        'total_amount': total_amount,
+        'payment_method': payment_method,
+        'order_status': order_status,
+        'shipping_address': text_pools.sample('address', n_lines, rng, missing_rate=0.02),  # 2% missing
+        'order_notes': text_pools.sample('sentence', n_lines, rng, missing_rate=0.95)  # 5% have notes
+    })
+
+
+def _format_ids(prefix, first, count, width):
+    """Format a contiguous run of ids, e.g. TXN00000001"""
+    return prefix + pd.Series(np.arange(first, first + count)).astype(str).str.zfill(width)
+
+
+def _shard_rngs(seed, shard_index):
+    """
+    Independent (orders, lines, returns) generators for one customer shard
+    
+    Seeds are derived from the shard index alone (the same child a
+    SeedSequence(seed).spawn() would hand out), so every shard draws the
+    same values whichever worker runs it.
+    """
+    shard_seq = np.random.SeedSequence(seed, spawn_key=(shard_index,))
+    return [np.random.default_rng(child) for child in shard_seq.spawn(3)]
+
+
+# Per-process state shared by all shards, set once by _init_worker
+_WORKER_CONTEXT = {}
+
+
+def _init_worker(products_df, text_pools, start_date, end_date, seed, output_format, chunk_size, first_part):
+    """Install the read-only inputs every shard needs in this process"""
+    _WORKER_CONTEXT.update({
+        'first_part': first_part,
+        'products_df': products_df,
+        'text_pools': text_pools,
+        'start_date': start_date,
+        'end_date': end_date,
+        'seed': seed,
+        'output_format': output_format,
+        'chunk_size': chunk_size
+    })
+
+
+def _draw_shard_orders(shard_index, customers_block):
+    """Draw a shard's orders from its own orders generator"""
+    ctx = _WORKER_CONTEXT
+    orders_rng, _, _ = _shard_rngs(ctx['seed'], shard_index)
+    cust_idx, order_dates, basket_sizes = _draw_orders(customers_block, ctx['start_date'], ctx['end_date'], orders_rng)
+    basket_sizes = np.minimum(basket_sizes, len(ctx['products_df']))
+    return cust_idx, order_dates, basket_sizes
+
+
+def _count_shard_lines(task):
+    """Planning pass: number of line items a shard would produce"""
+    shard_index, customers_block = task
+    _, _, basket_sizes = _draw_shard_orders(shard_index, customers_block)
+    return int(basket_sizes.sum())
+
+
+def _generate_shard(task):
+    """
+    Generate one shard's transactions and write them to its own part file
+    
+    Returns the shard's TransactionSummary and its returns (without ids,
+    which are numbered centrally so they stay contiguous).
+    """
+    shard_index, customers_block, first_number, max_lines = task
+    ctx = _WORKER_CONTEXT
+    _, lines_rng, returns_rng = _shard_rngs(ctx['seed'], shard_index)
+    cust_idx, order_dates, basket_sizes = _draw_shard_orders(shard_index, customers_block)
+    
+    # Keep only the orders allotted to this shard (the last one may be cut short)
+    lines_before = np.cumsum(basket_sizes) - basket_sizes
+    within = lines_before < max_lines
+    cust_idx, order_dates, basket_sizes = cust_idx[within], order_dates[within], basket_sizes[within]
+    basket_sizes = np.minimum(basket_sizes, max_lines - lines_before[within])
+    
+    df = _draw_line_items(customers_block, ctx['products_df'], cust_idx, order_dates, basket_sizes,
+                          lines_rng, ctx['text_pools'])
+    df.insert(0, 'transaction_id', _format_ids('TXN', first_number, len(df), 8))
     
     # Introduce additional missing values (realistic data quality issues)
     # 5% missing payment methods
-    missing_payment = np.random.choice(df.index, size=int(len(df) * 0.05), replace=False)
+    missing_payment = lines_rng.choice(len(df), size=int(len(df) * 0.05), replace=False)
     df.loc[missing_payment, 'payment_method'] = None
     
-    # Save to CSV
-    output_path = PATHS['data_raw'] / 'transactions.csv'
-    df.to_csv(output_path, index=False)
-    print(f" Saved to {output_path}\n")
+    summary = TransactionSummary()
+    part = ctx['first_part'] + shard_index
+    with DatasetWriter('transactions', PATHS['data_raw'], ctx['output_format'], part=part) as writer:
+        for chunk_start in range(0, len(df), ctx['chunk_size']):
+            chunk = df.iloc[chunk_start:chunk_start + ctx['chunk_size']]
+            writer.write(chunk)
+            summary.update(chunk)
     
-    return df
+    return summary, _draw_returns(df, returns_rng)
 
 
-def generate_returns(transactions_df):
-    """Generate return/refund data"""
-    print(" Generating returns data...")
+def generate_transactions(customers_df, products_df, n=500000, workers=1, chunk_size=100000,
+                          output_format='csv', seed=42, start_date=None, end_date=None, pools=None,
+                          first_number=1, first_part=0, append=False):
+    """
+    Generate transaction data with realistic patterns
+    
+    The customer list is split into shards of CUSTOMER_BLOCK_SIZE, each with
+    its own seed. A planning pass counts every shard's line items so
+    transaction ids and the n-row cap can be assigned up front; shards are
+    then generated in a process pool and written to transactions/part-NNNNN
+    files. The result is identical for a given seed whatever the worker count.
+    
+    With append=True existing part files are kept: ids continue from
+    first_number and parts are numbered from first_part. n=None means no cap.
+    
+    Yields (TransactionSummary, returns DataFrame) per shard, in shard order.
+    """
+    print(f" Generating {'all' if n is None else f'{n:,}'} transactions with {workers} worker(s)...")
+    start_date = start_date or datetime.strptime(DATA_CONFIG['start_date'], '%Y-%m-%d')
+    end_date = end_date or datetime.strptime(DATA_CONFIG['end_date'], '%Y-%m-%d')
+    if not append:
+        clear_dataset('transactions', PATHS['data_raw'])
+    
+    blocks = [customers_df.iloc[i:i + CUSTOMER_BLOCK_SIZE].reset_index(drop=True)
+              for i in range(0, len(customers_df), CUSTOMER_BLOCK_SIZE)]
+    pools = pools if pools is not None else TextPools.load(seed=seed)
+    initargs = (products_df, pools, start_date, end_date, seed, output_format, chunk_size, first_part)
+    
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+        map_fn = executor.map
+    else:
+        executor = None
+        _init_worker(*initargs)
+        map_fn = map
     
-    # Select ~4% of completed transactions to be returned
-    completed = transactions_df[transactions_df['order_status'] == 'Completed']
-    return_sample = completed.sample(frac=0.04, random_state=42)
-    
-    returns = []
-    for _, txn in return_sample.iterrows():
-        return_date = txn['transaction_date'] + timedelta(days=random.randint(1, 30))
+    try:
+        # Planning pass: allot each shard its slice of transaction ids, capped at n
+        line_counts = list(map_fn(_count_shard_lines, enumerate(blocks)))
+        tasks = []
+        next_number = first_number
+        for shard_index, (block, count) in enumerate(zip(blocks, line_counts)):
+            allotted = count if n is None else min(count, n - (next_number - first_number))
+            if allotted <= 0:
+                if n is None:
+                    continue
+                break
+            tasks.append((shard_index, block, next_number, allotted))
+            next_number += allotted
+        print(f"   Planned {next_number - first_number:,} transactions across {len(tasks)} shard(s)")
         
-        return_record = {
-            'return_id': f'RET{len(returns)+1:06d}',
-            'transaction_id': txn['transaction_id'],
-            'customer_id': txn['customer_id'],
-            'product_id': txn['product_id'],
-            'return_date': return_date,
-            'return_reason': np.random.choice([
-                'Defective', 'Wrong Item', 'Not as Described', 
-                'Changed Mind', 'Better Price Found'
-            ], p=[0.25, 0.15, 0.20, 0.30, 0.10]),
-            'refund_amount': txn['total_amount'],
-            'return_status': np.random.choice(['Approved', 'Pending', 'Rejected'], p=[0.85, 0.10, 0.05])
-        }
-        returns.append(return_record)
+        generated = 0
+        for summary, returns in map_fn(_generate_shard, tasks):
+            generated += summary.count
+            print(f"   Generated {generated:,} transactions")
+            yield summary, returns
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    print(f" Saved to {PATHS['data_raw'] / 'transactions'}\n")
+
+
+def _draw_returns(transactions_df, rng):
+    """Draw returns for ~4% of the completed transactions in a frame (return ids left blank)"""
+    completed = transactions_df[transactions_df['order_status'] == 'Completed']
+    return_sample = completed.sample(frac=0.04, random_state=rng)
+    n_returns = len(return_sample)
+    
+    return_date = (pd.to_datetime(return_sample['transaction_date']).to_numpy()
+                   + rng.integers(1, 31, size=n_returns).astype('timedelta64[D]'))
+    
+    return pd.DataFrame({
+        'return_id': None,
+        'transaction_id': return_sample['transaction_id'].to_numpy(),
+        'customer_id': return_sample['customer_id'].to_numpy(),
+        'product_id': return_sample['product_id'].to_numpy(),
+        'return_date': return_date,
+        'return_reason': rng.choice([
+            'Defective', 'Wrong Item', 'Not as Described',
+            'Changed Mind', 'Better Price Found'
+        ], size=n_returns, p=[0.25, 0.15, 0.20, 0.30, 0.10]),
+        'refund_amount': return_sample['total_amount'].to_numpy(),
+        'return_status': rng.choice(['Approved', 'Pending', 'Rejected'], size=n_returns, p=[0.85, 0.10, 0.05])
+    })
+
+
+def generate_returns(returns_chunks, output_format='csv', first_number=1, part=0, append=False):
+    """
+    Generate return/refund data
+    
+    Consumes a stream of per-shard return frames, numbers them in order from
+    first_number and appends them to returns/part-NNNNN (one part per run).
+    Returns the number of returns written.
+    """
+    print(" Generating returns data...")
+    if not append:
+        clear_dataset('returns', PATHS['data_raw'])
     
-    df = pd.DataFrame(returns)
+    with DatasetWriter('returns', PATHS['data_raw'], output_format, part=part) as writer:
+        for returns in returns_chunks:
+            returns['return_id'] = _format_ids('RET', first_number + writer.rows_written,
+                                               len(returns), 6).to_numpy()
+            writer.write(returns)
     
-    # Save to CSV
-    output_path = PATHS['data_raw'] / 'returns.csv'
-    df.to_csv(output_path, index=False)
-    print(f" Saved to {output_path}")
-    print(f"   Generated {len(returns):,} returns\n")
+    print(f" Saved to {writer.path}")
+    print(f"   Generated {writer.rows_written:,} returns\n")
     
-    return df
+    return writer.rows_written
 
 
-def generate_marketing_campaigns():
-    """Generate marketing campaign data"""
-    print(" Generating marketing campaigns...")
-    
+class TransactionSummary:
+    """Running summary statistics over a stream of transaction chunks"""
+    
+    def __init__(self):
+        self.count = 0
+        self.min_date = None
+        self.max_date = None
+        self.total_revenue = 0.0
+        self.status_counts = pd.Series(dtype='int64')
+        self.null_counts = pd.Series(dtype='int64')
+    
+    def collect(self, shard_results):
+        """Merge each shard's summary and pass its returns through"""
+        for summary, returns in shard_results:
+            self.merge(summary)
+            yield returns
+    
+    def merge(self, other):
+        if other.count == 0:
+            return
+        self.min_date = other.min_date if self.min_date is None else min(self.min_date, other.min_date)
+        self.max_date = other.max_date if self.max_date is None else max(self.max_date, other.max_date)
+        self.count += other.count
+        self.total_revenue += other.total_revenue
+        self.status_counts = self.status_counts.add(other.status_counts, fill_value=0)
+        self.null_counts = self.null_counts.add(other.null_counts, fill_value=0)
+    
+    def update(self, chunk):
+        dates = pd.to_datetime(chunk['transaction_date'])
+        self.min_date = dates.min() if self.min_date is None else min(self.min_date, dates.min())
+        self.max_date = dates.max() if self.max_date is None else max(self.max_date, dates.max())
+        self.count += len(chunk)
+        self.total_revenue += chunk['total_amount'].sum()
+        self.status_counts = self.status_counts.add(chunk['order_status'].value_counts(), fill_value=0)
+        self.null_counts = self.null_counts.add(chunk.isnull().sum(), fill_value=0)
+    
+    def status(self, name):
+        return int(self.status_counts.get(name, 0))
+
+
+CAMPAIGN_NAMES = [
+    'Summer Sale 2022', 'Black Friday 2022', 'Cyber Monday 2022',
+    'Spring Clearance 2023', 'Back to School 2023', 'Holiday Season 2023',
+    'New Year Sale 2023', 'Valentine Special 2023', 'Easter Promotion 2023',
+    'Summer Sale 2023', 'Black Friday 2023', 'Cyber Monday 2023'
+]
+
+# Campaigns start every CAMPAIGN_INTERVAL_DAYS from START_DATE and run for 15 days
+CAMPAIGN_INTERVAL_DAYS = 60
+
+
+def _campaign_rows(first_slot, last_slot, anchor_date):
+    """Campaign records for schedule slots first_slot..last_slot-1"""
     campaigns = []
-    campaign_names = [
-        'Summer Sale 2022', 'Black Friday 2022', 'Cyber Monday 2022',
-        'Spring Clearance 2023', 'Back to School 2023', 'Holiday Season 2023',
-        'New Year Sale 2023', 'Valentine Special 2023', 'Easter Promotion 2023',
-        'Summer Sale 2023', 'Black Friday 2023', 'Cyber Monday 2023'
-    ]
-    
-    start_date = datetime.strptime(DATA_CONFIG['start_date'], '%Y-%m-%d')
-    
-    for i, name in enumerate(campaign_names):
+    for i in range(first_slot, last_slot):
+        start = anchor_date + timedelta(days=i * CAMPAIGN_INTERVAL_DAYS)
+        if i < len(CAMPAIGN_NAMES):
+            name = CAMPAIGN_NAMES[i]
+        else:
+            # Later slots reuse the themes with the slot's own year
+            name = f"{CAMPAIGN_NAMES[i % len(CAMPAIGN_NAMES)].rsplit(' ', 1)[0]} {start.year}"
         campaign = {
             'campaign_id': f'CAMP{i+1:03d}',
             'campaign_name': name,
-            'start_date': start_date + timedelta(days=i*60),
-            'end_date': start_date + timedelta(days=i*60+14),
+            'start_date': start,
+            'end_date': start + timedelta(days=14),
             'budget': round(np.random.uniform(10000, 100000), 2),
             'channel': np.random.choice(['Email', 'Social Media', 'Search Ads', 'Display Ads']),
             'target_segment': np.random.choice(['All', 'VIP', 'Regular', 'Occasional']),
@@ -317,18 +539,62 @@ def generate_marketing_campaigns():
             'conversions': int(np.random.uniform(100, 5000))
         }
         campaigns.append(campaign)
+    return pd.DataFrame(campaigns)
+
+
+def generate_marketing_campaigns(output_format='csv'):
+    """Generate marketing campaign data"""
+    print(" Generating marketing campaigns...")
     
-    df = pd.DataFrame(campaigns)
+    start_date = datetime.strptime(DATA_CONFIG['start_date'], '%Y-%m-%d')
+    df = _campaign_rows(0, len(CAMPAIGN_NAMES), start_date)
     
-    # Save to CSV
-    output_path = PATHS['data_raw'] / 'marketing_campaigns.csv'
-    df.to_csv(output_path, index=False)
+    clear_dataset('marketing_campaigns', PATHS['data_raw'], parts=False)
+    output_path = write_dataset(df, 'marketing_campaigns', PATHS['data_raw'], output_format)
     print(f" Saved to {output_path}\n")
     
     return df
 
 
-def generate_summary_stats(customers_df, products_df, transactions_df, returns_df):
+def extend_marketing_campaigns(state, start_date, end_date, output_format='csv'):
+    """
+    Add campaigns for schedule slots starting in [start_date, end_date)
+    
+    Returns the next unused schedule slot.
+    """
+    anchor_date = datetime.strptime(state['campaign_anchor'], '%Y-%m-%d')
+    first_slot = max(state['next_campaign_slot'], -(-(start_date - anchor_date).days // CAMPAIGN_INTERVAL_DAYS))
+    last_slot = (end_date - anchor_date - timedelta(days=1)).days // CAMPAIGN_INTERVAL_DAYS + 1
+    if last_slot <= first_slot:
+        return state['next_campaign_slot']
+    
+    print(" Extending marketing campaigns...")
+    existing = read_dataset('marketing_campaigns', PATHS['data_raw'], categories=False)
+    new_campaigns = _campaign_rows(first_slot, last_slot, anchor_date)
+    clear_dataset('marketing_campaigns', PATHS['data_raw'], parts=False)
+    output_path = write_dataset(pd.concat([existing, new_campaigns], ignore_index=True),
+                                'marketing_campaigns', PATHS['data_raw'], output_format)
+    print(f" Added {len(new_campaigns)} campaign(s) to {output_path}\n")
+    
+    return last_slot
+
+
+def load_generation_state():
+    """Where the previous run stopped (written by save_generation_state)"""
+    state_path = PATHS['data_raw'] / GENERATION_STATE_FILE
+    if not state_path.exists():
+        raise FileNotFoundError(f"{state_path} not found - run a full generation before --append-days")
+    with open(state_path) as f:
+        return json.load(f)
+
+
+def save_generation_state(state):
+    """Record where this run stopped so --append-days can continue from it"""
+    with open(PATHS['data_raw'] / GENERATION_STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def generate_summary_stats(customers_df, products_df, transaction_summary, num_returns):
     """Generate and display summary statistics"""
     print("\n" + "="*60)
     print(" DATA GENERATION SUMMARY")
@@ -343,22 +609,27 @@ def generate_summary_stats(customers_df, products_df, transactions_df, returns_d
     print(f"   - Categories: {products_df['category'].nunique()}")
     print(f"   - Avg Price: ${products_df['price'].mean():.2f}")
     
-    print(f"\n Transactions: {len(transactions_df):,}")
-    print(f"   - Date Range: {transactions_df['transaction_date'].min()} to {transactions_df['transaction_date'].max()}")
-    print(f"   - Total Revenue: ${transactions_df['total_amount'].sum():,.2f}")
-    print(f"   - Avg Transaction: ${transactions_df['total_amount'].mean():.2f}")
+    txn = transaction_summary
+    print(f"\n Transactions: {txn.count:,}")
+    print(f"   - Date Range: {txn.min_date} to {txn.max_date}")
+    print(f"   - Total Revenue: ${txn.total_revenue:,.2f}")
+    print(f"   - Avg Transaction: ${txn.total_revenue / max(txn.count, 1):.2f}")
     print(f"   - Order Status:")
-    print(f"     • Completed: {len(transactions_df[transactions_df['order_status']=='Completed']):,}")
-    print(f"     • Returned: {len(transactions_df[transactions_df['order_status']=='Returned']):,}")
-    print(f"     • Cancelled: {len(transactions_df[transactions_df['order_status']=='Cancelled']):,}")
+    print(f"     • Completed: {txn.status('Completed'):,}")
+    print(f"     • Returned: {txn.status('Returned'):,}")
+    print(f"     • Cancelled: {txn.status('Cancelled'):,}")
     
-    print(f"\n Returns: {len(returns_df):,}")
-    print(f"   - Return Rate: {len(returns_df)/len(transactions_df[transactions_df['order_status']=='Completed'])*100:.2f}%")
+    print(f"\n Returns: {num_returns:,}")
+    print(f"   - Return Rate: {num_returns/max(txn.status('Completed'), 1)*100:.2f}%")
     
     # Missing data summary
     print(f"\n DATA QUALITY (Missing Values):")
-    for df_name, df in [('Customers', customers_df), ('Products', products_df), ('Transactions', transactions_df)]:
-        missing_pct = (df.isnull().sum() / len(df) * 100).round(2)
+    for df_name, null_counts, rows in [
+        ('Customers', customers_df.isnull().sum(), len(customers_df)),
+        ('Products', products_df.isnull().sum(), len(products_df)),
+        ('Transactions', txn.null_counts, txn.count)
+    ]:
+        missing_pct = (null_counts / max(rows, 1) * 100).round(2)
         missing_cols = missing_pct[missing_pct > 0]
         if len(missing_cols) > 0:
             print(f"\n   {df_name}:")
@@ -370,18 +641,124 @@ def generate_summary_stats(customers_df, products_df, transactions_df, returns_d
     print(f"{'='*60}\n")
 
 
-def main():
+def parse_args():
+    """Command line options (defaults come from DATA_CONFIG)"""
+    parser = argparse.ArgumentParser(description="Generate synthetic e-commerce data")
+    parser.add_argument('--workers', type=int, default=DATA_CONFIG['workers'],
+                        help="Processes used to generate transaction shards")
+    parser.add_argument('--seed', type=int, default=DATA_CONFIG['seed'],
+                        help="Master seed; output is identical for a given seed whatever --workers is")
+    parser.add_argument('--chunk-size', type=int, default=DATA_CONFIG['chunk_size'],
+                        help="Rows per chunk appended to each output file")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=DATA_CONFIG['output_format'],
+                        help="Output format for all raw datasets")
+    parser.add_argument('--append-days', type=int, default=0,
+                        help="Extend the existing raw data by N days instead of regenerating it")
+    return parser.parse_args()
+
+
+def seed_everything(seed):
+    """Seed the global generator used for marketing campaigns"""
+    np.random.seed(seed)
+
+
+def append_days(args):
+    """
+    Extend existing raw data by args.append_days days
+    
+    New transactions, returns and campaign rows are generated for the days
+    after the previous run's end date, for the existing customers and
+    products, and written as new part files. Transaction and return ids
+    continue where the previous run stopped.
+    """
+    state = load_generation_state()
+    start_date = datetime.strptime(state['end_date'], '%Y-%m-%d')
+    end_date = start_date + timedelta(days=args.append_days)
+    print(f" Appending {args.append_days} day(s): {start_date.date()} to {(end_date - timedelta(days=1)).date()}\n")
+    
+    customers_df = read_dataset('customers', PATHS['data_raw'], categories=False)
+    products_df = read_dataset('products', PATHS['data_raw'], categories=False)
+    
+    # Seeds are keyed by the window start, so each appended day draws fresh values
+    window_seed = [args.seed, int(np.datetime64(start_date, 'D').astype(np.int64))]
+    np.random.seed(window_seed)
+    
+    transaction_summary = TransactionSummary()
+    shard_results = generate_transactions(
+        customers_df, products_df, None, workers=args.workers, chunk_size=args.chunk_size,
+        output_format=args.format, seed=window_seed, start_date=start_date, end_date=end_date,
+        pools=TextPools.load(seed=args.seed), first_number=state['next_transaction_number'],
+        first_part=state['next_transaction_part'], append=True
+    )
+    num_returns = generate_returns(transaction_summary.collect(shard_results), output_format=args.format,
+                                   first_number=state['next_return_number'],
+                                   part=state['next_return_part'], append=True)
+    next_campaign_slot = extend_marketing_campaigns(state, start_date, end_date, args.format)
+    
+    num_shards = -(-len(customers_df) // CUSTOMER_BLOCK_SIZE)
+    state.update({
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'next_transaction_number': state['next_transaction_number'] + transaction_summary.count,
+        'next_transaction_part': state['next_transaction_part'] + num_shards,
+        'next_return_number': state['next_return_number'] + num_returns,
+        'next_return_part': state['next_return_part'] + 1,
+        'next_campaign_slot': next_campaign_slot
+    })
+    save_generation_state(state)
+    
+    generate_summary_stats(customers_df, products_df, transaction_summary, num_returns)
+    print(f" Raw data now runs to {(end_date - timedelta(days=1)).date()}\n")
+
+
+def main(args):
     """Main execution function"""
+    if args.append_days:
+        try:
+            append_days(args)
+            return True
+        except Exception as e:
+            print(f"\n ERROR: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    print(" Starting E-Commerce Data Generation...")
+    print(f"Target: {DATA_CONFIG['num_customers']:,} customers, {DATA_CONFIG['num_products']:,} products, {DATA_CONFIG['num_transactions']:,} transactions\n")
+    
     try:
+        seed_everything(args.seed)
+        
         # Generate all datasets
-        customers_df = generate_customers(DATA_CONFIG['num_customers'])
-        products_df = generate_products(DATA_CONFIG['num_products'])
-        transactions_df = generate_transactions(customers_df, products_df, DATA_CONFIG['num_transactions'])
-        returns_df = generate_returns(transactions_df)
-        marketing_df = generate_marketing_campaigns()
+        rng = np.random.default_rng(args.seed)
+        pools = TextPools.load(seed=args.seed)
+        customers_df = generate_customers(DATA_CONFIG['num_customers'], rng, pools, args.format)
+        products_df = generate_products(DATA_CONFIG['num_products'], rng, pools, args.format)
+        
+        # Stream shard results through the summary into the returns writer,
+        # so no stage ever holds the full transaction history in memory
+        transaction_summary = TransactionSummary()
+        shard_results = generate_transactions(
+            customers_df, products_df, DATA_CONFIG['num_transactions'],
+            workers=args.workers, chunk_size=args.chunk_size,
+            output_format=args.format, seed=args.seed, pools=pools
+        )
+        num_returns = generate_returns(transaction_summary.collect(shard_results),
+                                       output_format=args.format)
+        marketing_df = generate_marketing_campaigns(args.format)
+        
+        save_generation_state({
+            'seed': args.seed,
+            'end_date': DATA_CONFIG['end_date'],
+            'campaign_anchor': DATA_CONFIG['start_date'],
+            'next_campaign_slot': len(marketing_df),
+            'next_transaction_number': transaction_summary.count + 1,
+            'next_transaction_part': -(-len(customers_df) // CUSTOMER_BLOCK_SIZE),
+            'next_return_number': num_returns + 1,
+            'next_return_part': 1
+        })
         
         # Generate summary
-        generate_summary_stats(customers_df, products_df, transactions_df, returns_df)
+        generate_summary_stats(customers_df, products_df, transaction_summary, num_returns)
         
         print(" All data files generated successfully!")
         print(f" Location: {PATHS['data_raw']}\n")
@@ -396,7 +773,7 @@ def main():
 
 
 if __name__ == "__main__":
-    success = main()
+    success = main(parse_args())
     sys.exit(0 if success else 1)
 
 
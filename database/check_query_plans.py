@@ -0,0 +1,308 @@
+"""
+Query Plan Regression Checker for E-Commerce Analytics
+Runs the queries the dashboard, statistical analysis, model training and reports
+issue with EXPLAIN (ANALYZE, BUFFERS) against the local PostgreSQL database, stores
+plans and timings, and flags plan shape changes or latency regressions
+against a saved baseline.
+
+Usage:
+------
+python database/check_query_plans.py --save-baseline   # before a schema/index change
+python database/check_query_plans.py                   # after it; exits 1 on regressions
+"""
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from pathlib import Path
+import argparse
+import json
+import re
+import statistics
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from config import DATABASE_URL, PATHS
+from src.pipeline_metrics import REGRESSION_THRESHOLD
+
+PLAN_DIR = PATHS['reports'] / 'query_plans'
+BASELINE_FILE = PLAN_DIR / 'baseline.json'
+
+# Queries are flagged when this many milliseconds slower as well as over the threshold
+MIN_REGRESSION_MS = 5.0
+
+# Days covered by the dashboard date-range queries (ending at the latest sale)
+DATE_RANGE_DAYS = 90
+
+# Sales behind the latest one that the RFM/cohort state refreshes read (a typical incremental load)
+REFRESH_SALES = 10000
+
+# Fixed catalogue of the queries the project issues: name -> (source, SQL).
+# :start_date, :end_date and :after_sales_key are bound per run.
+QUERY_CATALOGUE = {
+    'dashboard_sales': ('dashboards/streamlit_app.py (load_sales, DASHBOARD_COLUMNS)', """
+        SELECT transaction_id, transaction_date, year_month, customer_id, customer_segment,
+               product_id, category, country, payment_method, quantity, total_amount, profit
+        FROM vw_sales_overview
+        WHERE order_status = 'Completed'
+    """),
+    'dashboard_customers': ('dashboards/streamlit_app.py, train_ml_models.py (load_clv_features)', """
+        SELECT * FROM vw_customer_lifetime_value
+    """),
+    'dashboard_products': ('dashboards/streamlit_app.py', """
+        SELECT * FROM vw_product_performance
+    """),
+    'dashboard_top_products': ('dashboards/streamlit_app.py (date range)', """
+        SELECT * FROM top_products(:start_date, :end_date, 50)
+    """),
+    'stats_daily_revenue': ('src/statistical_analysis.py (load_daily_revenue)', """
+        SELECT date AS transaction_date, SUM(total_amount) AS total_amount
+        FROM mv_daily_sales
+        WHERE order_status = 'Completed'
+        GROUP BY date
+        ORDER BY date
+    """),
+    'stats_rfm_refresh': ('src/rfm_store.py (RFMStore.refresh)', """
+        SELECT sales_key, customer_id, transaction_date, total_amount
+        FROM vw_sales_overview
+        WHERE order_status = 'Completed' AND sales_key > :after_sales_key
+    """),
+    'stats_cohort_refresh': ('src/cohort_store.py (CohortStore.refresh)', """
+        SELECT sales_key, customer_id, transaction_date
+        FROM vw_sales_overview
+        WHERE order_status = 'Completed' AND sales_key > :after_sales_key
+    """),
+    'stats_campaigns': ('src/statistical_analysis.py', """
+        SELECT * FROM dim_marketing_campaigns
+    """),
+    'ml_sales': ('train_ml_models.py, generate_ml_plots.py (load_sales)', """
+        SELECT customer_id, product_id, transaction_date, quantity, total_amount
+        FROM vw_sales_overview
+        WHERE order_status = 'Completed'
+    """),
+    'report_daily_rollup': ('reports/generate_report.py', """
+        SELECT * FROM mv_daily_sales WHERE order_status = 'Completed'
+    """),
+    'report_distinct_counts': ('reports/generate_report.py', """
+        SELECT COUNT(*) AS line_items,
+               COUNT(DISTINCT transaction_id) AS transactions,
+               COUNT(DISTINCT customer_key) AS customers,
+               COUNT(DISTINCT product_key) AS products
+        FROM fact_sales
+        WHERE order_status = 'Completed'
+    """),
+    'report_segment_customers': ('reports/generate_report.py', """
+        SELECT dc.customer_segment, COUNT(DISTINCT fs.customer_key) AS customers
+        FROM fact_sales fs
+        JOIN dim_customers dc ON fs.customer_key = dc.customer_key
+        WHERE fs.order_status = 'Completed'
+        GROUP BY dc.customer_segment
+    """)
+}
+
+# Monthly partition suffix (fact_sales_2024_03, and its index names); new months must not read as a plan change
+_PARTITION_SUFFIX = re.compile(r'_\d{4}_\d{2}(?=_|$)')
+
+
+def create_db_engine():
+    """Create a connection to the local PostgreSQL database (other backends are refused)"""
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() != 'postgresql':
+        raise ValueError(f"Query plans need PostgreSQL, DATABASE_URL uses {url.get_backend_name()}")
+    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    print(" Database connection established\n")
+    return engine
+
+
+def default_params(engine):
+    """Bind values: the dashboard's last DATE_RANGE_DAYS and a refresh of the last REFRESH_SALES sales"""
+    with engine.connect() as conn:
+        end_date, max_key = conn.execute(text(
+            "SELECT MAX(transaction_date), COALESCE(MAX(sales_key), 0) FROM fact_sales")).one()
+    end_date = end_date or datetime.now().date()
+    return {
+        'start_date': str(end_date - timedelta(days=DATE_RANGE_DAYS - 1)),
+        'end_date': str(end_date),
+        'after_sales_key': max(max_key - REFRESH_SALES, 0)
+    }
+
+
+def plan_shape(node, depth=0):
+    """
+    Cost-free outline of a plan: one line per node type and relation/index
+
+    Partition names are collapsed to their parent (fact_sales_*) and repeated
+    sibling subtrees (one scan per partition) are listed once, so only real
+    strategy changes alter the shape.
+    """
+    label = node['Node Type']
+    if 'Join Type' in node:
+        label = f"{node['Join Type']} {label}"
+    if 'Strategy' in node:
+        label = f"{node['Strategy']} {label}"
+    if 'Index Name' in node:
+        label += f" using {_PARTITION_SUFFIX.sub('_*', node['Index Name'])}"
+    if 'Relation Name' in node:
+        label += f" on {_PARTITION_SUFFIX.sub('_*', node['Relation Name'])}"
+
+    lines = ['  ' * depth + label]
+    seen = set()
+    for child in node.get('Plans', []):
+        subtree = tuple(plan_shape(child, depth + 1))
+        if subtree not in seen:
+            seen.add(subtree)
+            lines.extend(subtree)
+    return lines
+
+
+def explain_query(conn, sql, params, runs=3):
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) on a query several times
+
+    Parameters:
+    -----------
+    conn : sqlalchemy Connection
+        Connection inside a transaction that is rolled back afterwards
+    sql : str
+        Query from QUERY_CATALOGUE
+    params : dict
+        Bind values (only those the query references are used)
+    runs : int
+        Executions; the median execution time is reported
+
+    Returns:
+    --------
+    dict
+        Timings, buffer counts, plan shape and the last full JSON plan
+    """
+    bound = {name: value for name, value in params.items() if f":{name}" in sql}
+    executions, planning = [], []
+    for _ in range(runs):
+        result = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), bound).scalar()
+        explained = (json.loads(result) if isinstance(result, str) else result)[0]
+        executions.append(explained['Execution Time'])
+        planning.append(explained['Planning Time'])
+
+    plan = explained['Plan']
+    return {
+        'execution_ms': round(statistics.median(executions), 3),
+        'planning_ms': round(statistics.median(planning), 3),
+        'rows': plan.get('Actual Rows', 0),
+        'shared_hit_blocks': plan.get('Shared Hit Blocks', 0),
+        'shared_read_blocks': plan.get('Shared Read Blocks', 0),
+        'shape': plan_shape(plan),
+        'plan': plan
+    }
+
+
+def run_catalogue(engine, params, runs=3, only=None):
+    """Explain every catalogue query (or those named in only); returns name -> result"""
+    results = {}
+    for name, (source, sql) in QUERY_CATALOGUE.items():
+        if only and name not in only:
+            continue
+        # EXPLAIN ANALYZE executes the query; roll back so nothing it touches persists
+        with engine.connect() as conn:
+            try:
+                result = explain_query(conn, sql, params, runs)
+            finally:
+                conn.rollback()
+        result.update({'source': source, 'sql': ' '.join(sql.split())})
+        results[name] = result
+        print(f"   {name:<28}{result['execution_ms']:>10.1f} ms{result['rows']:>12,} rows"
+              f"{result['shared_hit_blocks'] + result['shared_read_blocks']:>10,} buffers")
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold=REGRESSION_THRESHOLD, min_ms=MIN_REGRESSION_MS):
+    """
+    Flag queries whose plan shape changed or that got slower than the baseline
+
+    Returns:
+    --------
+    list of str
+        One message per regression
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline['queries'].get(name)
+        if old is None:
+            continue
+        if result['shape'] != old['shape']:
+            before, after = set(old['shape']), set(result['shape'])
+            removed = [line.strip() for line in old['shape'] if line not in after]
+            added = [line.strip() for line in result['shape'] if line not in before]
+            regressions.append(f"{name}: plan changed (-{removed or 'reordered'} +{added or 'reordered'})")
+        slower = result['execution_ms'] - old['execution_ms']
+        if slower >= min_ms and result['execution_ms'] > old['execution_ms'] * (1 + threshold):
+            regressions.append(f"{name}: {old['execution_ms']:.1f} ms -> {result['execution_ms']:.1f} ms "
+                               f"(buffers {old['shared_hit_blocks'] + old['shared_read_blocks']:,} -> "
+                               f"{result['shared_hit_blocks'] + result['shared_read_blocks']:,})")
+    return regressions
+
+
+def save_run(run, path):
+    """Write a run (params + per-query results) as JSON"""
+    PLAN_DIR.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2, default=str)
+    return path
+
+
+def parse_args():
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Check analytics query plans against a saved baseline")
+    parser.add_argument('--runs', type=int, default=3,
+                        help="EXPLAIN ANALYZE executions per query (median is kept)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store this run as the new baseline instead of comparing")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative slowdown that counts as a latency regression")
+    parser.add_argument('--only', nargs='+', choices=list(QUERY_CATALOGUE),
+                        help="Check only these catalogue queries")
+    return parser.parse_args()
+
+
+def main(args):
+    """Explain the catalogue, save the run and compare it with the baseline; returns True when clean"""
+    print(" Checking analytics query plans...")
+    print(f"Database: {DATABASE_URL.split('@')[1]}\n")  # Hide password
+    engine = create_db_engine()
+
+    baseline = None
+    if BASELINE_FILE.exists() and not args.save_baseline:
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    # Reuse the baseline's bind values so both runs ask the same questions
+    params = default_params(engine)
+    if baseline:
+        params.update(baseline['params'])
+
+    started_at = datetime.now()
+    results = run_catalogue(engine, params, args.runs, args.only)
+    run = {'started_at': started_at.isoformat(timespec='seconds'), 'runs': args.runs,
+           'params': params, 'queries': results}
+    path = save_run(run, PLAN_DIR / f"query_plans_{started_at:%Y%m%d_%H%M%S}.json")
+    print(f"\n Saved plans to {path}")
+
+    if args.save_baseline:
+        save_run(run, BASELINE_FILE)
+        print(f" Saved baseline to {BASELINE_FILE}")
+        return True
+    if baseline is None:
+        print(" No baseline yet; run with --save-baseline to create one")
+        return True
+
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    print(f" Compared with baseline of {baseline['started_at']}: {len(regressions)} regression(s)")
+    for message in regressions:
+        print(f"   {message}")
+    return not regressions
+
+
+if __name__ == "__main__":
+    success = main(parse_args())
+    sys.exit(0 if success else 1)
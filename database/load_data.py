@@ -1,29 +1,82 @@
 """
 Data Loading Pipeline for E-Commerce Analytics
-Loads CSV data into PostgreSQL star schema
+Loads raw CSV/Parquet data into PostgreSQL star schema
 """
 
 import pandas as pd
 import numpy as np
 from sqlalchemy import create_engine, text
 from pathlib import Path
+import argparse
+import io
 import sys
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
-from config import DATABASE_URL, PATHS
+from config import DATABASE_URL, PATHS, LOAD_CONFIG
+from src.storage import read_dataset, iter_dataset
+from src.pipeline_metrics import RunReport, instrumented, timed, timed_iter, record_bytes
 
 print(" Starting Data Loading Pipeline...")
 print(f"Database: {DATABASE_URL.split('@')[1]}\n")  # Hide password
 
+# Rows per fact batch ('copy' streams each batch through COPY FROM STDIN)
+BATCH_SIZE = {'copy': 100000, 'insert': 10000}
 
-def create_db_engine():
+# Fact columns holding surrogate keys; written as nullable integers
+KEY_COLUMNS = ['sales_key', 'customer_key', 'product_key', 'time_key', 'geography_key', 'return_time_key']
+
+# Raw transaction columns read by the sales loader, and the fact columns written
+SALES_COLUMNS = [
+    'transaction_id', 'customer_id', 'product_id', 'transaction_date', 'quantity', 'unit_price',
+    'subtotal', 'discount_percent', 'discount_amount', 'tax_amount', 'shipping_cost', 'total_amount',
+    'payment_method', 'order_status', 'shipping_address', 'order_notes'
+]
+FACT_SALES_COLUMNS = [
+    'transaction_id', 'customer_key', 'product_key', 'time_key', 'geography_key',
+    'transaction_date', 'quantity', 'unit_price', 'subtotal', 'discount_percent',
+    'discount_amount', 'tax_amount', 'shipping_cost', 'total_amount',
+    'payment_method', 'order_status', 'shipping_address', 'order_notes'
+]
+FACT_RETURNS_COLUMNS = [
+    'return_id', 'sales_key', 'customer_key', 'product_key', 'return_time_key',
+    'transaction_id', 'return_date', 'return_reason', 'refund_amount', 'return_status'
+]
+
+# Tables whose secondary indexes and foreign keys are deferred during bulk loads
+FACT_TABLES = ['fact_sales', 'fact_returns']
+
+# Months known to have a partition, per fact table (filled by ensure_partitions)
+_ENSURED_PARTITIONS = {}
+
+# Dropped index/FK definitions, kept until rebuilt so an interrupted load can restore them
+DEFERRED_DDL_FILE = PATHS['data_cache'] / 'deferred_ddl.json'
+
+# Columns identifying a location when resolving geography keys
+GEO_KEY_COLUMNS = ['country', 'state', 'city']
+
+# Simplified country to region mapping for dim_geography
+REGION_MAP = {
+    'USA': 'North America', 'Canada': 'North America',
+    'UK': 'Europe', 'Germany': 'Europe', 'France': 'Europe',
+    'Australia': 'Oceania', 'Japan': 'Asia', 'Brazil': 'South America'
+}
+
+
+def create_db_engine(pool_size=5):
     """Create database connection"""
     try:
         # Create engine with proper configuration
         engine = create_engine(
             DATABASE_URL,
+            pool_size=pool_size,  # One connection per parallel loader
+            max_overflow=0,  # Bounded: never open more than pool_size
             pool_pre_ping=True,  # Verify connections before using
             echo=False  # Set to True for SQL debugging
         )
@@ -46,226 +99,864 @@ def create_db_engine():
         sys.exit(1)
 
 
-def load_dimension_customers(engine):
+def copy_dataframe(conn, df, table):
+    """
+    Bulk-load a DataFrame with COPY ... FROM STDIN
+    
+    The frame is serialized to an in-memory CSV buffer (empty fields are NULL)
+    and streamed to PostgreSQL over the connection's DBAPI cursor, inside the
+    caller's transaction. Returns bytes sent.
+    """
+    with timed('serialize'):
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+    
+    columns = ', '.join(df.columns)
+    with timed('database'), conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    
+    record_bytes(buffer.tell())
+    return buffer.tell()
+
+
+def write_batches(conn, df, table, method='copy', label=None):
+    """
+    Write a fact frame in batches, reporting rows/second for each batch
+    
+    Parameters:
+    -----------
+    conn : Connection
+        SQLAlchemy connection; batches join its open transaction
+    df : DataFrame
+        Rows to load, columns named as in the target table
+    table : str
+        Target table
+    method : str
+        'copy' (COPY FROM STDIN) or 'insert' (DataFrame.to_sql multi-row INSERT)
+    label : str
+        Prefix for progress lines (partition / worker)
+    """
+    batch_size = BATCH_SIZE[method]
+    total_batches = max((len(df) + batch_size - 1) // batch_size, 1)
+    prefix = f"[{label}] " if label else ""
+    
+    for i in range(0, len(df), batch_size):
+        batch = df.iloc[i:i+batch_size]
+        batch_start = time.perf_counter()
+        if method == 'copy':
+            copy_dataframe(conn, batch, table)
+        else:
+            with timed('database'):
+                batch.to_sql(table, conn, if_exists='append', index=False, method='multi')
+            # Parameters sent, approximated by the batch's in-memory size
+            record_bytes(int(batch.memory_usage(index=False, deep=True).sum()))
+        elapsed = time.perf_counter() - batch_start
+        
+        batch_num = (i // batch_size) + 1
+        print(f"    {prefix}Loaded batch {batch_num}/{total_batches} ({len(batch):,} records, "
+              f"{len(batch) / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def load_partition(engine, df, table, method, label, max_retries):
+    """
+    Load one key-range partition in its own transaction, retrying on failure
+    
+    A failed attempt rolls back completely, so a retry never duplicates rows.
+    """
+    for attempt in range(1, max_retries + 2):
+        worker = threading.current_thread().name
+        try:
+            with engine.begin() as conn:
+                write_batches(conn, df, table, method, label=f"{label} @ {worker}")
+            return len(df)
+        except Exception as e:
+            if attempt > max_retries:
+                raise
+            delay = LOAD_CONFIG['retry_delay'] * 2 ** (attempt - 1)
+            print(f"     [{label}] attempt {attempt} failed ({type(e).__name__}: {e}); retrying in {delay:.0f}s")
+            time.sleep(delay)
+
+
+def load_partitioned(engine, df, table, key_column, method='copy', parallelism=1,
+                     partition_rows=None, max_retries=None):
+    """
+    Split a fact frame into key-range partitions and load them concurrently
+    
+    Parameters:
+    -----------
+    engine : Engine
+        SQLAlchemy engine whose pool holds at least `parallelism` connections
+    df : DataFrame
+        Rows to load, columns named as in the target table
+    table : str
+        Target table
+    key_column : str
+        Column whose sorted ranges define the partitions (e.g. transaction_id)
+    method : str
+        'copy' or 'insert' (see write_batches)
+    parallelism : int
+        Partitions loaded at the same time
+    partition_rows : int
+        Target rows per partition (defaults to LOAD_CONFIG['partition_rows'])
+    max_retries : int
+        Retries per failed partition (defaults to LOAD_CONFIG['max_retries'])
+    """
+    partition_rows = partition_rows or LOAD_CONFIG['partition_rows']
+    max_retries = LOAD_CONFIG['max_retries'] if max_retries is None else max_retries
+    
+    df = df.sort_values(key_column, kind='stable').reset_index(drop=True)
+    for col in df.columns.intersection(KEY_COLUMNS):
+        df[col] = df[col].astype('Int64')  # keep keys integral when some are unmatched
+    
+    num_partitions = max(parallelism, -(-len(df) // partition_rows), 1)
+    bounds = np.linspace(0, len(df), num_partitions + 1).astype(int)
+    partitions = []
+    for i in range(num_partitions):
+        part = df.iloc[bounds[i]:bounds[i + 1]]
+        if len(part) > 0:
+            label = f"{table} p{i + 1}/{num_partitions} {part[key_column].iloc[0]}..{part[key_column].iloc[-1]}"
+            partitions.append((label, part))
+    
+    print(f"   {len(partitions)} partitions of ~{len(df) // max(len(partitions), 1):,} rows, "
+          f"{parallelism} parallel ({method})")
+    
+    start_time = time.perf_counter()
+    failed = []
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='loader') as executor:
+        futures = {executor.submit(load_partition, engine, part, table, method, label, max_retries): label
+                   for label, part in partitions}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed.append(futures[future])
+                print(f"    [{futures[future]}] failed after {max_retries} retries: {e}")
+    
+    if failed:
+        raise RuntimeError(f"{len(failed)} {table} partitions failed to load: {', '.join(failed)}")
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"   {table}: {len(df):,} rows in {elapsed:.2f}s ({len(df) / max(elapsed, 1e-9):,.0f} rows/s)")
+    return len(df)
+
+
+def capture_deferrable_ddl(engine, tables):
+    """
+    Definitions of the secondary indexes and foreign keys on the given tables
+    
+    Primary key and unique indexes stay in place (they back constraints and
+    the incremental ON CONFLICT merge), so only plain indexes and foreign
+    keys are captured.
+    
+    Returns:
+    --------
+    dict
+        {'indexes': [{'table', 'name', 'definition'}], 'foreign_keys': [...]}
+    """
+    with engine.connect() as conn:
+        indexes = conn.execute(text("""
+            SELECT t.relname AS "table", i.relname AS name, pg_get_indexdef(x.indexrelid) AS definition
+            FROM pg_index x
+            JOIN pg_class t ON t.oid = x.indrelid
+            JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE t.relname = ANY(:tables)
+              AND NOT x.indisprimary
+              AND NOT x.indisunique
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+            ORDER BY t.relname, i.relname
+        """), {'tables': tables}).mappings().all()
+        
+        foreign_keys = conn.execute(text("""
+            SELECT c.conrelid::regclass::text AS "table", c.conname AS name,
+                   pg_get_constraintdef(c.oid) AS definition
+            FROM pg_constraint c
+            WHERE c.contype = 'f' AND c.conrelid::regclass::text = ANY(:tables)
+            ORDER BY 1, 2
+        """), {'tables': tables}).mappings().all()
+    
+    return {'indexes': [dict(row) for row in indexes], 'foreign_keys': [dict(row) for row in foreign_keys]}
+
+
+def drop_deferrable_ddl(engine, ddl):
+    """Drop captured indexes and foreign keys, saving their definitions first"""
+    with open(DEFERRED_DDL_FILE, 'w') as f:
+        json.dump(ddl, f, indent=2)
+    
+    with engine.begin() as conn:
+        for fk in ddl['foreign_keys']:
+            conn.execute(text(f'ALTER TABLE {fk["table"]} DROP CONSTRAINT IF EXISTS {fk["name"]}'))
+        for index in ddl['indexes']:
+            conn.execute(text(f'DROP INDEX IF EXISTS {index["name"]}'))
+    
+    print(f"   Dropped {len(ddl['indexes'])} indexes and {len(ddl['foreign_keys'])} foreign keys")
+
+
+def _build_index(engine, index):
+    """Create one index on its own pooled connection"""
+    start = time.perf_counter()
+    # Parent indexes of partitioned tables are reported ON ONLY; build them on every partition
+    definition = index['definition'].replace(' ON ONLY ', ' ON ')
+    with engine.begin() as conn:
+        conn.execute(text(f"SET maintenance_work_mem = '{LOAD_CONFIG['maintenance_work_mem']}'"))
+        conn.execute(text(definition))
+    return time.perf_counter() - start
+
+
+def rebuild_deferrable_ddl(engine, ddl, parallelism=1):
+    """
+    Recreate dropped indexes (concurrently) and foreign keys (serially)
+    
+    CREATE INDEX takes a SHARE lock, so builds on the same table can overlap;
+    ADD FOREIGN KEY locks both tables and runs one at a time after them.
+    Returns (index_seconds, foreign_key_seconds).
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='indexer') as executor:
+        futures = {executor.submit(_build_index, engine, index): index['name'] for index in ddl['indexes']}
+        for future in as_completed(futures):
+            print(f"    Built {futures[future]} ({future.result():.2f}s)")
+    index_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for fk in ddl['foreign_keys']:
+            conn.execute(text(f'ALTER TABLE {fk["table"]} ADD CONSTRAINT {fk["name"]} {fk["definition"]}'))
+            print(f"    Added {fk['table']}.{fk['name']}")
+    fk_seconds = time.perf_counter() - start
+    
+    DEFERRED_DDL_FILE.unlink(missing_ok=True)
+    return index_seconds, fk_seconds
+
+
+def restore_pending_ddl(engine, parallelism=1):
+    """Rebuild indexes/FKs left dropped by an interrupted deferred load"""
+    if not DEFERRED_DDL_FILE.exists():
+        return
+    with open(DEFERRED_DDL_FILE) as f:
+        ddl = json.load(f)
+    print(f"  Restoring {len(ddl['indexes'])} indexes and {len(ddl['foreign_keys'])} "
+          f"foreign keys left by an interrupted load...")
+    
+    # Skip anything that was rebuilt before the interruption
+    existing = capture_deferrable_ddl(engine, FACT_TABLES)
+    built = {item['name'] for kind in existing.values() for item in kind}
+    ddl = {kind: [item for item in items if item['name'] not in built] for kind, items in ddl.items()}
+    rebuild_deferrable_ddl(engine, ddl, parallelism)
+
+
+@contextmanager
+def deferred_indexes(engine, tables=FACT_TABLES, parallelism=1):
+    """
+    Load with secondary indexes and foreign keys dropped, then rebuild and ANALYZE
+    
+    Example:
+    --------
+    with deferred_indexes(engine, parallelism=4) as timings:
+        load_fact_sales(engine)
+    print(timings)  # seconds per phase
+    """
+    timings = {}
+    restore_pending_ddl(engine, parallelism)
+    
+    print(" Deferring fact indexes and foreign keys...")
+    start = time.perf_counter()
+    ddl = capture_deferrable_ddl(engine, tables)
+    drop_deferrable_ddl(engine, ddl)
+    timings['drop'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        # Rebuild even if the load failed so the schema is never left without them
+        timings['load'] = time.perf_counter() - start
+        print(" Rebuilding fact indexes and foreign keys...")
+        timings['indexes'], timings['foreign_keys'] = rebuild_deferrable_ddl(engine, ddl, parallelism)
+    
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for table in tables:
+            conn.execute(text(f"ANALYZE {table}"))
+    timings['analyze'] = time.perf_counter() - start
+    
+    print("\n   Deferred load phases:")
+    for phase, seconds in timings.items():
+        print(f"     {phase:<13} {seconds:8.2f}s")
+    print()
+
+
+def upsert_dataframe(engine, df, table, conflict_columns, method='copy', changed=None):
+    """
+    Merge rows into a table through a temporary staging table
+    
+    Rows are bulk-loaded into a session-local copy of the target's columns,
+    then merged with INSERT ... ON CONFLICT. Existing rows are only rewritten
+    when a value actually changed.
+    
+    Parameters:
+    -----------
+    engine : Engine
+        SQLAlchemy engine
+    df : DataFrame
+        Rows to merge, columns named as in the target table
+    table : str
+        Target table
+    conflict_columns : list
+        Columns of a unique index on the target (the merge key)
+    method : str
+        How the staging table is filled ('copy' or 'insert')
+    changed : dict
+        Column name -> set; collects the old and new values of those columns
+        for every existing row the merge rewrites (e.g. customer_key)
+    
+    Returns:
+    --------
+    int
+        Rows inserted or updated
+    """
+    df = df.drop_duplicates(conflict_columns, keep='last')
+    for col in df.columns.intersection(KEY_COLUMNS):
+        df[col] = df[col].astype('Int64')
+    
+    columns = ', '.join(df.columns)
+    update_columns = [col for col in df.columns if col not in conflict_columns]
+    if update_columns:
+        assignments = ', '.join(f"{col} = EXCLUDED.{col}" for col in update_columns)
+        current = ', '.join(f"{table}.{col}" for col in update_columns)
+        incoming = ', '.join(f"EXCLUDED.{col}" for col in update_columns)
+        on_conflict = f"DO UPDATE SET {assignments} WHERE ({current}) IS DISTINCT FROM ({incoming})"
+    else:
+        on_conflict = "DO NOTHING"
+    
+    stage = f"stage_{table}"
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA"))
+        write_batches(conn, df, stage, method, label=f"stage {table}")
+        if changed and update_columns:
+            # Rows the merge is about to rewrite, found before they change
+            join = ' AND '.join(f"t.{col} = s.{col}" for col in conflict_columns)
+            tracked = ', '.join(f"t.{col}, s.{col}" for col in changed)
+            rewritten = conn.execute(text(f"""
+                SELECT {tracked}
+                FROM {stage} s JOIN {table} t ON {join}
+                WHERE ({', '.join(f't.{col}' for col in update_columns)})
+                      IS DISTINCT FROM ({', '.join(f's.{col}' for col in update_columns)})
+            """)).fetchall()
+            for i, values in enumerate(changed.values()):
+                values.update(value for row in rewritten for value in row[2 * i:2 * i + 2] if value is not None)
+        with timed('database'):
+            result = conn.execute(text(f"""
+            INSERT INTO {table} ({columns})
+            SELECT {columns} FROM {stage}
+            ON CONFLICT ({', '.join(conflict_columns)}) {on_conflict}
+            """))
+    
+    return result.rowcount
+
+
+def get_high_water_mark(engine, table):
+    """Last (date, id) loaded into a table, or (None, None) before its first load"""
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT last_date, last_id FROM etl_load_state WHERE table_name = :table"),
+                           {'table': table}).fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def latest_id(ids):
+    """
+    Largest of zero-padded ids (TXN00000001, RET000001) by their number
+    
+    Ids outgrow their padding (RET1000000 follows RET999999), so longer ids
+    are larger and only ids of equal length compare as strings.
+    """
+    ids = pd.Series(ids, dtype='string').dropna()
+    lengths = ids.str.len()
+    return ids[lengths == lengths.max()].max()
+
+
+def set_high_water_mark(engine, table, dates, ids, rows_merged):
+    """Advance a table's high-water mark to the newest date/id just loaded"""
+    if len(dates) == 0:
+        return
+    with engine.begin() as conn:
+        # Ids compare by (length, text), as in latest_id
+        conn.execute(text("""
+            INSERT INTO etl_load_state (table_name, last_date, last_id, rows_merged, loaded_at)
+            VALUES (:table, :last_date, :last_id, :rows_merged, CURRENT_TIMESTAMP)
+            ON CONFLICT (table_name) DO UPDATE SET
+                last_date = GREATEST(etl_load_state.last_date, EXCLUDED.last_date),
+                last_id = CASE
+                    WHEN etl_load_state.last_id IS NULL
+                      OR (LENGTH(EXCLUDED.last_id), EXCLUDED.last_id)
+                         > (LENGTH(etl_load_state.last_id), etl_load_state.last_id)
+                    THEN EXCLUDED.last_id ELSE etl_load_state.last_id END,
+                rows_merged = EXCLUDED.rows_merged,
+                loaded_at = EXCLUDED.loaded_at
+        """), {'table': table, 'last_date': pd.Timestamp(dates.max()).date(),
+               'last_id': str(latest_id(ids)), 'rows_merged': int(rows_merged)})
+
+
+def high_water_mark_filters(mark, date_column, id_column):
+    """
+    Read filters for rows that are new or may have changed since the last load
+    
+    Keeps rows past the stored id, plus the last LOAD_CONFIG['lookback_days']
+    days before the stored date so late status changes are merged again.
+    mark is the (last_date, last_id) pair from get_high_water_mark; None
+    (read everything) before the first load. Passed to iter_dataset, they let
+    Parquet reads skip part files and row groups wholly before the mark.
+    
+    Ids are compared by number (see latest_id): longer ids are past the mark
+    whatever their text, equal-length ids compare as strings.
+    """
+    last_date, last_id = mark
+    if last_date is None:
+        return None
+    
+    since = pd.Timestamp(last_date) - pd.Timedelta(days=LOAD_CONFIG['lookback_days'])
+    last_id = str(last_id)
+    return [[(date_column, '>=', since)],
+            [(id_column, 'len==', len(last_id)), (id_column, '>', last_id)],
+            [(id_column, 'len>', len(last_id))]]
+
+
+def write_dimension(engine, df, table, conflict_columns, incremental=False):
+    """Append a dimension, or merge it on its natural key when incremental"""
+    if incremental:
+        merged = upsert_dataframe(engine, df, table, conflict_columns)
+        print(f"    Merged {merged:,} new or changed rows")
+    else:
+        with timed('database'):
+            df.to_sql(table, engine, if_exists='append', index=False, method='multi')
+
+
+def normalize_geography(df, columns=GEO_KEY_COLUMNS):
+    """
+    Normalized (country, state, city) join keys
+    
+    Values are stripped and lower-cased and missing parts become '', so
+    NULL states in dim_geography match missing states in the raw data.
+    """
+    keys = pd.DataFrame(index=df.index)
+    for col in columns:
+        keys[f'{col}_key'] = df[col].astype('string').fillna('').str.strip().str.lower()
+    return keys
+
+
+def resolve_geography_keys(customers_df, geography_df):
+    """
+    Map each customer to a geography_key with a single merge
+    
+    Parameters:
+    -----------
+    customers_df : DataFrame
+        customer_id plus country, state, city
+    geography_df : DataFrame
+        geography_key plus country, state, city (as loaded in dim_geography)
+    
+    Returns:
+    --------
+    pandas.Series
+        geography_key indexed by customer_id (NaN where no location matched)
+    """
+    # Several zip codes share a location; the lowest key wins, as before
+    geography = pd.concat([geography_df[['geography_key']], normalize_geography(geography_df)], axis=1)
+    key_cols = [f'{col}_key' for col in GEO_KEY_COLUMNS]
+    geography = geography.sort_values('geography_key').drop_duplicates(key_cols)
+    
+    customers = pd.concat([customers_df[['customer_id']], normalize_geography(customers_df)], axis=1)
+    resolved = customers.merge(geography, on=key_cols, how='left')
+    
+    unmatched = resolved['geography_key'].isna()
+    if unmatched.any():
+        sample = ', '.join(resolved.loc[unmatched, 'customer_id'].astype(str).head(5))
+        print(f"     {unmatched.sum():,} customers have no matching geography (e.g. {sample})")
+    
+    return resolved.set_index('customer_id')['geography_key']
+
+
+@instrumented
+def load_dimension_customers(engine, incremental=False):
     """Load customer dimension"""
     print(" Loading dim_customers...")
     
-    # Read CSV
-    df = pd.read_csv(PATHS['data_raw'] / 'customers.csv')
+    # Read raw data
+    with timed('read'):
+        df = read_dataset('customers', PATHS['data_raw'])
     
     # Insert into database
     df_db = df[['customer_id', 'first_name', 'last_name', 'email', 'phone', 
                 'registration_date', 'customer_segment', 'age', 'gender']]
     
-    df_db.to_sql('dim_customers', engine, if_exists='append', index=False, method='multi')
+    write_dimension(engine, df_db, 'dim_customers', ['customer_id'], incremental)
     
     print(f"    Loaded {len(df):,} customers\n")
     return df
 
 
-def load_dimension_products(engine):
+@instrumented
+def load_dimension_products(engine, incremental=False):
     """Load product dimension"""
     print(" Loading dim_products...")
     
-    # Read CSV
-    df = pd.read_csv(PATHS['data_raw'] / 'products.csv')
+    # Read raw data
+    with timed('read'):
+        df = read_dataset('products', PATHS['data_raw'])
     
     # Insert into database
     df_db = df[['product_id', 'product_name', 'category', 'subcategory', 'brand',
                 'price', 'cost', 'weight_kg', 'stock_quantity', 'rating', 
                 'num_reviews', 'launch_date']]
     
-    df_db.to_sql('dim_products', engine, if_exists='append', index=False, method='multi')
+    write_dimension(engine, df_db, 'dim_products', ['product_id'], incremental)
     
     print(f"    Loaded {len(df):,} products\n")
     return df
 
 
-def load_dimension_geography(engine, transactions_df, customers_df):
-    """Load geography dimension from transactions and customers"""
+@instrumented
+def load_dimension_geography(engine, customers_df, incremental=False):
+    """Load geography dimension from customers"""
     print(" Loading dim_geography...")
     
-    # Extract unique geography combinations
-    geo_data = []
-    
-    # From customers
-    for _, row in customers_df.iterrows():
-        geo_data.append({
-            'country': row['country'],
-            'state': row['state'],
-            'city': row['city'],
-            'zip_code': row['zip_code']
-        })
+    # Extract unique geography combinations from customers
+    df = customers_df[GEO_KEY_COLUMNS + ['zip_code']].astype(object).drop_duplicates()
     
-    # Create dataframe and remove duplicates
-    df = pd.DataFrame(geo_data).drop_duplicates()
+    # Keep only locations not already loaded (anti-join; NULL states never
+    # conflict in the UNIQUE constraint, so ON CONFLICT can't dedupe them)
+    if incremental:
+        with engine.connect() as conn:
+            existing = pd.read_sql("SELECT country, state, city, zip_code FROM dim_geography", conn)
+        geo_columns = GEO_KEY_COLUMNS + ['zip_code']
+        new_keys = normalize_geography(df, geo_columns)
+        new_keys['_row'] = np.arange(len(df))
+        merged = new_keys.merge(normalize_geography(existing, geo_columns).drop_duplicates(),
+                                how='left', indicator=True)
+        df = df.iloc[merged.loc[merged['_merge'] == 'left_only', '_row'].to_numpy()].copy()
     
     # Add region (simplified mapping)
-    region_map = {
-        'USA': 'North America', 'Canada': 'North America',
-        'UK': 'Europe', 'Germany': 'Europe', 'France': 'Europe',
-        'Australia': 'Oceania', 'Japan': 'Asia', 'Brazil': 'South America'
-    }
-    df['region'] = df['country'].map(region_map)
+    df['region'] = df['country'].map(REGION_MAP)
     
     # Insert into database
-    df.to_sql('dim_geography', engine, if_exists='append', index=False, method='multi')
+    with timed('database'):
+        df.to_sql('dim_geography', engine, if_exists='append', index=False, method='multi')
     
     print(f"    Loaded {len(df):,} geography records\n")
     return df
 
 
-def load_dimension_marketing(engine):
+@instrumented
+def load_dimension_marketing(engine, incremental=False):
     """Load marketing campaigns dimension"""
     print(" Loading dim_marketing_campaigns...")
     
-    # Read CSV
-    df = pd.read_csv(PATHS['data_raw'] / 'marketing_campaigns.csv')
+    # Read raw data
+    with timed('read'):
+        df = read_dataset('marketing_campaigns', PATHS['data_raw'])
     
     # Insert into database
     df_db = df[['campaign_id', 'campaign_name', 'start_date', 'end_date',
                 'budget', 'channel', 'target_segment', 'impressions', 
                 'clicks', 'conversions']]
     
-    df_db.to_sql('dim_marketing_campaigns', engine, if_exists='append', index=False, method='multi')
+    write_dimension(engine, df_db, 'dim_marketing_campaigns', ['campaign_id'], incremental)
     
     print(f"    Loaded {len(df):,} marketing campaigns\n")
     return df
 
 
-def load_fact_sales(engine):
-    """Load sales fact table"""
-    print(" Loading fact_sales...")
-    
-    # Read transactions CSV
-    df = pd.read_csv(PATHS['data_raw'] / 'transactions.csv')
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
-    
-    print(f"   Read {len(df):,} transactions from CSV")
-    
-    # Get foreign keys from dimension tables
-    print("   Mapping foreign keys...")
+def load_key_maps(engine):
+    """
+    Natural key -> surrogate key lookups for the fact loaders
     
+    Dimensions are small, so each is read once and kept as a Series indexed by
+    the natural key; fact chunks are then mapped with hashed lookups.
+    """
     with engine.connect() as conn:
-        # Get customer keys
         customers = pd.read_sql("SELECT customer_key, customer_id FROM dim_customers", conn)
-        customer_map = dict(zip(customers['customer_id'], customers['customer_key']))
-        
-        # Get product keys
         products = pd.read_sql("SELECT product_key, product_id FROM dim_products", conn)
-        product_map = dict(zip(products['product_id'], products['product_key']))
-        
-        # Get time keys
         time_dim = pd.read_sql("SELECT time_key, date FROM dim_time", conn)
-        time_dim['date'] = pd.to_datetime(time_dim['date'])
-        time_map = dict(zip(time_dim['date'].dt.date, time_dim['time_key']))
-        
-        # Load geography dimension
         geography = pd.read_sql("SELECT geography_key, country, state, city FROM dim_geography", conn)
     
-    # Get geography mapping from original customers CSV (dim_customers doesn't have geo columns)
-    customers_csv = pd.read_csv(PATHS['data_raw'] / 'customers.csv')
-    
-    # Create customer to geography mapping
-    geo_map = {}
-    for _, cust in customers_csv.iterrows():
-        # Find matching geography
-        match = geography[
-            (geography['country'] == cust['country']) &
-            (geography['state'].fillna('') == (str(cust['state']) if pd.notna(cust['state']) else '')) &
-            (geography['city'] == cust['city'])
-        ]
-        if len(match) > 0:
-            geo_map[cust['customer_id']] = match.iloc[0]['geography_key']
+    # Geography comes from the raw customers data (dim_customers doesn't have geo columns)
+    customers_raw = read_dataset('customers', PATHS['data_raw'], columns=['customer_id', 'country', 'state', 'city'])
+    
+    return {
+        'customer': customers.set_index('customer_id')['customer_key'],
+        'product': products.set_index('product_id')['product_key'],
+        'time': time_dim.set_index(pd.to_datetime(time_dim['date']))['time_key'],
+        'geography': resolve_geography_keys(customers_raw, geography)
+    }
+
+
+def extend_time_map(engine, time_map, dates):
+    """
+    Make sure dim_time covers the given dates and return the time key map
+    
+    Days missing from the map are added to dim_time in one set-based call and
+    their keys appended, so the calendar grows with whatever span the facts need.
+    """
+    days = pd.to_datetime(pd.Series(dates)).dt.normalize().dropna().unique()
+    missing = days[~pd.Index(days).isin(time_map.index)]
+    if len(missing) == 0:
+        return time_map
+    
+    start, end = pd.Timestamp(missing.min()).date(), pd.Timestamp(missing.max()).date()
+    with engine.begin() as conn:
+        added = conn.execute(text("SELECT populate_time_dimension(:start_date, :end_date)"),
+                             {'start_date': start, 'end_date': end}).scalar()
+        extension = pd.read_sql(text("SELECT time_key, date FROM dim_time WHERE date BETWEEN :start_date AND :end_date"),
+                                conn, params={'start_date': start, 'end_date': end})
+    if added:
+        print(f"   Extended dim_time by {added:,} days ({start} to {end})")
+    
+    extension = extension.set_index(pd.to_datetime(extension['date']))['time_key']
+    return pd.concat([time_map, extension[~extension.index.isin(time_map.index)]])
+
+
+def load_sales_keys(engine, transaction_ids):
+    """sales_key lookup for just the transactions referenced by one chunk"""
+    with engine.connect() as conn:
+        sales = pd.read_sql(text("SELECT sales_key, transaction_id FROM fact_sales WHERE transaction_id = ANY(:ids)"),
+                            conn, params={'ids': list(transaction_ids)})
+    return sales.set_index('transaction_id')['sales_key']
+
+
+def ensure_partitions(engine, table, dates):
+    """
+    Create any missing monthly partitions of a fact table for the given dates
+    
+    Months already ensured in this run are skipped without a round trip.
+    """
+    months = pd.to_datetime(pd.Series(dates)).dt.to_period('M').unique()
+    ensured = _ENSURED_PARTITIONS.setdefault(table, set())
+    missing = sorted(month for month in months if month not in ensured)
+    if not missing:
+        return 0
+    
+    with engine.begin() as conn:
+        created = conn.execute(text("SELECT ensure_monthly_partitions(:table, :from_date, :to_date)"), {
+            'table': table,
+            'from_date': missing[0].start_time.date(),
+            'to_date': missing[-1].start_time.date()
+        }).scalar()
+    ensured.update(pd.period_range(missing[0], missing[-1], freq='M'))
+    
+    if created:
+        print(f"   Created {created} monthly partitions of {table} ({missing[0]} to {missing[-1]})")
+    return created
+
+
+def analyze_partitions(engine, table, months):
+    """ANALYZE the monthly partitions of a fact table for the given months"""
+    with engine.begin() as conn:
+        for month in sorted(months):
+            conn.execute(text(f"ANALYZE {table}_{month.year}_{month.month:02d}"))
+    if months:
+        print(f"   Analyzed {len(months)} {table} partitions")
+
+
+def load_fact_chunks(engine, fact_chunks, table, id_column, date_column, method, parallelism, incremental,
+                     changed=None):
+    """
+    Write prepared fact chunks one at a time and advance the high-water mark
+    
+    Each chunk is partitioned and loaded (or merged when incremental) before
+    the next is read, so memory is bounded by the chunk size. When merging,
+    values of rewritten rows are collected in changed (see upsert_dataframe).
+    """
+    loaded = merged = 0
+    last_dates, last_ids = [], []
+    touched_months = set()
+    for chunk_num, fact_df in enumerate(fact_chunks, start=1):
+        if len(fact_df) == 0:
+            continue
+        print(f"   Chunk {chunk_num}: {len(fact_df):,} rows")
+        ensure_partitions(engine, table, fact_df[date_column])
+        if incremental:
+            # Unique keys of a partitioned table include its partition column
+            merged += upsert_dataframe(engine, fact_df, table, [id_column, date_column], method,
+                                       changed=changed)
         else:
-            geo_map[cust['customer_id']] = None
-    
-    # Map foreign keys
-    df['customer_key'] = df['customer_id'].map(customer_map)
-    df['product_key'] = df['product_id'].map(product_map)
-    df['time_key'] = df['transaction_date'].dt.date.map(time_map)
-    df['geography_key'] = df['customer_id'].map(geo_map)
-    
-    # Prepare fact table data
-    fact_df = df[[
-        'transaction_id', 'customer_key', 'product_key', 'time_key', 'geography_key',
-        'transaction_date', 'quantity', 'unit_price', 'subtotal', 'discount_percent',
-        'discount_amount', 'tax_amount', 'shipping_cost', 'total_amount',
-        'payment_method', 'order_status', 'shipping_address', 'order_notes'
-    ]].copy()
-    
-    # Convert date to date only (no time)
-    fact_df['transaction_date'] = fact_df['transaction_date'].dt.date
-    
-    # Load in batches
-    batch_size = 10000
-    total_batches = (len(fact_df) + batch_size - 1) // batch_size
-    
-    for i in range(0, len(fact_df), batch_size):
-        batch = fact_df.iloc[i:i+batch_size]
-        batch.to_sql('fact_sales', engine, if_exists='append', index=False, method='multi')
-        
-        batch_num = (i // batch_size) + 1
-        print(f"    Loaded batch {batch_num}/{total_batches} ({len(batch):,} records)")
+            merged += load_partitioned(engine, fact_df, table, id_column, method, parallelism)
+        loaded += len(fact_df)
+        touched_months.update(pd.to_datetime(fact_df[date_column]).dt.to_period('M').unique())
+        last_dates.append(fact_df[date_column].max())
+        last_ids.append(latest_id(fact_df[id_column]))
     
-    print(f"    Total loaded: {len(fact_df):,} sales records\n")
-    return df
+    set_high_water_mark(engine, table, pd.Series(last_dates), pd.Series(last_ids), merged)
+    if incremental:
+        print(f"    Merged {merged:,} new or changed rows of {loaded:,} staged")
+        # Refresh planner statistics only for the partitions this run changed
+        analyze_partitions(engine, table, touched_months)
+    return loaded
 
 
-def load_fact_returns(engine):
-    """Load returns fact table"""
+@instrumented
+def load_fact_sales(engine, method='copy', parallelism=1, incremental=False, changed=None):
+    """
+    Load sales fact table, streaming raw transactions in chunks
+    
+    changed maps fact columns to sets that receive the values of existing
+    sales an incremental merge rewrote (customer_key for refresh_customer_ltv,
+    transaction_date for refresh_product_rollups).
+    """
+    print(" Loading fact_sales...")
+    
+    # Get foreign keys from dimension tables
+    print("   Mapping foreign keys...")
+    with timed('map'):
+        key_maps = load_key_maps(engine)
+    mark = get_high_water_mark(engine, 'fact_sales') if incremental else (None, None)
+    if incremental:
+        print(f"   High-water mark: {mark[0]} / {mark[1]}")
+    
+    def fact_chunks():
+        chunks = iter_dataset('transactions', PATHS['data_raw'], LOAD_CONFIG['chunk_rows'],
+                              columns=SALES_COLUMNS, categories=False,
+                              filters=high_water_mark_filters(mark, 'transaction_date', 'transaction_id'))
+        for df in timed_iter('read', chunks):
+            with timed('map'):
+                # Map foreign keys
+                key_maps['time'] = extend_time_map(engine, key_maps['time'], df['transaction_date'])
+                df['customer_key'] = df['customer_id'].map(key_maps['customer'])
+                df['product_key'] = df['product_id'].map(key_maps['product'])
+                df['time_key'] = df['transaction_date'].map(key_maps['time'])
+                df['geography_key'] = df['customer_id'].map(key_maps['geography'])
+                
+                # Prepare fact table data, date only (no time)
+                fact_df = df[FACT_SALES_COLUMNS].copy()
+                fact_df['transaction_date'] = fact_df['transaction_date'].dt.date
+            yield fact_df
+    
+    # Load in batches (or merge on transaction_id)
+    loaded = load_fact_chunks(engine, fact_chunks(), 'fact_sales', 'transaction_id', 'transaction_date',
+                              method, parallelism, incremental, changed)
+    
+    print(f"    Total loaded: {loaded:,} sales records\n")
+    return loaded
+
+
+@instrumented
+def load_fact_returns(engine, method='copy', parallelism=1, incremental=False):
+    """Load returns fact table, streaming raw returns in chunks"""
     print(" Loading fact_returns...")
     
-    # Read returns CSV
-    df = pd.read_csv(PATHS['data_raw'] / 'returns.csv')
-    df['return_date'] = pd.to_datetime(df['return_date'])
+    # Get foreign keys (sales keys are looked up per chunk)
+    with timed('map'):
+        key_maps = load_key_maps(engine)
+    mark = get_high_water_mark(engine, 'fact_returns') if incremental else (None, None)
+    if incremental:
+        print(f"   High-water mark: {mark[0]} / {mark[1]}")
     
-    print(f"   Read {len(df):,} returns from CSV")
+    def fact_chunks():
+        chunks = iter_dataset('returns', PATHS['data_raw'], LOAD_CONFIG['chunk_rows'], categories=False,
+                              filters=high_water_mark_filters(mark, 'return_date', 'return_id'))
+        for df in timed_iter('read', chunks):
+            with timed('map'):
+                # Map foreign keys
+                df['sales_key'] = df['transaction_id'].map(load_sales_keys(engine, df['transaction_id'].unique()))
+                df['customer_key'] = df['customer_id'].map(key_maps['customer'])
+                df['product_key'] = df['product_id'].map(key_maps['product'])
+                key_maps['time'] = extend_time_map(engine, key_maps['time'], df['return_date'])
+                df['return_time_key'] = df['return_date'].map(key_maps['time'])
+                
+                # Prepare fact table data, date only
+                fact_df = df[FACT_RETURNS_COLUMNS].copy()
+                fact_df['return_date'] = fact_df['return_date'].dt.date
+            yield fact_df
     
-    # Get foreign keys
-    with engine.connect() as conn:
-        # Get sales keys
-        sales = pd.read_sql("SELECT sales_key, transaction_id FROM fact_sales", conn)
-        sales_map = dict(zip(sales['transaction_id'], sales['sales_key']))
-        
-        # Get customer keys
-        customers = pd.read_sql("SELECT customer_key, customer_id FROM dim_customers", conn)
-        customer_map = dict(zip(customers['customer_id'], customers['customer_key']))
-        
-        # Get product keys
-        products = pd.read_sql("SELECT product_key, product_id FROM dim_products", conn)
-        product_map = dict(zip(products['product_id'], products['product_key']))
-        
-        # Get time keys
-        time_dim = pd.read_sql("SELECT time_key, date FROM dim_time", conn)
-        time_dim['date'] = pd.to_datetime(time_dim['date'])
-        time_map = dict(zip(time_dim['date'].dt.date, time_dim['time_key']))
+    # Load to database (or merge on return_id)
+    loaded = load_fact_chunks(engine, fact_chunks(), 'fact_returns', 'return_id', 'return_date',
+                              method, parallelism, incremental)
     
-    # Map foreign keys
-    df['sales_key'] = df['transaction_id'].map(sales_map)
-    df['customer_key'] = df['customer_id'].map(customer_map)
-    df['product_key'] = df['product_id'].map(product_map)
-    df['return_time_key'] = df['return_date'].dt.date.map(time_map)
+    print(f"    Loaded {loaded:,} returns records\n")
+    return loaded
+
+
+def record_rewritten_customers(engine, changed_customers=()):
+    """
+    Log customers whose existing sales an incremental merge rewrote
     
-    # Prepare fact table data
-    fact_df = df[[
-        'return_id', 'sales_key', 'customer_key', 'product_key', 'return_time_key',
-        'transaction_id', 'return_date', 'return_reason', 'refund_amount', 'return_status'
-    ]].copy()
+    Rewritten rows keep their sales_key, so RFMStore / CohortStore read this
+    log (rewritten_customers in src/data_access.py) to recompute them.
+    """
+    if not changed_customers:
+        return 0
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO etl_rewritten_customers (customer_key) SELECT UNNEST(CAST(:keys AS INTEGER[]))"),
+                     {'keys': sorted(int(key) for key in changed_customers)})
+    return len(changed_customers)
+
+
+@instrumented
+def refresh_customer_ltv(engine, changed_customers=()):
+    """
+    Fold newly loaded sales into agg_customer_ltv
     
-    # Convert date to date only
-    fact_df['return_date'] = fact_df['return_date'].dt.date
+    Only sales past the table's sales_key watermark are aggregated; customers
+    whose existing sales were rewritten by an incremental merge are recomputed.
+    """
+    print(" Refreshing agg_customer_ltv...")
+    with engine.begin() as conn:
+        affected = conn.execute(text("SELECT refresh_customer_ltv(CAST(:changed AS INTEGER[]))"),
+                                {'changed': sorted(int(key) for key in changed_customers)}).scalar()
     
-    # Load to database
-    fact_df.to_sql('fact_returns', engine, if_exists='append', index=False, method='multi')
+    print(f"    Updated {affected:,} customers ({len(changed_customers):,} recomputed)\n")
+    return affected
+
+
+@instrumented
+def refresh_product_rollups(engine, changed_dates=()):
+    """
+    Fold newly loaded sales into agg_product_daily / agg_product_performance
     
-    print(f"    Loaded {len(fact_df):,} returns records\n")
-    return df
+    Daily partials from the earliest rewritten sale onwards are rebuilt.
+    """
+    print(" Refreshing product rollups...")
+    changed_since = min(changed_dates) if changed_dates else None
+    with engine.begin() as conn:
+        touched = conn.execute(text("SELECT refresh_product_rollups(:changed_since)"),
+                               {'changed_since': changed_since}).scalar()
+    
+    print(f"    Updated {touched:,} products" + (f" (rebuilt from {changed_since})" if changed_since else "") + "\n")
+    return touched
 
 
-def verify_data_load(engine):
-    """Verify data was loaded correctly"""
+def top_products(engine, start_date, end_date, limit=10):
+    """Top products by completed revenue between two dates (inclusive), from the daily partials"""
+    return pd.read_sql(text("SELECT * FROM top_products(:start_date, :end_date, :limit)"), engine,
+                       params={'start_date': start_date, 'end_date': end_date, 'limit': limit})
+
+
+@instrumented
+def refresh_sales_aggregates(engine):
+    """
+    Refresh the materialized daily aggregates (mv_daily_sales) after a load
+    
+    The SQL function stamps an 'mv_daily_sales' etl_load_state row when done,
+    so sales_fingerprint changes only once the view is current.
+    """
+    print(" Refreshing mv_daily_sales...")
+    with engine.begin() as conn:
+        conn.execute(text("SELECT refresh_sales_aggregates()"))
+        rows = conn.execute(text("SELECT COUNT(*) FROM mv_daily_sales")).scalar()
+    
+    print(f"    {rows:,} daily aggregate rows\n")
+    return rows
+
+
+def verify_data_load(engine, expected=None):
+    """
+    Verify data was loaded correctly
+    
+    expected maps table name to the row count the load should have produced;
+    a mismatch raises instead of reporting a partial load as success.
+    """
     print(" Verifying data load...\n")
+    expected = expected or {}
+    mismatches = []
     
     with engine.connect() as conn:
         tables = [
@@ -277,6 +968,11 @@ def verify_data_load(engine):
             result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
             count = result.fetchone()[0]
             print(f"    {table}: {count:,} records")
+            if table in expected and count != expected[table]:
+                mismatches.append(f"{table} has {count:,} rows, expected {expected[table]:,}")
+    
+    if mismatches:
+        raise RuntimeError("Row count mismatch: " + "; ".join(mismatches))
     
     print("\n" + "="*60)
     
@@ -300,31 +996,70 @@ def verify_data_load(engine):
     print("="*60 + "\n")
 
 
-def main():
+def parse_args():
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Load raw data into the PostgreSQL star schema")
+    parser.add_argument('--method', choices=['copy', 'insert'], default='copy',
+                        help="Fact load path: COPY FROM STDIN (default) or batched INSERTs")
+    parser.add_argument('--parallel', type=int, default=LOAD_CONFIG['parallelism'],
+                        help="Fact partitions loaded concurrently (one pooled connection each)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Merge only rows past each table's high-water mark instead of a full append")
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help="Drop fact secondary indexes and foreign keys during the load, then rebuild and ANALYZE")
+    return parser.parse_args()
+
+
+def run_load(engine, args):
+    """Load dimensions then facts; returns (sales_rows, returns_rows)"""
+    # Load dimensions first (required for foreign keys)
+    customers_df = load_dimension_customers(engine, args.incremental)
+    products_df = load_dimension_products(engine, args.incremental)
+    
+    # Load remaining dimensions
+    geo_df = load_dimension_geography(engine, customers_df, args.incremental)
+    marketing_df = load_dimension_marketing(engine, args.incremental)
+    
+    # Load facts
+    changed = {'customer_key': set(), 'transaction_date': set()}
+    if args.defer_indexes:
+        with deferred_indexes(engine, parallelism=args.parallel):
+            sales_rows = load_fact_sales(engine, args.method, args.parallel, args.incremental, changed)
+            returns_rows = load_fact_returns(engine, args.method, args.parallel, args.incremental)
+    else:
+        sales_rows = load_fact_sales(engine, args.method, args.parallel, args.incremental, changed)
+        returns_rows = load_fact_returns(engine, args.method, args.parallel, args.incremental)
+    
+    # Rebuild rollups that read-only consumers query instead of the facts
+    record_rewritten_customers(engine, changed['customer_key'])
+    refresh_customer_ltv(engine, changed['customer_key'])
+    refresh_product_rollups(engine, changed['transaction_date'])
+    refresh_sales_aggregates(engine)
+    
+    return sales_rows, returns_rows
+
+
+def main(args):
     """Main execution function"""
     try:
         start_time = datetime.now()
         
         # Create database engine
-        engine = create_db_engine()
-        
-        # Load dimensions first (required for foreign keys)
-        customers_df = load_dimension_customers(engine)
-        products_df = load_dimension_products(engine)
-        
-        # Load transactions to get geography data
-        transactions_df = pd.read_csv(PATHS['data_raw'] / 'transactions.csv')
+        engine = create_db_engine(pool_size=args.parallel)
         
-        # Load remaining dimensions
-        geo_df = load_dimension_geography(engine, transactions_df, customers_df)
-        marketing_df = load_dimension_marketing(engine)
+        # Load, recording per-stage timing/throughput/memory into a run report
+        report = RunReport('load_data', PATHS['reports'] / 'load_runs', params=vars(args))
+        with report.active():
+            sales_rows, returns_rows = run_load(engine, args)
         
-        # Load facts
-        sales_df = load_fact_sales(engine)
-        returns_df = load_fact_returns(engine)
+        report.print_summary()
+        print(f"   Run report: {report.save()}")
+        report.compare_with_previous()
+        print()
         
-        # Verify
-        verify_data_load(engine)
+        # Verify (an incremental run only stages part of each table)
+        expected = None if args.incremental else {'fact_sales': sales_rows, 'fact_returns': returns_rows}
+        verify_data_load(engine, expected=expected)
         
         # Calculate time taken
         end_time = datetime.now()
@@ -348,6 +1083,6 @@ def main():
 
 
 if __name__ == "__main__":
-    success = main()
+    success = main(parse_args())
     sys.exit(0 if success else 1)
 
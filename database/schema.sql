@@ -4,6 +4,7 @@
 -- ============================================================================
 
 -- Drop existing tables
+DROP MATERIALIZED VIEW IF EXISTS mv_daily_sales;
 DROP TABLE IF EXISTS fact_sales CASCADE;
 DROP TABLE IF EXISTS fact_returns CASCADE;
 DROP TABLE IF EXISTS dim_customers CASCADE;
@@ -11,6 +12,12 @@ DROP TABLE IF EXISTS dim_products CASCADE;
 DROP TABLE IF EXISTS dim_time CASCADE;
 DROP TABLE IF EXISTS dim_geography CASCADE;
 DROP TABLE IF EXISTS dim_marketing_campaigns CASCADE;
+DROP TABLE IF EXISTS etl_load_state CASCADE;
+DROP TABLE IF EXISTS etl_rewritten_customers CASCADE;
+DROP TABLE IF EXISTS agg_customer_ltv CASCADE;
+DROP TABLE IF EXISTS agg_product_daily CASCADE;
+DROP TABLE IF EXISTS agg_product_performance CASCADE;
+DROP FUNCTION IF EXISTS populate_time_dimension(DATE, DATE);
 
 -- ============================================================================
 -- DIMENSION TABLES
@@ -74,6 +81,9 @@ CREATE TABLE dim_time (
     month INTEGER,
     month_name VARCHAR(20),
     week INTEGER,
+    iso_year INTEGER,
+    year_month INTEGER,         -- YYYYMM, e.g. 202403
+    year_week INTEGER,          -- ISO year * 100 + ISO week, e.g. 202412
     day_of_month INTEGER,
     day_of_week INTEGER,
     day_name VARCHAR(20),
@@ -86,6 +96,7 @@ CREATE TABLE dim_time (
 CREATE INDEX idx_time_date ON dim_time(date);
 CREATE INDEX idx_time_year_month ON dim_time(year, month);
 CREATE INDEX idx_time_quarter ON dim_time(year, quarter);
+CREATE INDEX idx_time_period_keys ON dim_time(year_month, year_week);
 
 
 -- Dimension: Geography
@@ -140,8 +151,10 @@ CREATE INDEX idx_campaigns_dates ON dim_marketing_campaigns(start_date, end_date
 -- ============================================================================
 
 -- Fact: Sales Transactions
+-- Range-partitioned by transaction month (see ensure_monthly_partitions);
+-- unique keys must include the partition key, so they pair with transaction_date
 CREATE TABLE fact_sales (
-    sales_key SERIAL PRIMARY KEY,
+    sales_key SERIAL,
     transaction_id VARCHAR(30) NOT NULL,
     
     -- Foreign Keys to Dimensions
@@ -173,10 +186,13 @@ CREATE TABLE fact_sales (
     net_revenue DECIMAL(12, 2) GENERATED ALWAYS AS (total_amount - COALESCE(discount_amount, 0)) STORED,
     
     -- Metadata
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (sales_key, transaction_date)
+) PARTITION BY RANGE (transaction_date);
 
-CREATE INDEX idx_sales_transaction_id ON fact_sales(transaction_id);
+-- Unique: incremental loads merge on (transaction_id, transaction_date) with ON CONFLICT
+CREATE UNIQUE INDEX idx_sales_transaction_id ON fact_sales(transaction_id, transaction_date);
 CREATE INDEX idx_sales_customer ON fact_sales(customer_key);
 CREATE INDEX idx_sales_product ON fact_sales(product_key);
 CREATE INDEX idx_sales_time ON fact_sales(time_key);
@@ -190,12 +206,14 @@ CREATE INDEX idx_sales_product_date ON fact_sales(product_key, transaction_date)
 
 
 -- Fact: Returns
+-- Range-partitioned by return month. sales_key is no longer unique on its own
+-- in partitioned fact_sales, so it is kept as a plain (unenforced) reference.
 CREATE TABLE fact_returns (
-    return_key SERIAL PRIMARY KEY,
-    return_id VARCHAR(20) UNIQUE NOT NULL,
+    return_key SERIAL,
+    return_id VARCHAR(20) NOT NULL,
     
     -- Foreign Keys
-    sales_key INTEGER REFERENCES fact_sales(sales_key),
+    sales_key INTEGER,
     customer_key INTEGER REFERENCES dim_customers(customer_key),
     product_key INTEGER REFERENCES dim_products(product_key),
     return_time_key INTEGER REFERENCES dim_time(time_key),
@@ -208,8 +226,13 @@ CREATE TABLE fact_returns (
     return_status VARCHAR(50),
     
     -- Metadata
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (return_key, return_date),
+    UNIQUE (return_id, return_date)
+) PARTITION BY RANGE (return_date);
+
+CREATE INDEX idx_returns_sales ON fact_returns(sales_key);
 
 CREATE INDEX idx_returns_transaction ON fact_returns(transaction_id);
 CREATE INDEX idx_returns_customer ON fact_returns(customer_key);
@@ -218,6 +241,75 @@ CREATE INDEX idx_returns_date ON fact_returns(return_date);
 CREATE INDEX idx_returns_reason ON fact_returns(return_reason);
 
 
+-- ============================================================================
+-- ETL METADATA
+-- ============================================================================
+
+-- High-water marks for incremental loads (one row per loaded table)
+CREATE TABLE etl_load_state (
+    table_name VARCHAR(100) PRIMARY KEY,
+    last_date DATE,
+    last_id VARCHAR(30),
+    last_key BIGINT,  -- surrogate key watermark for aggregates maintained from the facts
+    rows_merged INTEGER,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Customers whose existing sales an incremental merge rewrote (status, amount, ...).
+-- Those rows keep their sales_key, so state kept outside the database past a
+-- sales_key watermark (RFM, cohorts) reads this log to recompute the customers.
+CREATE TABLE etl_rewritten_customers (
+    rewrite_id BIGSERIAL PRIMARY KEY,
+    customer_key INTEGER NOT NULL,
+    rewritten_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- ============================================================================
+-- INCREMENTAL AGGREGATES
+-- ============================================================================
+
+-- Per-customer running totals of completed sales, maintained by
+-- refresh_customer_ltv() from only the fact rows loaded since the last run.
+-- Averages, spreads and recency are derived at read time.
+CREATE TABLE agg_customer_ltv (
+    customer_key INTEGER PRIMARY KEY REFERENCES dim_customers(customer_key),
+    total_transactions INTEGER NOT NULL,
+    total_revenue DECIMAL(14, 2) NOT NULL,
+    total_revenue_sq DOUBLE PRECISION NOT NULL,  -- sum of squared amounts, for the std dev
+    first_purchase_date DATE,
+    last_purchase_date DATE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_ltv_last_purchase ON agg_customer_ltv(last_purchase_date);
+
+-- Per-product, per-day partials of completed sales; date-range product
+-- rankings sum these instead of scanning fact_sales
+CREATE TABLE agg_product_daily (
+    product_key INTEGER REFERENCES dim_products(product_key),
+    date DATE,
+    total_orders INTEGER NOT NULL,
+    total_units INTEGER NOT NULL,
+    total_revenue DECIMAL(14, 2) NOT NULL,
+    total_profit DECIMAL(14, 2),
+    PRIMARY KEY (product_key, date)
+);
+
+CREATE INDEX idx_product_daily_date ON agg_product_daily(date);
+
+-- All-time running sums per product (re-summed from the daily partials
+-- of the products each refresh touches)
+CREATE TABLE agg_product_performance (
+    product_key INTEGER PRIMARY KEY REFERENCES dim_products(product_key),
+    total_orders INTEGER NOT NULL,
+    total_units INTEGER NOT NULL,
+    total_revenue DECIMAL(14, 2) NOT NULL,
+    total_profit DECIMAL(14, 2),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+
 -- ============================================================================
 -- VIEWS FOR ANALYTICS
 -- ============================================================================
@@ -250,6 +342,8 @@ SELECT
     dt.month,
     dt.month_name,
     dt.week,
+    dt.year_month,
+    dt.year_week,
     dt.day_name,
     dt.is_weekend,
     
@@ -281,25 +375,31 @@ LEFT JOIN dim_geography dg ON fs.geography_key = dg.geography_key;
 
 
 -- Customer Lifetime Value View
+-- Reads the incrementally maintained agg_customer_ltv; only recency depends on
+-- CURRENT_DATE and is computed here (transaction_id is unique per fact row,
+-- so the row count equals the distinct transaction count)
 CREATE OR REPLACE VIEW vw_customer_lifetime_value AS
 SELECT 
     dc.customer_id,
     dc.customer_segment,
     dc.registration_date,
-    COUNT(DISTINCT fs.transaction_id) AS total_transactions,
-    SUM(fs.total_amount) AS total_revenue,
-    AVG(fs.total_amount) AS avg_transaction_value,
-    MAX(fs.transaction_date) AS last_purchase_date,
-    MIN(fs.transaction_date) AS first_purchase_date,
-    (CURRENT_DATE - MAX(fs.transaction_date)) AS days_since_last_purchase,
-    (MAX(fs.transaction_date) - MIN(fs.transaction_date)) AS customer_lifetime_days
-FROM dim_customers dc
-LEFT JOIN fact_sales fs ON dc.customer_key = fs.customer_key
-WHERE fs.order_status = 'Completed'
-GROUP BY dc.customer_id, dc.customer_segment, dc.registration_date;
+    l.total_transactions,
+    l.total_revenue,
+    l.total_revenue / NULLIF(l.total_transactions, 0) AS avg_transaction_value,
+    CASE WHEN l.total_transactions > 1 THEN
+        SQRT(GREATEST(l.total_revenue_sq - l.total_revenue::DOUBLE PRECISION ^ 2 / l.total_transactions, 0)
+             / (l.total_transactions - 1))
+    ELSE 0 END AS std_transaction_value,
+    l.last_purchase_date,
+    l.first_purchase_date,
+    (CURRENT_DATE - l.last_purchase_date) AS days_since_last_purchase,
+    (l.last_purchase_date - l.first_purchase_date) AS customer_lifetime_days
+FROM agg_customer_ltv l
+JOIN dim_customers dc ON dc.customer_key = l.customer_key;
 
 
 -- Product Performance View
+-- Reads the incrementally maintained agg_product_performance
 CREATE OR REPLACE VIEW vw_product_performance AS
 SELECT 
     dp.product_id,
@@ -307,55 +407,289 @@ SELECT
     dp.category,
     dp.brand,
     dp.price,
-    COUNT(fs.transaction_id) AS total_orders,
-    SUM(fs.quantity) AS total_units_sold,
-    SUM(fs.total_amount) AS total_revenue,
-    AVG(fs.total_amount) AS avg_order_value,
-    SUM(fs.total_amount - (dp.cost * fs.quantity)) AS total_profit,
-    AVG(fs.total_amount - (dp.cost * fs.quantity)) AS avg_profit_per_order
-FROM dim_products dp
-LEFT JOIN fact_sales fs ON dp.product_key = fs.product_key
-WHERE fs.order_status = 'Completed'
-GROUP BY dp.product_id, dp.product_name, dp.category, dp.brand, dp.price, dp.cost;
+    pp.total_orders,
+    pp.total_units AS total_units_sold,
+    pp.total_revenue,
+    pp.total_revenue / NULLIF(pp.total_orders, 0) AS avg_order_value,
+    pp.total_profit,
+    pp.total_profit / NULLIF(pp.total_orders, 0) AS avg_profit_per_order
+FROM agg_product_performance pp
+JOIN dim_products dp ON dp.product_key = pp.product_key;
+
+
+-- ============================================================================
+-- MATERIALIZED AGGREGATES
+-- ============================================================================
+
+-- Daily sales rollup by category, segment, country, payment method and status.
+-- Consumers that only need sums (daily revenue, category/country totals)
+-- read this instead of joining vw_sales_overview over every fact row.
+-- Missing dimension values become 'Unknown' so the unique key has no NULLs.
+CREATE MATERIALIZED VIEW mv_daily_sales AS
+SELECT 
+    fs.transaction_date AS date,
+    dt.year_month,
+    dt.year_week,
+    COALESCE(dp.category, 'Unknown') AS category,
+    COALESCE(dc.customer_segment, 'Unknown') AS customer_segment,
+    COALESCE(dg.country, 'Unknown') AS country,
+    COALESCE(fs.payment_method, 'Unknown') AS payment_method,
+    COALESCE(fs.order_status, 'Unknown') AS order_status,
+    
+    -- Additive measures
+    COUNT(*) AS line_items,
+    SUM(fs.quantity) AS units,
+    SUM(fs.subtotal) AS subtotal,
+    SUM(fs.discount_amount) AS discount_amount,
+    SUM(fs.total_amount) AS total_amount,
+    SUM(fs.net_revenue) AS net_revenue,
+    SUM(dp.cost * fs.quantity) AS total_cost,
+    SUM(fs.total_amount - (dp.cost * fs.quantity)) AS profit
+FROM fact_sales fs
+LEFT JOIN dim_customers dc ON fs.customer_key = dc.customer_key
+LEFT JOIN dim_products dp ON fs.product_key = dp.product_key
+LEFT JOIN dim_geography dg ON fs.geography_key = dg.geography_key
+LEFT JOIN dim_time dt ON fs.time_key = dt.time_key
+GROUP BY 1, 2, 3, 4, 5, 6, 7, 8;
+
+-- Unique key lets the refresh run CONCURRENTLY (readers are never blocked)
+CREATE UNIQUE INDEX idx_mv_daily_sales_key 
+    ON mv_daily_sales(date, category, customer_segment, country, payment_method, order_status);
+CREATE INDEX idx_mv_daily_sales_status_date ON mv_daily_sales(order_status, date);
 
 
 -- ============================================================================
 -- UTILITY FUNCTIONS
 -- ============================================================================
 
--- Function to populate time dimension
-CREATE OR REPLACE FUNCTION populate_time_dimension(start_date DATE, end_date DATE)
-RETURNS VOID AS $$
+-- Function to create monthly partitions of a fact table covering a date range
+-- (partitions are named <table>_YYYY_MM; existing ones are left alone)
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent TEXT, from_date DATE, to_date DATE)
+RETURNS INTEGER AS $$
 DECLARE
-    current_date DATE := start_date;
+    month_start DATE := date_trunc('month', from_date)::DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
 BEGIN
-    WHILE current_date <= end_date LOOP
-        INSERT INTO dim_time (
-            date, year, quarter, month, month_name, week,
-            day_of_month, day_of_week, day_name, is_weekend,
-            fiscal_year, fiscal_quarter
-        ) VALUES (
-            current_date,
-            EXTRACT(YEAR FROM current_date),
-            EXTRACT(QUARTER FROM current_date),
-            EXTRACT(MONTH FROM current_date),
-            TO_CHAR(current_date, 'Month'),
-            EXTRACT(WEEK FROM current_date),
-            EXTRACT(DAY FROM current_date),
-            EXTRACT(DOW FROM current_date),
-            TO_CHAR(current_date, 'Day'),
-            EXTRACT(DOW FROM current_date) IN (0, 6),
-            EXTRACT(YEAR FROM current_date),
-            EXTRACT(QUARTER FROM current_date)
-        ) ON CONFLICT (date) DO NOTHING;
-        
-        current_date := current_date + INTERVAL '1 day';
+    WHILE month_start <= to_date LOOP
+        partition_name := parent || '_' || TO_CHAR(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, parent, month_start, (month_start + INTERVAL '1 month')::DATE
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::DATE;
     END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to fold newly loaded sales into agg_customer_ltv.
+-- Sales past the stored sales_key watermark are added to the running totals;
+-- customers whose existing sales changed (passed by the loader) are recomputed.
+CREATE OR REPLACE FUNCTION refresh_customer_ltv(changed_customers INTEGER[] DEFAULT '{}')
+RETURNS INTEGER AS $$
+DECLARE
+    watermark BIGINT;
+    new_watermark BIGINT;
+    affected INTEGER := 0;
+    recomputed INTEGER := 0;
+BEGIN
+    SELECT COALESCE(MAX(last_key), 0) INTO watermark
+    FROM etl_load_state WHERE table_name = 'agg_customer_ltv';
+    SELECT COALESCE(MAX(sales_key), watermark) INTO new_watermark
+    FROM fact_sales WHERE sales_key > watermark;
+    
+    INSERT INTO agg_customer_ltv (customer_key, total_transactions, total_revenue, total_revenue_sq,
+                                  first_purchase_date, last_purchase_date)
+    SELECT customer_key, COUNT(*), SUM(total_amount), SUM(total_amount::DOUBLE PRECISION ^ 2),
+           MIN(transaction_date), MAX(transaction_date)
+    FROM fact_sales
+    WHERE sales_key > watermark AND sales_key <= new_watermark
+      AND order_status = 'Completed' AND customer_key IS NOT NULL
+    GROUP BY customer_key
+    ON CONFLICT (customer_key) DO UPDATE SET
+        total_transactions = agg_customer_ltv.total_transactions + EXCLUDED.total_transactions,
+        total_revenue = agg_customer_ltv.total_revenue + EXCLUDED.total_revenue,
+        total_revenue_sq = agg_customer_ltv.total_revenue_sq + EXCLUDED.total_revenue_sq,
+        first_purchase_date = LEAST(agg_customer_ltv.first_purchase_date, EXCLUDED.first_purchase_date),
+        last_purchase_date = GREATEST(agg_customer_ltv.last_purchase_date, EXCLUDED.last_purchase_date),
+        updated_at = CURRENT_TIMESTAMP;
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    
+    IF cardinality(changed_customers) > 0 THEN
+        DELETE FROM agg_customer_ltv WHERE customer_key = ANY(changed_customers);
+        INSERT INTO agg_customer_ltv (customer_key, total_transactions, total_revenue, total_revenue_sq,
+                                      first_purchase_date, last_purchase_date)
+        SELECT customer_key, COUNT(*), SUM(total_amount), SUM(total_amount::DOUBLE PRECISION ^ 2),
+               MIN(transaction_date), MAX(transaction_date)
+        FROM fact_sales
+        WHERE customer_key = ANY(changed_customers)
+          AND sales_key <= new_watermark AND order_status = 'Completed'
+        GROUP BY customer_key;
+        GET DIAGNOSTICS recomputed = ROW_COUNT;
+    END IF;
+    
+    INSERT INTO etl_load_state (table_name, last_key, rows_merged, loaded_at)
+    VALUES ('agg_customer_ltv', new_watermark, affected + recomputed, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE SET
+        last_key = EXCLUDED.last_key,
+        rows_merged = EXCLUDED.rows_merged,
+        loaded_at = EXCLUDED.loaded_at;
+    
+    RETURN affected + recomputed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to fold newly loaded sales into the product rollups.
+-- Sales past the stored sales_key watermark are added to the daily partials;
+-- when an incremental merge rewrote existing sales, every partial from
+-- changed_since onwards is rebuilt (only those fact partitions are read).
+-- Product totals are then re-summed from the partials of touched products.
+CREATE OR REPLACE FUNCTION refresh_product_rollups(changed_since DATE DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    watermark BIGINT;
+    new_watermark BIGINT;
+    touched INTEGER[];
+BEGIN
+    SELECT COALESCE(MAX(last_key), 0) INTO watermark
+    FROM etl_load_state WHERE table_name = 'agg_product_daily';
+    SELECT COALESCE(MAX(sales_key), watermark) INTO new_watermark
+    FROM fact_sales WHERE sales_key > watermark;
+    
+    DROP TABLE IF EXISTS product_delta;
+    CREATE TEMP TABLE product_delta ON COMMIT DROP AS
+    SELECT fs.product_key, fs.transaction_date AS date,
+           COUNT(*) AS total_orders, SUM(fs.quantity) AS total_units,
+           SUM(fs.total_amount) AS total_revenue,
+           SUM(fs.total_amount - (dp.cost * fs.quantity)) AS total_profit
+    FROM fact_sales fs
+    JOIN dim_products dp ON dp.product_key = fs.product_key
+    WHERE fs.sales_key > watermark AND fs.sales_key <= new_watermark
+      AND fs.order_status = 'Completed'
+    GROUP BY fs.product_key, fs.transaction_date;
+    
+    INSERT INTO agg_product_daily AS d
+    SELECT * FROM product_delta
+    ON CONFLICT (product_key, date) DO UPDATE SET
+        total_orders = d.total_orders + EXCLUDED.total_orders,
+        total_units = d.total_units + EXCLUDED.total_units,
+        total_revenue = d.total_revenue + EXCLUDED.total_revenue,
+        total_profit = d.total_profit + EXCLUDED.total_profit;
+    
+    SELECT array_agg(DISTINCT product_key) INTO touched FROM product_delta;
+    
+    IF changed_since IS NOT NULL THEN
+        touched := touched || ARRAY(SELECT DISTINCT product_key FROM agg_product_daily WHERE date >= changed_since);
+        DELETE FROM agg_product_daily WHERE date >= changed_since;
+        INSERT INTO agg_product_daily
+        SELECT fs.product_key, fs.transaction_date,
+               COUNT(*), SUM(fs.quantity), SUM(fs.total_amount),
+               SUM(fs.total_amount - (dp.cost * fs.quantity))
+        FROM fact_sales fs
+        JOIN dim_products dp ON dp.product_key = fs.product_key
+        WHERE fs.transaction_date >= changed_since AND fs.sales_key <= new_watermark
+          AND fs.order_status = 'Completed'
+        GROUP BY fs.product_key, fs.transaction_date;
+        touched := touched || ARRAY(SELECT DISTINCT product_key FROM agg_product_daily WHERE date >= changed_since);
+    END IF;
+    
+    DELETE FROM agg_product_performance WHERE product_key = ANY(touched);
+    INSERT INTO agg_product_performance (product_key, total_orders, total_units, total_revenue, total_profit)
+    SELECT product_key, SUM(total_orders), SUM(total_units), SUM(total_revenue), SUM(total_profit)
+    FROM agg_product_daily
+    WHERE product_key = ANY(touched)
+    GROUP BY product_key;
+    
+    INSERT INTO etl_load_state (table_name, last_key, rows_merged, loaded_at)
+    VALUES ('agg_product_daily', new_watermark, COALESCE(cardinality(touched), 0), CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE SET
+        last_key = EXCLUDED.last_key,
+        rows_merged = EXCLUDED.rows_merged,
+        loaded_at = EXCLUDED.loaded_at;
+    
+    RETURN (SELECT COUNT(DISTINCT product_key) FROM unnest(touched) AS t(product_key));
+END;
+$$ LANGUAGE plpgsql;
+
+-- Top products by completed revenue within a date range (inclusive),
+-- answered from the daily partials without touching fact_sales
+CREATE OR REPLACE FUNCTION top_products(from_date DATE, to_date DATE, top_n INTEGER DEFAULT 10)
+RETURNS TABLE (
+    product_id TEXT, product_name TEXT, category TEXT,
+    total_orders BIGINT, total_units_sold BIGINT, total_revenue NUMERIC, total_profit NUMERIC
+) AS $$
+    SELECT dp.product_id::TEXT, dp.product_name::TEXT, dp.category::TEXT,
+           SUM(d.total_orders), SUM(d.total_units), SUM(d.total_revenue), SUM(d.total_profit)
+    FROM agg_product_daily d
+    JOIN dim_products dp ON dp.product_key = d.product_key
+    WHERE d.date BETWEEN from_date AND to_date
+    GROUP BY dp.product_id, dp.product_name, dp.category
+    ORDER BY 6 DESC
+    LIMIT top_n;
+$$ LANGUAGE sql STABLE;
+
+-- Function to refresh the materialized aggregates after a load. Stamps
+-- etl_load_state last, so caches keyed on it (sales_fingerprint) never keep
+-- results read from the view before this refresh.
+CREATE OR REPLACE FUNCTION refresh_sales_aggregates()
+RETURNS VOID AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_daily_sales;
+    
+    INSERT INTO etl_load_state (table_name, rows_merged, loaded_at)
+    VALUES ('mv_daily_sales', 0, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE SET
+        loaded_at = EXCLUDED.loaded_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to populate time dimension for a date range in one set-based
+-- insert. Existing days are skipped, so the loader calls it to extend the
+-- calendar to whatever span incoming facts need. Returns days added.
+CREATE OR REPLACE FUNCTION populate_time_dimension(start_date DATE, end_date DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    added INTEGER;
+BEGIN
+    INSERT INTO dim_time (
+        date, year, quarter, month, month_name, week, iso_year, year_month, year_week,
+        day_of_month, day_of_week, day_name, is_weekend,
+        fiscal_year, fiscal_quarter
+    )
+    SELECT
+        d,
+        EXTRACT(YEAR FROM d),
+        EXTRACT(QUARTER FROM d),
+        EXTRACT(MONTH FROM d),
+        TO_CHAR(d, 'Month'),
+        EXTRACT(WEEK FROM d),
+        EXTRACT(ISOYEAR FROM d),
+        EXTRACT(YEAR FROM d) * 100 + EXTRACT(MONTH FROM d),
+        EXTRACT(ISOYEAR FROM d) * 100 + EXTRACT(WEEK FROM d),
+        EXTRACT(DAY FROM d),
+        EXTRACT(DOW FROM d),
+        TO_CHAR(d, 'Day'),
+        EXTRACT(DOW FROM d) IN (0, 6),
+        EXTRACT(YEAR FROM d),
+        EXTRACT(QUARTER FROM d)
+    FROM generate_series(start_date, end_date, INTERVAL '1 day') AS s(ts),
+         LATERAL (SELECT ts::DATE AS d) AS day
+    ORDER BY d
+    ON CONFLICT (date) DO NOTHING;
+    
+    GET DIAGNOSTICS added = ROW_COUNT;
+    RETURN added;
 END;
 $$ LANGUAGE plpgsql;
 
--- Populate time dimension for 2022-2024
-SELECT populate_time_dimension('2022-01-01', '2024-12-31');
+-- dim_time is populated by the loader for the span of the loaded facts.
+-- Monthly fact partitions for 2022-2024 (the loader adds other months)
+SELECT ensure_monthly_partitions('fact_sales', '2022-01-01', '2024-12-31');
+SELECT ensure_monthly_partitions('fact_returns', '2022-01-01', '2024-12-31');
 
 
 -- ============================================================================
@@ -378,6 +712,7 @@ BEGIN
     RAISE NOTICE 'Dimension Tables: 5';
     RAISE NOTICE 'Fact Tables: 2';
     RAISE NOTICE 'Views: 3';
+    RAISE NOTICE 'Materialized Views: 1';
     RAISE NOTICE 'Ready for data loading!';
     RAISE NOTICE '========================================';
 END $$;
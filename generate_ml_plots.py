@@ -14,6 +14,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 from config import DATABASE_URL, PATHS
 from src.models import ChurnPredictionModel, CLVPredictionModel, DemandForecastModel
+from src.data_access import load_sales
 
 print("="*70)
 print("GENERATING ML MODEL PERFORMANCE VISUALIZATIONS")
@@ -24,8 +25,7 @@ print("="*70)
 
 # Load data
 engine = create_engine(DATABASE_URL)
-df = pd.read_sql("SELECT * FROM vw_sales_overview WHERE order_status = 'Completed'", engine)
-df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+df = load_sales(['customer_id', 'product_id', 'transaction_date', 'quantity', 'total_amount'], engine=engine)
 
 print(f"\nLoaded {len(df):,} transactions\n")
 
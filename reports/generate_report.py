@@ -15,32 +15,53 @@ sys.path.append(str(Path(__file__).parent.parent))
 from config import DATABASE_URL, PATHS
 
 
+def format_year_month(key):
+    """Format an integer YYYYMM period key (dim_time.year_month) as 'YYYY-MM'"""
+    key = int(key)
+    return f"{key // 100}-{key % 100:02d}"
+
+
 def generate_executive_summary():
     """
     Generate executive summary report with key business insights
     """
     print(" Generating Executive Summary Report...")
     
-    # Load data
+    # Load daily rollups from the materialized aggregates
     engine = create_engine(DATABASE_URL)
-    df = pd.read_sql("SELECT * FROM vw_sales_overview WHERE order_status = 'Completed'", engine)
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+    df = pd.read_sql("SELECT * FROM mv_daily_sales WHERE order_status = 'Completed'", engine)
+    df['date'] = pd.to_datetime(df['date'])
+    
+    # Distinct counts don't add up across days, so they come from the fact table
+    counts = pd.read_sql("""
+        SELECT COUNT(*) AS line_items,
+               COUNT(DISTINCT transaction_id) AS transactions,
+               COUNT(DISTINCT customer_key) AS customers,
+               COUNT(DISTINCT product_key) AS products
+        FROM fact_sales
+        WHERE order_status = 'Completed'
+    """, engine).iloc[0]
+    segment_customers = pd.read_sql("""
+        SELECT dc.customer_segment, COUNT(DISTINCT fs.customer_key) AS customers
+        FROM fact_sales fs
+        JOIN dim_customers dc ON fs.customer_key = dc.customer_key
+        WHERE fs.order_status = 'Completed'
+        GROUP BY dc.customer_segment
+    """, engine)
     
     # Calculate key metrics
     total_revenue = df['total_amount'].sum()
     total_profit = df['profit'].sum()
     profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
-    total_transactions = df['transaction_id'].nunique()
-    unique_customers = df['customer_id'].nunique()
+    total_transactions = int(counts['transactions'])
+    unique_customers = int(counts['customers'])
     avg_order_value = total_revenue / total_transactions if total_transactions > 0 else 0
     
     # Customer segment analysis
-    segment_revenue = df.groupby('customer_segment').agg({
-        'total_amount': 'sum',
-        'customer_id': 'nunique'
-    }).reset_index()
+    segment_revenue = df.groupby('customer_segment')['total_amount'].sum().reset_index()
+    segment_revenue = segment_revenue.merge(segment_customers, on='customer_segment', how='left').fillna(0)
     segment_revenue['revenue_pct'] = segment_revenue['total_amount'] / total_revenue * 100
-    segment_revenue['customer_pct'] = segment_revenue['customer_id'] / unique_customers * 100
+    segment_revenue['customer_pct'] = segment_revenue['customers'] / unique_customers * 100
     
     # Top categories
     top_categories = df.groupby('category')['total_amount'].sum().nlargest(5)
@@ -48,10 +69,10 @@ def generate_executive_summary():
     # Geographic performance
     top_countries = df.groupby('country')['total_amount'].sum().nlargest(5)
     
-    # Seasonality
-    monthly_revenue = df.groupby(df['transaction_date'].dt.to_period('M'))['total_amount'].sum()
-    peak_month = monthly_revenue.idxmax()
-    lowest_month = monthly_revenue.idxmin()
+    # Seasonality (grouped on the integer YYYYMM key from dim_time)
+    monthly_revenue = df.groupby('year_month')['total_amount'].sum()
+    peak_month = format_year_month(monthly_revenue.idxmax())
+    lowest_month = format_year_month(monthly_revenue.idxmin())
     
     # Generate markdown report
     report = f"""
@@ -231,8 +252,8 @@ Track these metrics monthly to measure impact:
 
 ##  Data Quality & Methodology
 
-- **Analysis Period:** {df['transaction_date'].min()} to {df['transaction_date'].max()}
-- **Total Records Analyzed:** {len(df):,} completed transactions
+- **Analysis Period:** {df['date'].min()} to {df['date'].max()}
+- **Total Records Analyzed:** {int(counts['line_items']):,} completed transactions
 - **Data Quality Score:** High (>95% complete data)
 - **Statistical Confidence:** 95%
 
@@ -253,7 +274,7 @@ Track these metrics monthly to measure impact:
 
 ---
 
-*This report is based on comprehensive analysis of {total_transactions:,} transactions from {unique_customers:,} customers across {df['product_id'].nunique():,} products.*
+*This report is based on comprehensive analysis of {total_transactions:,} transactions from {unique_customers:,} customers across {int(counts['products']):,} products.*
 """
     
     # Save report
@@ -0,0 +1,227 @@
+"""
+Incremental cohort retention state
+Keeps each customer's cohort period, the active-customer count of every
+(cohort, period offset) cell and, for the still-open period only, which
+customers were already counted in it. New sales update just the cells they
+touch; periods before the latest one are closed and their cells frozen, so
+reading the retention matrix never rescans the transaction history.
+"""
+
+import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from config import PATHS
+from src.utils import period_numbers, retention_matrix, COHORT_FREQUENCIES
+from src.data_access import load_sales, sales_table_state, rewritten_customers
+
+
+class CohortStore:
+    """
+    Cohort retention cells maintained from new sales only
+
+    Example:
+    --------
+    store = CohortStore.load()
+    store.refresh()               # merge sales loaded since the last refresh
+    store.save()
+    retention = store.retention() # same layout as cohort_analysis
+
+    Sales dated in a closed period (before the latest period seen) are
+    skipped; run refresh(rebuild=True) after backfilling history. Cohorts of
+    customers whose existing sales a later merge rewrote (logged in
+    etl_rewritten_customers) are recomputed on refresh. State built from
+    another fact_sales table (the schema was rebuilt) is rebuilt
+    automatically.
+    """
+
+    def __init__(self, freq='M', cohorts=None, cells=None, open_pairs=None, open_period=None, watermark=0,
+                 source=None, rewrite_mark=0):
+        if freq not in COHORT_FREQUENCIES:
+            raise ValueError(f"freq must be one of {list(COHORT_FREQUENCIES)}, got {freq!r}")
+        self.freq = freq
+        # customer_id -> cohort period number
+        self.cohorts = cohorts if cohorts is not None else pd.Series(
+            dtype=np.int64, index=pd.Index([], dtype=object, name='customer_id'), name='cohort')
+        # (cohort, offset) -> customers active in that period
+        self.cells = cells if cells is not None else pd.Series(
+            dtype=np.int64, index=pd.MultiIndex.from_arrays([[], []], names=['cohort', 'offset']), name='customers')
+        # customer_ids already counted in the open period
+        self.open_pairs = set(open_pairs or ())
+        self.open_period = open_period
+        self.watermark = watermark
+        # fact_sales identity (see sales_table_state) the watermark refers to
+        self.source = source
+        # Last etl_rewritten_customers entry already applied
+        self.rewrite_mark = rewrite_mark
+
+    @classmethod
+    def load(cls, freq='M', state_dir=None):
+        """
+        Load the stored state for a cohort frequency, or start empty
+
+        Parameters:
+        -----------
+        freq : str
+            'M', 'W' or 'Q'
+        state_dir : Path
+            Defaults to PATHS['data_processed'] / 'cohort_state'
+        """
+        state_dir = Path(state_dir or PATHS['data_processed'] / 'cohort_state')
+        cohorts_path, cells_path = state_dir / f'cohorts_{freq}.parquet', state_dir / f'cells_{freq}.parquet'
+        meta_path = state_dir / f'state_{freq}.json'
+        if not (cohorts_path.exists() and cells_path.exists() and meta_path.exists()):
+            return cls(freq)
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        cohorts = pd.read_parquet(cohorts_path).set_index('customer_id')['cohort']
+        cells = pd.read_parquet(cells_path).set_index(['cohort', 'offset'])['customers']
+        return cls(freq, cohorts, cells, meta['open_pairs'], meta['open_period'], meta['watermark'],
+                   meta.get('source'), meta.get('rewrite_mark', 0))
+
+    def save(self, state_dir=None):
+        """Write cohorts, cells and the open-period state"""
+        state_dir = Path(state_dir or PATHS['data_processed'] / 'cohort_state')
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.cohorts.reset_index().to_parquet(state_dir / f'cohorts_{self.freq}.parquet', index=False)
+        self.cells.reset_index().to_parquet(state_dir / f'cells_{self.freq}.parquet', index=False)
+        with open(state_dir / f'state_{self.freq}.json', 'w') as f:
+            json.dump({'open_period': self.open_period, 'watermark': self.watermark, 'source': self.source,
+                       'rewrite_mark': self.rewrite_mark, 'open_pairs': sorted(self.open_pairs)}, f)
+        return state_dir
+
+    def _pairs(self, df, customer_col='customer_id', date_col='transaction_date'):
+        """Distinct (customer_id, period) activity of transactions"""
+        return pd.DataFrame({
+            'customer_id': np.asarray(df[customer_col], dtype=object),
+            'period': period_numbers(df[date_col], self.freq)
+        }).dropna(subset=['customer_id']).drop_duplicates()
+
+    def _count(self, pairs):
+        """Add customer-period pairs not counted yet to the cells and advance the open period"""
+        # New customers join the cohort of their first new period
+        first = pairs.groupby('customer_id')['period'].min()
+        new_customers = first[~first.index.isin(self.cohorts.index)]
+        self.cohorts = pd.concat([self.cohorts, new_customers.rename('cohort').astype(np.int64)])
+
+        cohort = self.cohorts.reindex(pairs['customer_id']).to_numpy()
+        increments = pd.Series(1, index=pd.MultiIndex.from_arrays(
+            [cohort, pairs['period'].to_numpy() - cohort], names=['cohort', 'offset'])).groupby(level=[0, 1]).sum()
+        self.cells = self.cells.add(increments, fill_value=0).astype(np.int64).rename('customers')
+
+        # Everything before the latest period is now closed
+        latest = int(pairs['period'].max())
+        if self.open_period is None or latest > self.open_period:
+            self.open_period = latest
+            self.open_pairs = set()
+        self.open_pairs.update(pairs.loc[pairs['period'] == self.open_period, 'customer_id'])
+        return len(increments)
+
+    def update(self, df, customer_col='customer_id', date_col='transaction_date'):
+        """
+        Count new transactions into the cohort cells
+
+        Returns:
+        --------
+        int
+            Cells incremented (new customer-period activity)
+        """
+        pairs = self._pairs(df, customer_col, date_col)
+
+        # Closed periods are frozen
+        if self.open_period is not None:
+            late = pairs['period'] < self.open_period
+            if late.any():
+                print(f"   Skipped {int(late.sum()):,} customer-periods dated in closed periods")
+            pairs = pairs[~late]
+        if len(pairs) == 0:
+            return 0
+
+        # Customers already counted in the open period add nothing there
+        if self.open_pairs:
+            counted = (pairs['period'] == self.open_period) & pairs['customer_id'].isin(self.open_pairs)
+            pairs = pairs[~counted]
+        if len(pairs) == 0:
+            return 0
+        return self._count(pairs)
+
+    def recompute(self, customers, engine=None):
+        """
+        Recount the cohorts of customers whose existing sales were rewritten
+
+        A cohort's cells do not record which customers they count, so every
+        cohort a rewritten customer belongs to is recounted from its members'
+        completed sales up to the watermark (closed periods included).
+
+        Returns:
+        --------
+        int
+            Customers recounted
+        """
+        cohorts = set(self.cohorts.reindex(list(customers)).dropna().astype(np.int64))
+        members = set(self.cohorts.index[self.cohorts.isin(cohorts)]).union(customers)
+        history = load_sales(['sales_key', 'customer_id', 'transaction_date'], filters={'customer_id': sorted(members)},
+                             engine=engine)
+        history = history[history['sales_key'] <= self.watermark]
+
+        self.cells = self.cells[~self.cells.index.get_level_values('cohort').isin(cohorts)]
+        self.cohorts = self.cohorts[~self.cohorts.index.isin(members)]
+        self.open_pairs -= members
+        if len(history):
+            self._count(self._pairs(history))
+        return len(members)
+
+    def refresh(self, engine=None, rebuild=False):
+        """
+        Merge completed sales loaded since the last refresh (all sales when rebuilding)
+
+        Cohorts of customers logged in etl_rewritten_customers since the last
+        refresh are recounted first (see recompute).
+
+        Returns:
+        --------
+        int
+            New transactions merged
+        """
+        source, max_key = sales_table_state(engine)
+        if self.watermark and not rebuild and (source != self.source or max_key < self.watermark):
+            print(" Cohort state refers to an earlier fact_sales load; rebuilding")
+            rebuild = True
+        if rebuild:
+            self.__init__(self.freq)
+        self.source = source
+        rewritten, self.rewrite_mark = rewritten_customers(self.rewrite_mark, engine=engine)
+        df = load_sales(['sales_key', 'customer_id', 'transaction_date'], engine=engine,
+                        after_sales_key=self.watermark or None)
+
+        if rewritten and self.watermark:
+            # Their rewritten rows kept their sales_key; rows past the watermark arrive in df
+            customers = self.recompute(rewritten, engine)
+            print(f" Cohort state: recounted {customers:,} customers in cohorts with rewritten sales")
+        if len(df) == 0:
+            print(" Cohort state is up to date")
+            return 0
+
+        # Oldest first, so a single refresh never closes a period it still has rows for
+        df = df.sort_values('transaction_date', kind='stable')
+        cells = self.update(df)
+        self.watermark = int(df['sales_key'].max())
+        print(f" Cohort state: merged {len(df):,} new transactions into {cells:,} cells")
+        return len(df)
+
+    def retention(self):
+        """Retention rates (%) per cohort and period offset, as returned by cohort_analysis"""
+        if len(self.cells) == 0:
+            return retention_matrix(np.zeros((0, 0), dtype=np.int64), 0, self.freq)
+
+        cohorts = self.cells.index.get_level_values('cohort').to_numpy()
+        offsets = self.cells.index.get_level_values('offset').to_numpy()
+        first_cohort = int(cohorts.min())
+        counts = np.zeros((int(cohorts.max()) - first_cohort + 1, int(offsets.max()) + 1), dtype=np.int64)
+        counts[cohorts - first_cohort, offsets] = self.cells.to_numpy()
+        return retention_matrix(counts, first_cohort, self.freq)
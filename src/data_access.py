@@ -0,0 +1,248 @@
+"""
+Typed, column-projected loaders for the analytics queries
+Consumers name the columns they use and the predicates they need, so only
+those columns cross the wire (PostgreSQL drops the view's unused joins and
+expressions) and the filtering happens in the database. Results come back
+with compact dtypes: categoricals for repeated strings, int32 keys and
+float32 amounts unless exact sums are requested.
+"""
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from config import DATABASE_URL
+
+# vw_sales_overview columns and their compact dtype ('amount' follows amount_dtype)
+SALES_COLUMNS = {
+    'sales_key': 'int64',
+    'transaction_id': 'object',
+    'transaction_date': 'datetime',
+    'customer_id': 'category',
+    'customer_name': 'object',
+    'customer_segment': 'category',
+    'age': 'Int16',
+    'gender': 'category',
+    'product_id': 'category',
+    'product_name': 'category',
+    'category': 'category',
+    'subcategory': 'category',
+    'brand': 'category',
+    'margin_percent': 'amount',
+    'year': 'int16',
+    'quarter': 'int8',
+    'month': 'int8',
+    'month_name': 'category',
+    'week': 'int8',
+    'year_month': 'int32',
+    'year_week': 'int32',
+    'day_name': 'category',
+    'is_weekend': 'bool',
+    'country': 'category',
+    'state': 'category',
+    'city': 'category',
+    'quantity': 'int32',
+    'unit_price': 'amount',
+    'subtotal': 'amount',
+    'discount_amount': 'amount',
+    'tax_amount': 'amount',
+    'shipping_cost': 'amount',
+    'total_amount': 'amount',
+    'net_revenue': 'amount',
+    'payment_method': 'category',
+    'order_status': 'category',
+    'total_cost': 'amount',
+    'profit': 'amount'
+}
+
+# Columns most analyses need (RFM, cohorts, churn/CLV features)
+CUSTOMER_SALES_COLUMNS = ['customer_id', 'transaction_date', 'total_amount']
+
+# Engine shared by callers that don't pass one (created on first use)
+_ENGINE = None
+
+
+def get_engine(engine=None):
+    """Return the given engine, or the process-wide one for DATABASE_URL"""
+    global _ENGINE
+    if engine is not None:
+        return engine
+    if _ENGINE is None:
+        _ENGINE = create_engine(DATABASE_URL)
+    return _ENGINE
+
+
+def compact_dtypes(df, dtypes, amount_dtype='float32'):
+    """
+    Convert query results to compact dtypes
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Query result
+    dtypes : dict
+        Column -> target dtype ('datetime', 'amount' or any pandas dtype)
+    amount_dtype : str
+        dtype for monetary columns; 'float64' keeps sums exact to the cent
+
+    Returns:
+    --------
+    DataFrame
+    """
+    for column in df.columns:
+        dtype = dtypes.get(column)
+        if dtype is None:
+            continue
+        if dtype == 'datetime':
+            df[column] = pd.to_datetime(df[column])
+        elif df[column].isna().any() and dtype in ('int8', 'int16', 'int32', 'int64', 'bool'):
+            # Outer-joined dimensions can be missing; keep the nulls
+            df[column] = df[column].astype(dtype.capitalize() if dtype != 'bool' else 'boolean')
+        else:
+            df[column] = df[column].astype(amount_dtype if dtype == 'amount' else dtype)
+    return df
+
+
+def load_sales(columns=CUSTOMER_SALES_COLUMNS, status='Completed', start_date=None, end_date=None,
+               filters=None, engine=None, amount_dtype='float32', after_sales_key=None):
+    """
+    Load projected, filtered rows of vw_sales_overview
+
+    Parameters:
+    -----------
+    columns : list of str
+        Columns to fetch (keys of SALES_COLUMNS)
+    status : str or None
+        order_status to keep (None keeps every status)
+    start_date, end_date : date-like or None
+        Inclusive transaction_date bounds
+    filters : dict
+        Column -> value (or list of values) equality predicates, e.g.
+        {'category': 'Electronics', 'country': ['USA', 'Canada']}
+    engine : sqlalchemy Engine
+        Defaults to the shared engine for DATABASE_URL
+    amount_dtype : str
+        dtype for monetary columns (float32 by default)
+    after_sales_key : int or None
+        Only rows with a larger sales_key (rows loaded since a watermark)
+
+    Returns:
+    --------
+    DataFrame with compact dtypes
+
+    Example:
+    --------
+    df = load_sales(['customer_id', 'transaction_date', 'total_amount'],
+                    start_date='2024-01-01', end_date='2024-03-31')
+    """
+    filters = dict(filters or {})
+    unknown = set(columns).union(filters) - set(SALES_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown vw_sales_overview columns: {sorted(unknown)}")
+
+    conditions, params = [], {}
+    if status is not None:
+        filters['order_status'] = status
+    for column, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            conditions.append(f"{column} = ANY(:{column})")
+            params[column] = list(value)
+        else:
+            conditions.append(f"{column} = :{column}")
+            params[column] = value
+    if start_date is not None:
+        conditions.append("transaction_date >= :start_date")
+        params['start_date'] = start_date
+    if end_date is not None:
+        conditions.append("transaction_date <= :end_date")
+        params['end_date'] = end_date
+    if after_sales_key is not None:
+        conditions.append("sales_key > :after_sales_key")
+        params['after_sales_key'] = int(after_sales_key)
+
+    query = f"SELECT {', '.join(columns)} FROM vw_sales_overview"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    df = pd.read_sql(text(query), get_engine(engine), params=params)
+    return compact_dtypes(df, SALES_COLUMNS, amount_dtype)
+
+
+def sales_table_state(engine=None):
+    """
+    Identify the fact_sales table that sales_key watermarks refer to
+
+    Returns:
+    --------
+    (str, int)
+        The table's identity (its oid, new after a schema rebuild) and its
+        largest sales_key (0 when empty)
+    """
+    with get_engine(engine).connect() as conn:
+        table_id, max_key = conn.execute(text(
+            "SELECT 'fact_sales'::regclass::oid, COALESCE(MAX(sales_key), 0) FROM fact_sales")).one()
+    return str(table_id), int(max_key)
+
+
+def rewritten_customers(after_rewrite_id=0, engine=None):
+    """
+    Customers whose existing sales incremental loads rewrote since a mark
+
+    Rewritten sales keep their sales_key, so consumers that only read past a
+    sales_key watermark recompute these customers instead.
+
+    Parameters:
+    -----------
+    after_rewrite_id : int
+        Last etl_rewritten_customers.rewrite_id already handled
+    engine : sqlalchemy Engine
+        Defaults to the shared engine for DATABASE_URL
+
+    Returns:
+    --------
+    (list of customer_id, int)
+        The customers and the new mark (after_rewrite_id when nothing changed)
+    """
+    query = """
+    SELECT r.rewrite_id, c.customer_id
+    FROM etl_rewritten_customers r
+    JOIN dim_customers c ON r.customer_key = c.customer_key
+    WHERE r.rewrite_id > :after_rewrite_id
+    """
+    df = pd.read_sql(text(query), get_engine(engine), params={'after_rewrite_id': int(after_rewrite_id)})
+    if len(df) == 0:
+        return [], int(after_rewrite_id)
+    return sorted(df['customer_id'].unique()), int(df['rewrite_id'].max())
+
+
+def drop_unused_categories(df):
+    """
+    Remove categories no longer present after filtering a frame
+
+    Keeps groupby on categorical columns from listing filtered-out values.
+    """
+    for column in df.select_dtypes('category').columns:
+        df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+
+def load_daily_revenue(status='Completed', engine=None):
+    """
+    Daily total_amount from the materialized daily rollup
+
+    Returns:
+    --------
+    DataFrame with transaction_date (datetime) and total_amount (float64)
+    """
+    query = """
+    SELECT date AS transaction_date, SUM(total_amount) AS total_amount
+    FROM mv_daily_sales
+    WHERE order_status = :status
+    GROUP BY date
+    ORDER BY date
+    """
+    df = pd.read_sql(text(query), get_engine(engine), params={'status': status})
+    return compact_dtypes(df, {'transaction_date': 'datetime', 'total_amount': 'amount'}, 'float64')
@@ -0,0 +1,112 @@
+"""
+Process-wide cache for analytics extracts
+Frames are fetched once per process and also written as Parquet snapshots
+under data/cache/analytics, keyed by a fingerprint of the load state (the
+etl_load_state watermarks, rows merged and last load time). Later callers
+in the same or a later process reuse them until a load changes the data.
+"""
+
+import hashlib
+import pandas as pd
+from sqlalchemy import text
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from config import PATHS
+from src.data_access import get_engine, load_daily_revenue
+
+SNAPSHOT_DIR = PATHS['data_cache'] / 'analytics'
+
+# (fingerprint, key) -> DataFrame held for the life of the process
+_MEMORY = {}
+
+
+def sales_fingerprint(engine=None):
+    """
+    Identify the current state of the loaded facts
+
+    Read from the few etl_load_state rows rather than the facts: every load
+    advances loaded_at (and usually the sales_key watermark and rows merged),
+    refresh_sales_aggregates stamps its own row once mv_daily_sales is
+    current, and a schema rebuild starts the table over.
+    """
+    with get_engine(engine).connect() as conn:
+        last_key, rows, loaded_at = conn.execute(text(
+            "SELECT COALESCE(MAX(last_key), 0), COALESCE(SUM(rows_merged), 0), MAX(loaded_at) FROM etl_load_state"
+        )).one()
+    stamp = f"{loaded_at:%Y%m%d%H%M%S%f}" if loaded_at else 'none'
+    return f"{last_key}_{rows}_{stamp}"
+
+
+def _snapshot_path(fingerprint, key):
+    digest = hashlib.md5(key.encode()).hexdigest()[:12]
+    return SNAPSHOT_DIR / f"{fingerprint}__{digest}.parquet"
+
+
+def _read_snapshot(path):
+    try:
+        return pd.read_parquet(path)
+    except (ImportError, OSError, ValueError):
+        return None  # No Parquet engine, or a partial/corrupt file
+
+
+def _write_snapshot(path, fingerprint, df):
+    """Persist a frame and drop snapshots of older data (best effort)"""
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        df.to_parquet(path, index=False)
+    except ImportError:
+        return  # No Parquet engine: memory cache only
+    for stale in SNAPSHOT_DIR.glob('*.parquet'):
+        if not stale.name.startswith(f"{fingerprint}__"):
+            stale.unlink(missing_ok=True)
+
+
+def cached_frame(key, load, engine=None):
+    """
+    Return the frame for key, loading it at most once per data version
+
+    Parameters:
+    -----------
+    key : str
+        Identifies the extract (query and parameters)
+    load : callable
+        Called with the engine on a miss; returns a DataFrame
+    engine : sqlalchemy Engine
+        Defaults to the shared engine for DATABASE_URL
+
+    Returns:
+    --------
+    DataFrame (a copy, so callers may modify it)
+    """
+    engine = get_engine(engine)
+    fingerprint = sales_fingerprint(engine)
+
+    df = _MEMORY.get((fingerprint, key))
+    if df is None:
+        path = _snapshot_path(fingerprint, key)
+        df = _read_snapshot(path) if path.exists() else None
+        if df is None:
+            df = load(engine)
+            _write_snapshot(path, fingerprint, df)
+        # One version per key in memory
+        for stale in [k for k in _MEMORY if k[1] == key]:
+            del _MEMORY[stale]
+        _MEMORY[(fingerprint, key)] = df
+    return df.copy()
+
+
+def get_daily_revenue(status='Completed', engine=None):
+    """Cached load_daily_revenue result"""
+    return cached_frame(f"daily_revenue:{status}",
+                        lambda engine: load_daily_revenue(status, engine=engine), engine)
+
+
+def clear_cache(snapshots=False):
+    """Forget in-memory frames (and delete Parquet snapshots when asked)"""
+    _MEMORY.clear()
+    if snapshots:
+        for path in SNAPSHOT_DIR.glob('*.parquet'):
+            path.unlink(missing_ok=True)
@@ -313,11 +313,35 @@ class CLVPredictionModel:
  features.columns = [customer_col, 'historical_revenue', 'avg_order_value', 
  'std_order_value', 'num_orders', 'first_purchase', 'last_purchase']
 
+ return self.features_from_totals(features, df[date_col].max())
+
+ @staticmethod
+ def features_from_totals(totals, analysis_date=None):
+ """
+ Derive CLV features from per-customer totals
+
+ Parameters:
+ -----------
+ totals : DataFrame
+ One row per customer with historical_revenue, avg_order_value,
+ std_order_value, num_orders, first_purchase and last_purchase
+ (e.g. read from vw_customer_lifetime_value)
+ analysis_date : datetime
+ Reference date for recency (defaults to the latest last_purchase)
+
+ Returns:
+ --------
+ DataFrame with the columns prepare_features returns
+ """
+ features = totals.copy()
+ if analysis_date is None:
+ analysis_date = features['last_purchase'].max()
+
  # Calculate additional features
  features['customer_lifetime_days'] = (features['last_purchase'] - features['first_purchase']).dt.days
  features['customer_lifetime_days'] = features['customer_lifetime_days'].replace(0, 1)
  features['purchase_frequency'] = features['num_orders'] / features['customer_lifetime_days']
- features['days_since_last_purchase'] = (df[date_col].max() - features['last_purchase']).dt.days
+ features['days_since_last_purchase'] = (analysis_date - features['last_purchase']).dt.days
  features['std_order_value'] = features['std_order_value'].fillna(0)
 
  # Calculate CLV (12-month projection)
@@ -0,0 +1,285 @@
+"""
+Stage instrumentation for the load pipeline
+Each instrumented step records wall time, rows/second, peak RSS, bytes
+written and the wall time spent in each component (read, map, serialize,
+database; overlapping time of concurrent loader threads counts once). A run is saved as a JSON report and compared with the previous
+report so slow nights point at the stage and component responsible.
+"""
+
+import json
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# A stage is flagged when it is this much slower than last run...
+REGRESSION_THRESHOLD = 0.25
+# ...and slower by at least this many seconds (ignores noise on tiny stages)
+MIN_REGRESSION_SECONDS = 1.0
+
+# Seconds between RSS samples while a stage runs
+RSS_SAMPLE_INTERVAL = 0.05
+
+# Report currently collecting stages (None when instrumentation is off)
+_ACTIVE_REPORT = None
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def _current_rss():
+    """Resident set size in bytes (Linux /proc), or None where unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError):
+        return None
+
+
+def _covered_seconds(intervals):
+    """Length of the union of (start, end) intervals"""
+    total, reach = 0.0, float('-inf')
+    for start, end in sorted(intervals):
+        if end > reach:
+            total += end - max(start, reach)
+            reach = end
+    return total
+
+
+def _max_rss():
+    """Process-lifetime peak RSS in bytes (fallback when /proc is missing)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # kB on Linux, bytes on macOS
+
+
+class _RSSSampler:
+    """Background thread tracking the peak RSS seen while a stage runs"""
+
+    def __init__(self):
+        self.peak = _current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            rss = _current_rss()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        if self.peak is None:
+            self.peak = _max_rss()
+
+
+class RunReport:
+    """
+    Metrics for one pipeline run, one record per stage
+
+    Example:
+    --------
+    report = RunReport('load_data', PATHS['reports'] / 'load_runs')
+    with report.active():
+        load_fact_sales(engine)  # decorated with @instrumented
+    report.save()
+    report.compare_with_previous()
+    """
+
+    def __init__(self, name, report_dir, params=None):
+        self.name = name
+        self.report_dir = Path(report_dir)
+        self.params = params or {}
+        self.started_at = datetime.now()
+        self.stages = []
+        self.regressions = []
+        self.path = None
+        self._current = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def active(self):
+        """Make this the report that instrumented functions record into"""
+        global _ACTIVE_REPORT
+        previous, _ACTIVE_REPORT = _ACTIVE_REPORT, self
+        try:
+            yield self
+        finally:
+            _ACTIVE_REPORT = previous
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage; the body may set record['rows']"""
+        record = {'stage': name, 'rows': 0, 'bytes_written': 0, 'components': {}, '_intervals': {}}
+        outer, self._current = self._current, record
+        start = time.perf_counter()
+        try:
+            with _RSSSampler() as sampler:
+                yield record
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 4)
+            record['rows_per_second'] = round(record['rows'] / max(record['seconds'], 1e-9), 1)
+            record['peak_rss_mb'] = round(sampler.peak / 2**20, 1) if sampler.peak else None
+            record['components'] = {k: round(_covered_seconds(v), 4) for k, v in record.pop('_intervals').items()}
+            self._current = outer
+            self.stages.append(record)
+
+    def add(self, component=None, seconds=0.0, bytes_written=0, start=None):
+        """
+        Add component time / bytes to the running stage (thread-safe)
+
+        Time is kept as the interval [start, start + seconds] (ending now when
+        start is None), so a component charged by several loader threads at
+        once reports the wall time it was busy, not the sum over threads.
+        """
+        if self._current is None:
+            return
+        with self._lock:
+            self._current['bytes_written'] += bytes_written
+            if component:
+                if start is None:
+                    start = time.perf_counter() - seconds
+                self._current['_intervals'].setdefault(component, []).append((start, start + seconds))
+
+    def to_dict(self):
+        total = sum(stage['seconds'] for stage in self.stages)
+        return {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'params': self.params,
+            'total_seconds': round(total, 4),
+            'stages': self.stages,
+            'regressions': self.regressions
+        }
+
+    def save(self):
+        """Write the report as <report_dir>/<name>_<timestamp>.json"""
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.report_dir / f"{self.name}_{self.started_at:%Y%m%d_%H%M%S}.json"
+        with open(self.path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return self.path
+
+    def previous(self):
+        """The most recent earlier report for this pipeline, or None"""
+        reports = sorted(p for p in self.report_dir.glob(f"{self.name}_*.json") if p != self.path)
+        if not reports:
+            return None
+        with open(reports[-1]) as f:
+            return json.load(f)
+
+    def compare_with_previous(self, threshold=REGRESSION_THRESHOLD, min_seconds=MIN_REGRESSION_SECONDS):
+        """
+        Flag stages that got slower than in the previous run
+
+        Returns:
+        --------
+        list of str
+            One message per regressed stage (also stored in the saved report)
+        """
+        previous = self.previous()
+        if previous is None:
+            print("   No previous run report to compare against")
+            return []
+
+        before = {stage['stage']: stage for stage in previous['stages']}
+        self.regressions = []
+        for stage in self.stages:
+            old = before.get(stage['stage'])
+            if old is None:
+                continue
+            slower = stage['seconds'] - old['seconds']
+            if slower >= min_seconds and stage['seconds'] > old['seconds'] * (1 + threshold):
+                # Point at the component that grew the most
+                growth = {name: seconds - old.get('components', {}).get(name, 0.0)
+                          for name, seconds in stage['components'].items()}
+                worst = max(growth, key=growth.get) if growth else None
+                message = (f"{stage['stage']}: {old['seconds']:.2f}s -> {stage['seconds']:.2f}s "
+                           f"({old['rows_per_second']:,.0f} -> {stage['rows_per_second']:,.0f} rows/s)")
+                if worst:
+                    message += f", mostly {worst} (+{growth[worst]:.2f}s)"
+                self.regressions.append(message)
+
+        print(f"   Compared with run of {previous['started_at']}: "
+              f"{len(self.regressions)} regressed stage(s)")
+        for message in self.regressions:
+            print(f"     {message}")
+
+        if self.path:
+            self.save()
+        return self.regressions
+
+    def print_summary(self):
+        print(f"\n   {'stage':<28}{'seconds':>9}{'rows':>12}{'rows/s':>12}{'peak MB':>9}{'MB out':>9}")
+        for stage in self.stages:
+            peak = f"{stage['peak_rss_mb']:.0f}" if stage['peak_rss_mb'] else '-'
+            print(f"   {stage['stage']:<28}{stage['seconds']:>9.2f}{stage['rows']:>12,}"
+                  f"{stage['rows_per_second']:>12,.0f}{peak:>9}{stage['bytes_written'] / 2**20:>9.1f}")
+            if stage['components']:
+                parts = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in stage['components'].items())
+                print(f"     ({parts})")
+        print()
+
+
+def instrumented(func):
+    """
+    Record a decorated load step as a stage of the active report
+
+    The stage's row count is the return value when it is an int, or its
+    length (DataFrames). Without an active report the function runs as is.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        report = _ACTIVE_REPORT
+        if report is None:
+            return func(*args, **kwargs)
+        with report.stage(func.__name__.replace('load_', '', 1)) as record:
+            result = func(*args, **kwargs)
+            record['rows'] = result if isinstance(result, int) else len(result)
+        return result
+    return wrapper
+
+
+@contextmanager
+def timed(component):
+    """Charge the wrapped block's wall time to a component of the running stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _ACTIVE_REPORT is not None:
+            _ACTIVE_REPORT.add(component, time.perf_counter() - start, start=start)
+
+
+def timed_iter(component, iterable):
+    """Iterate, charging the time spent producing each item to a component"""
+    iterator = iter(iterable)
+    while True:
+        with timed(component):
+            item = next(iterator, StopIteration)
+        if item is StopIteration:
+            return
+        yield item
+
+
+def record_bytes(num_bytes):
+    """Count bytes sent to the database by the running stage"""
+    if _ACTIVE_REPORT is not None:
+        _ACTIVE_REPORT.add(bytes_written=num_bytes)
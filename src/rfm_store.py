@@ -0,0 +1,278 @@
+"""
+Incremental RFM state
+Keeps each customer's last purchase day, purchase count and amount sum on
+disk, together with quantile sketches of the recency and amount values, and
+folds in only the sales loaded since the last refresh. Scoring reads those
+quantile edges from the sketches, so a daily refresh costs O(new rows +
+customers) instead of a rescan of the full history.
+"""
+
+import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from config import PATHS
+from src.utils import rfm_totals, score_rfm, day_number, RFM_BINS, RFM_SEGMENT_RULES
+from src.data_access import load_sales, sales_table_state, rewritten_customers
+
+# Relative error of the monetary sketch (the last_day sketch is exact)
+MONETARY_ACCURACY = 0.01
+
+# Amounts at or below this share the sketch's lowest bucket
+MIN_SKETCH_VALUE = 0.01
+
+STATE_COLUMNS = ['last_day', 'frequency', 'monetary']
+
+# Sketched state columns and their relative accuracy (frequency is scored by rank)
+SKETCH_ACCURACY = {'last_day': None, 'monetary': MONETARY_ACCURACY}
+
+
+class QuantileSketch:
+    """
+    Bucketed histogram answering quantile queries, with inserts and deletes
+
+    With relative_accuracy=None values are rounded to integers and counted
+    exactly (days, purchase counts). Otherwise values fall into logarithmic
+    buckets and every quantile is within that relative error (as in DDSketch).
+    Deleting a customer's old value before adding the new one keeps the
+    sketch equal to the current per-customer distribution.
+    """
+
+    def __init__(self, relative_accuracy=None, counts=None):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy) if relative_accuracy else None
+        counts = counts or {}
+        self.counts = pd.Series(list(counts.values()), index=np.array(list(counts), dtype=np.int64),
+                                dtype=np.int64)
+
+    def _buckets(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if self.gamma is None:
+            return np.rint(values).astype(np.int64)
+        return np.ceil(np.log(np.maximum(values, MIN_SKETCH_VALUE)) / np.log(self.gamma)).astype(np.int64)
+
+    def _values(self, buckets):
+        if self.gamma is None:
+            return buckets.astype(np.float64)
+        return 2 * self.gamma ** buckets.astype(np.float64) / (self.gamma + 1)
+
+    def update(self, values, weight=1):
+        """Add (weight=1) or remove (weight=-1) values"""
+        if len(values) == 0:
+            return
+        buckets, counts = np.unique(self._buckets(values), return_counts=True)
+        counts = self.counts.add(pd.Series(counts * weight, index=buckets), fill_value=0).astype(np.int64)
+        self.counts = counts[counts != 0]
+
+    def quantiles(self, qs):
+        """Approximate values at quantiles qs (0..1)"""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.counts.sum() == 0:
+            return np.zeros(len(qs))
+        counts = self.counts.sort_index()
+        cumulative = counts.cumsum().to_numpy()
+        positions = np.searchsorted(cumulative, qs * (cumulative[-1] - 1), side='right')
+        return self._values(counts.index.to_numpy()[positions])
+
+    def to_dict(self):
+        return {'relative_accuracy': self.relative_accuracy,
+                'counts': {str(bucket): int(count) for bucket, count in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['relative_accuracy'], {int(bucket): count for bucket, count in data['counts'].items()})
+
+
+class RFMStore:
+    """
+    Per-customer RFM totals maintained from new sales only
+
+    Example:
+    --------
+    store = RFMStore.load()
+    store.refresh()          # merge sales loaded since the last refresh
+    store.save()
+    rfm = store.scores()     # same columns as calculate_rfm
+
+    Each sales_key is counted once. Customers whose existing sales a later
+    merge rewrote (status or amount changed under the same sales_key) are
+    recomputed from the etl_rewritten_customers log. State built from
+    another fact_sales table (the schema was rebuilt) is rebuilt
+    automatically.
+    """
+
+    def __init__(self, state=None, watermark=0, sketches=None, source=None, rewrite_mark=0):
+        if state is None:
+            state = pd.DataFrame({'last_day': pd.Series(dtype=np.int64), 'frequency': pd.Series(dtype=np.int64),
+                                  'monetary': pd.Series(dtype=np.float64)},
+                                 index=pd.Index([], dtype=object, name='customer_id'))
+        self.state = state
+        self.watermark = watermark
+        # fact_sales identity (see sales_table_state) the watermark refers to
+        self.source = source
+        # Last etl_rewritten_customers entry already applied
+        self.rewrite_mark = rewrite_mark
+        self.sketches = sketches or self._build_sketches()
+
+    def _build_sketches(self):
+        sketches = {column: QuantileSketch(accuracy) for column, accuracy in SKETCH_ACCURACY.items()}
+        for column, sketch in sketches.items():
+            sketch.update(self.state[column].to_numpy())
+        return sketches
+
+    def _update_sketches(self, frame, weight):
+        for column, sketch in self.sketches.items():
+            sketch.update(frame[column].to_numpy(), weight)
+
+    @classmethod
+    def load(cls, state_dir=None):
+        """
+        Load the stored state, or start empty when none exists
+
+        Parameters:
+        -----------
+        state_dir : Path
+            Directory holding state.parquet and sketches.json
+            (defaults to PATHS['data_processed'] / 'rfm_state')
+        """
+        state_dir = Path(state_dir or PATHS['data_processed'] / 'rfm_state')
+        state_path, meta_path = state_dir / 'state.parquet', state_dir / 'sketches.json'
+        if not (state_path.exists() and meta_path.exists()):
+            return cls()
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        state = pd.read_parquet(state_path).set_index('customer_id')
+        sketches = {column: QuantileSketch.from_dict(meta['sketches'][column]) for column in SKETCH_ACCURACY}
+        return cls(state, meta['watermark'], sketches, meta.get('source'), meta.get('rewrite_mark', 0))
+
+    def save(self, state_dir=None):
+        """Write state.parquet and sketches.json"""
+        state_dir = Path(state_dir or PATHS['data_processed'] / 'rfm_state')
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.state.reset_index().to_parquet(state_dir / 'state.parquet', index=False)
+        with open(state_dir / 'sketches.json', 'w') as f:
+            json.dump({'watermark': self.watermark, 'source': self.source, 'rewrite_mark': self.rewrite_mark,
+                       'sketches': {column: sketch.to_dict() for column, sketch in self.sketches.items()}}, f)
+        return state_dir
+
+    def update(self, df, customer_col='customer_id', date_col='transaction_date', amount_col='total_amount'):
+        """
+        Merge new transactions into the state
+
+        Returns:
+        --------
+        int
+            Customers whose totals changed
+        """
+        totals = rfm_totals(df, customer_col, date_col, amount_col)
+        totals = totals.set_index(pd.Index(np.asarray(totals[customer_col], dtype=object), name='customer_id'))
+        totals = totals[STATE_COLUMNS]
+        if len(totals) == 0:
+            return 0
+
+        old = self.state.reindex(totals.index)
+        existing = old['frequency'].notna().to_numpy()
+        self._update_sketches(old[existing], -1)
+
+        # New customers have NaN old totals: fmax ignores them, fillna(0) adds nothing
+        merged = pd.DataFrame({
+            'last_day': np.fmax(totals['last_day'].to_numpy(np.float64), old['last_day'].to_numpy(np.float64)),
+            'frequency': totals['frequency'].to_numpy(np.int64) + old['frequency'].fillna(0).to_numpy(np.int64),
+            'monetary': totals['monetary'].to_numpy(np.float64) + old['monetary'].fillna(0).to_numpy(np.float64)
+        }, index=totals.index).astype({'last_day': np.int64})
+        self._update_sketches(merged, 1)
+
+        self.state = pd.concat([self.state[~self.state.index.isin(merged.index)], merged])
+        return len(merged)
+
+    def remove(self, customers):
+        """Drop customers from the state and the sketches"""
+        dropped = self.state.index.isin(list(customers))
+        self._update_sketches(self.state[dropped], -1)
+        self.state = self.state[~dropped]
+        return int(dropped.sum())
+
+    def refresh(self, engine=None, rebuild=False):
+        """
+        Merge completed sales loaded since the last refresh (all sales when rebuilding)
+
+        Customers logged in etl_rewritten_customers since the last refresh
+        are recomputed from all their sales up to the watermark first.
+
+        Returns:
+        --------
+        int
+            New transactions merged
+        """
+        columns = ['sales_key', 'customer_id', 'transaction_date', 'total_amount']
+        source, max_key = sales_table_state(engine)
+        if self.watermark and not rebuild and (source != self.source or max_key < self.watermark):
+            print(" RFM state refers to an earlier fact_sales load; rebuilding")
+            rebuild = True
+        if rebuild:
+            self.__init__()
+        self.source = source
+        rewritten, self.rewrite_mark = rewritten_customers(self.rewrite_mark, engine=engine)
+        df = load_sales(columns, engine=engine, amount_dtype='float64', after_sales_key=self.watermark or None)
+
+        if rewritten and self.watermark:
+            # Their rewritten rows kept their sales_key; rows past the watermark arrive in df
+            history = load_sales(columns, filters={'customer_id': rewritten}, engine=engine, amount_dtype='float64')
+            self.remove(rewritten)
+            self.update(history[history['sales_key'] <= self.watermark])
+            print(f" RFM state: recomputed {len(rewritten):,} customers with rewritten sales")
+        if len(df) == 0:
+            print(" RFM state is up to date")
+            return 0
+
+        customers = self.update(df)
+        self.watermark = int(df['sales_key'].max())
+        print(f" RFM state: merged {len(df):,} new transactions for {customers:,} customers")
+        return len(df)
+
+    def scores(self, analysis_date=None, bins=RFM_BINS, segment_rules=RFM_SEGMENT_RULES):
+        """
+        Score the stored customers with quantile edges from the sketches
+
+        Frequency is ranked over the stored counts as in calculate_rfm, so
+        f_score matches it exactly; recency and monetary edges come from the
+        sketches.
+
+        Parameters:
+        -----------
+        analysis_date : datetime
+            Reference date for recency (defaults to last purchase + 1 day)
+        bins : int
+            Quantile bins per score
+        segment_rules : list
+            Segment rule table (see RFM_SEGMENT_RULES)
+
+        Returns:
+        --------
+        DataFrame with RFM scores (same columns as calculate_rfm)
+        """
+        state = self.state.sort_index()
+        if analysis_date is None:
+            analysis_day = int(state['last_day'].max()) + 1 if len(state) else 0
+        else:
+            analysis_day = day_number(analysis_date)
+
+        # Recency rises as last_day falls, so its edges mirror the last_day quantiles
+        qs = np.linspace(0, 1, bins + 1)[1:-1]
+        edges = {
+            'recency': analysis_day - self.sketches['last_day'].quantiles(1 - qs),
+            'monetary': self.sketches['monetary'].quantiles(qs)
+        }
+
+        rfm = pd.DataFrame({
+            'customer_id': state.index.to_numpy(),
+            'recency': (analysis_day - state['last_day'].to_numpy()).astype(np.int32),
+            'frequency': state['frequency'].to_numpy().astype(np.int32),
+            'monetary': state['monetary'].to_numpy()
+        })
+        return score_rfm(rfm, bins, segment_rules, edges)
@@ -10,7 +10,6 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sqlalchemy import create_engine
 from statsmodels.tsa.seasonal import seasonal_decompose
 from datetime import datetime
 import sys
@@ -18,8 +17,11 @@ from pathlib import Path
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
-from config import DATABASE_URL, PATHS
-from src.utils import calculate_rfm, cohort_analysis
+from config import PATHS
+from src.data_access import get_engine
+from src.data_cache import get_daily_revenue
+from src.rfm_store import RFMStore
+from src.cohort_store import CohortStore
 
 # Create plots directory
 (PATHS['reports'] / 'plots').mkdir(parents=True, exist_ok=True)
@@ -37,14 +39,11 @@ def perform_cohort_analysis():
     print("1⃣  COHORT ANALYSIS (Customer Retention Rates)")
     print("-" * 70)
     
-    # Load data
-    engine = create_engine(DATABASE_URL)
-    query = "SELECT * FROM vw_sales_overview WHERE order_status = 'Completed'"
-    df = pd.read_sql(query, engine)
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
-    
-    # Perform cohort analysis
-    cohort_retention = cohort_analysis(df, 'customer_id', 'transaction_date')
+    # Fold sales loaded since the last run into the stored cohort cells
+    store = CohortStore.load('M')
+    store.refresh()
+    store.save()
+    cohort_retention = store.retention()
     
     print("\n Cohort Retention Matrix (%):")
     print("-" * 70)
@@ -96,14 +95,11 @@ def perform_rfm_segmentation():
     print("2⃣  RFM SEGMENTATION (Recency, Frequency, Monetary Value)")
     print("-" * 70)
     
-    # Load data
-    engine = create_engine(DATABASE_URL)
-    query = "SELECT * FROM vw_sales_overview WHERE order_status = 'Completed'"
-    df = pd.read_sql(query, engine)
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
-    
-    # Calculate RFM scores
-    rfm = calculate_rfm(df, 'customer_id', 'transaction_date', 'total_amount')
+    # Fold sales loaded since the last run into the stored RFM state, then score
+    store = RFMStore.load()
+    store.refresh()
+    store.save()
+    rfm = store.scores()
     
     print("\n RFM Summary Statistics:")
     print("-" * 70)
@@ -192,11 +188,8 @@ def perform_time_series_decomposition():
     print("3⃣  TIME-SERIES DECOMPOSITION")
     print("-" * 70)
     
-    # Load data
-    engine = create_engine(DATABASE_URL)
-    query = "SELECT * FROM vw_sales_overview WHERE order_status = 'Completed'"
-    df = pd.read_sql(query, engine)
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+    # Load daily revenue from the materialized aggregates
+    df = get_daily_revenue()
     
     # Aggregate daily sales
     daily_sales = df.groupby('transaction_date')['total_amount'].sum().reset_index()
@@ -287,17 +280,15 @@ def perform_marketing_correlation_analysis():
     print("-" * 70)
     
     # Load data
-    engine = create_engine(DATABASE_URL)
+    engine = get_engine()
     
     # Load marketing campaigns
     campaigns = pd.read_sql("SELECT * FROM dim_marketing_campaigns", engine)
     campaigns['start_date'] = pd.to_datetime(campaigns['start_date'])
     campaigns['end_date'] = pd.to_datetime(campaigns['end_date'])
     
-    # Load sales data
-    sales_query = "SELECT * FROM vw_sales_overview WHERE order_status = 'Completed'"
-    df = pd.read_sql(sales_query, engine)
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+    # Load daily revenue from the materialized aggregates
+    df = get_daily_revenue(engine=engine)
     
     # Aggregate daily revenue
     daily_revenue = df.groupby('transaction_date')['total_amount'].sum().reset_index()
@@ -0,0 +1,395 @@
+"""
+Dataset storage layer for raw and processed data
+Reads and writes named datasets as Parquet (columnar, typed, optionally
+split into part files) or CSV (compatibility path). Readers pick whichever
+format is on disk, so producers and consumers can switch independently.
+
+Kept free of config/database imports so the cloud dashboard can use it.
+"""
+
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+FORMATS = ('csv', 'parquet')
+
+# Column types per dataset: dates are stored as date32, categories as
+# dictionary-encoded strings, decimals with the precision used in schema.sql,
+# and text columns are forced to strings (e.g. zip codes) when parsing CSV
+DATASET_SCHEMAS = {
+    'customers': {
+        'dates': ['registration_date'],
+        'categories': ['country', 'state', 'city', 'customer_segment', 'gender'],
+        'decimals': {},
+        'text': ['phone', 'zip_code']
+    },
+    'products': {
+        'dates': ['launch_date'],
+        'categories': ['category', 'subcategory', 'brand'],
+        'decimals': {'price': (10, 2), 'cost': (10, 2), 'weight_kg': (10, 2)},
+        'text': []
+    },
+    'transactions': {
+        'dates': ['transaction_date'],
+        'categories': ['payment_method', 'order_status', 'shipping_address', 'order_notes'],
+        'decimals': {
+            'unit_price': (10, 2), 'subtotal': (12, 2), 'discount_amount': (10, 2),
+            'tax_amount': (10, 2), 'shipping_cost': (10, 2), 'total_amount': (12, 2)
+        },
+        'text': ['transaction_id', 'customer_id', 'product_id']
+    },
+    'returns': {
+        'dates': ['return_date'],
+        'categories': ['return_reason', 'return_status'],
+        'decimals': {'refund_amount': (12, 2)},
+        'text': ['return_id', 'transaction_id', 'customer_id', 'product_id']
+    },
+    'marketing_campaigns': {
+        'dates': ['start_date', 'end_date'],
+        'categories': ['channel', 'target_segment'],
+        'decimals': {'budget': (12, 2)},
+        'text': []
+    },
+    'sales_for_cloud': {
+        'dates': ['transaction_date'],
+        'categories': ['customer_segment', 'gender', 'category', 'subcategory', 'brand',
+                       'month_name', 'day_name', 'country', 'state', 'city',
+                       'payment_method', 'order_status'],
+        'decimals': {},
+        'text': []
+    },
+    'customers_for_cloud': {
+        'dates': ['registration_date', 'first_purchase_date', 'last_purchase_date'],
+        'categories': ['customer_segment'],
+        'decimals': {},
+        'text': []
+    },
+    'products_for_cloud': {
+        'dates': [],
+        'categories': ['category', 'brand'],
+        'decimals': {},
+        'text': []
+    }
+}
+
+_EMPTY_SCHEMA = {'dates': [], 'categories': [], 'decimals': {}, 'text': []}
+
+
+def _schema(name):
+    return DATASET_SCHEMAS.get(name, _EMPTY_SCHEMA)
+
+
+def dataset_path(name, base_dir, output_format='csv', part=None):
+    """
+    File for a dataset: base_dir/name.ext, or base_dir/name/part-NNNNN.ext for a part
+    """
+    extension = 'parquet' if output_format == 'parquet' else 'csv'
+    if part is None:
+        return Path(base_dir) / f'{name}.{extension}'
+    return Path(base_dir) / name / f'part-{part:05d}.{extension}'
+
+
+def clear_dataset(name, base_dir, parts=True):
+    """Remove previous single-file (and, if parts, part-file) copies of a dataset"""
+    for output_format in FORMATS:
+        single_file = dataset_path(name, base_dir, output_format)
+        if single_file.exists():
+            single_file.unlink()
+    if not parts:
+        return
+    part_dir = Path(base_dir) / name
+    part_dir.mkdir(parents=True, exist_ok=True)
+    for part in part_dir.glob('part-*'):
+        part.unlink()
+
+
+def find_dataset(name, base_dir):
+    """
+    Locate a dataset on disk, preferring Parquet over CSV
+
+    Returns:
+    --------
+    (format, list of files in part order)
+    """
+    for output_format in ('parquet', 'csv'):
+        single_file = dataset_path(name, base_dir, output_format)
+        if single_file.exists():
+            return output_format, [single_file]
+        parts = sorted((Path(base_dir) / name).glob(f'part-*.{output_format}'))
+        if parts:
+            return output_format, parts
+    raise FileNotFoundError(f"No data found for '{name}' in {base_dir}")
+
+
+def _arrow_schema(name, df):
+    """Arrow schema for a frame, applying the dataset's storage types"""
+    import pyarrow as pa
+
+    spec = _schema(name)
+    fields = []
+    for field in pa.Schema.from_pandas(df, preserve_index=False):
+        if field.name in spec['dates']:
+            field = pa.field(field.name, pa.date32())
+        elif field.name in spec['categories']:
+            field = pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+        elif field.name in spec['decimals']:
+            precision, scale = spec['decimals'][field.name]
+            field = pa.field(field.name, pa.decimal128(precision, scale))
+        elif pa.types.is_null(field.type) or field.name in spec['text']:
+            field = pa.field(field.name, pa.string())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def to_arrow(name, df, schema=None):
+    """Convert a frame to an Arrow table with the dataset's storage types"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    schema = schema or _arrow_schema(name, df)
+    columns = []
+    for field in schema:
+        column = pa.array(df[field.name], from_pandas=True)
+        if pa.types.is_decimal(field.type):
+            column = pc.round(column.cast(pa.float64()), field.type.scale)
+        elif pa.types.is_dictionary(field.type) and not pa.types.is_dictionary(column.type):
+            column = column.cast(pa.string()).dictionary_encode()
+        elif pa.types.is_dictionary(column.type) and not pa.types.is_dictionary(field.type):
+            column = column.dictionary_decode()
+        columns.append(column.cast(field.type, safe=False))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _from_arrow(table, categories=True):
+    """Arrow table to pandas: dates as datetime64, decimals as float64"""
+    import pyarrow as pa
+
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        if pa.types.is_decimal(field.type):
+            column = column.cast(pa.float64())
+        elif pa.types.is_dictionary(field.type) and not categories:
+            column = column.cast(pa.string())
+        columns.append(column)
+    table = pa.Table.from_arrays(columns, names=table.column_names)
+    return table.to_pandas(date_as_object=False)
+
+
+class DatasetWriter:
+    """
+    Append DataFrame chunks to one dataset file (single file or one part)
+
+    Only the chunk being written is held in memory. For Parquet the schema is
+    fixed by the first chunk plus DATASET_SCHEMAS, so later chunks with
+    all-null columns still match.
+
+    Example:
+    --------
+    with DatasetWriter('transactions', PATHS['data_raw'], 'parquet', part=0) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    """
+
+    def __init__(self, name, base_dir, output_format='csv', part=None):
+        self.name = name
+        self.output_format = output_format
+        self.path = dataset_path(name, base_dir, output_format, part)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows_written = 0
+        self._parquet_writer = None
+        self._schema = None
+        self._header_written = False
+        if self.path.exists():
+            self.path.unlink()
+
+    def write(self, df):
+        if self.output_format == 'parquet':
+            self._write_parquet(df)
+        else:
+            # Header once, even when the first chunk is empty
+            df.to_csv(self.path, mode='a', header=not self._header_written, index=False)
+            self._header_written = True
+        self.rows_written += len(df)
+
+    def _write_parquet(self, df):
+        import pyarrow.parquet as pq
+
+        if self._parquet_writer is None:
+            self._schema = _arrow_schema(self.name, df)
+            self._parquet_writer = pq.ParquetWriter(self.path, self._schema, compression='zstd')
+        self._parquet_writer.write_table(to_arrow(self.name, df, self._schema))
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        elif self.output_format == 'parquet' and self.rows_written == 0 and self.path.exists():
+            self.path.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_dataset(df, name, base_dir, output_format='csv'):
+    """Write a whole frame as a single-file dataset"""
+    with DatasetWriter(name, base_dir, output_format) as writer:
+        writer.write(df)
+    return writer.path
+
+
+def read_dataset(name, base_dir, columns=None, filters=None, categories=True):
+    """
+    Read a dataset written by DatasetWriter/write_dataset (or a plain CSV)
+
+    Parameters:
+    -----------
+    name : str
+        Dataset name, e.g. 'transactions'
+    base_dir : Path
+        Directory holding name.parquet, name.csv or name/part-*.{parquet,csv}
+    columns : list
+        Columns to read; Parquet reads only these column chunks from disk
+    filters : list
+        Parquet row filters in pyarrow form, e.g. [('order_status', '==', 'Completed')],
+        or a list of such lists to OR them. CSV datasets apply the same
+        filters after parsing.
+    categories : bool
+        Return low-cardinality text columns as pandas categoricals
+
+    Returns:
+    --------
+    DataFrame with date columns as datetime64 and amounts as float64
+    """
+    output_format, files = find_dataset(name, base_dir)
+
+    if output_format == 'parquet':
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset([str(f) for f in files], format='parquet')
+        table = dataset.to_table(columns=columns, filter=_arrow_filter(filters))
+        return _from_arrow(table, categories)
+
+    frames = [_read_csv(name, f, columns, categories) for f in files]
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return _apply_filters(df, filters)
+
+
+def iter_dataset(name, base_dir, chunksize=100000, columns=None, categories=True, filters=None):
+    """
+    Yield a dataset in chunks of at most chunksize rows, part by part
+
+    filters takes the same form as in read_dataset. For Parquet they are
+    checked against row group statistics first, so part files and row groups
+    that cannot match are skipped without being read. Chunks left empty by
+    the filters are not yielded.
+    """
+    output_format, files = find_dataset(name, base_dir)
+
+    for path in files:
+        if output_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.dataset as ds
+
+            dataset = ds.dataset(str(path), format='parquet')
+            for batch in dataset.to_batches(columns=columns, filter=_arrow_filter(filters), batch_size=chunksize):
+                if batch.num_rows:
+                    yield _from_arrow(pa.Table.from_batches([batch]), categories)
+        else:
+            for chunk in _read_csv(name, path, columns, categories, chunksize=chunksize):
+                chunk = _apply_filters(chunk, filters)
+                if len(chunk):
+                    yield chunk
+
+
+def _read_csv(name, path, columns=None, categories=True, chunksize=None):
+    """Parse a CSV file with the dataset's dtypes"""
+    spec = _schema(name)
+    keep = (lambda col: True) if columns is None else (lambda col: col in columns)
+    dtype = {col: 'string' for col in spec['text'] if keep(col)}
+    dtype.update({col: 'float64' for col in spec['decimals'] if keep(col)})
+    if categories:
+        dtype.update({col: 'category' for col in spec['categories'] if keep(col)})
+    parse_dates = [col for col in spec['dates'] if keep(col)]
+    return pd.read_csv(path, usecols=columns, dtype=dtype or None,
+                       parse_dates=parse_dates or None, chunksize=chunksize)
+
+
+def _length(values):
+    """Character lengths of a text column, or of a pyarrow field expression"""
+    if isinstance(values, pd.Series):
+        return values.str.len()
+    import pyarrow.compute as pc
+    return pc.utf8_length(values)
+
+
+# 'len==' / 'len>' compare text lengths, so zero-padded ids that outgrew
+# their padding (RET1000000 after RET999999) can be ordered numerically
+_FILTER_OPS = {
+    '==': lambda s, v: s == v, '!=': lambda s, v: s != v,
+    '<': lambda s, v: s < v, '<=': lambda s, v: s <= v,
+    '>': lambda s, v: s > v, '>=': lambda s, v: s >= v,
+    'in': lambda s, v: s.isin(v),
+    'len==': lambda s, v: _length(s) == v, 'len>': lambda s, v: _length(s) > v
+}
+
+
+def _filter_groups(filters):
+    """Filters as a list of AND-ed groups that are OR-ed together"""
+    return filters if isinstance(filters[0], list) else [filters]
+
+
+def _arrow_filter(filters):
+    """[(column, op, value), ...] (or a list of them, OR-ed) to a pyarrow dataset expression"""
+    if not filters:
+        return None
+    import pyarrow.dataset as ds
+
+    expression = None
+    for group in _filter_groups(filters):
+        conjunction = None
+        for column, op, value in group:
+            field = ds.field(column)
+            term = field.isin(value) if op == 'in' else _FILTER_OPS[op](field, value)
+            conjunction = term if conjunction is None else conjunction & term
+        expression = conjunction if expression is None else expression | conjunction
+    return expression
+
+
+def _apply_filters(df, filters):
+    """Apply [(column, op, value), ...] filters (or a list of them, OR-ed) to a parsed frame"""
+    if not filters:
+        return df
+    mask = np.zeros(len(df), dtype=bool)
+    for group in _filter_groups(filters):
+        conjunction = np.ones(len(df), dtype=bool)
+        for column, op, value in group:
+            conjunction &= _FILTER_OPS[op](df[column], value).to_numpy()
+        mask |= conjunction
+    return df[mask].reset_index(drop=True)
+
+
+def convert_dataset(name, base_dir, output_format='parquet', chunksize=500000):
+    """Rewrite a dataset in another format (e.g. a CSV export as Parquet)"""
+    source_format, _ = find_dataset(name, base_dir)
+    if source_format == output_format:
+        return dataset_path(name, base_dir, output_format)
+    with DatasetWriter(name, base_dir, output_format) as writer:
+        for chunk in iter_dataset(name, base_dir, chunksize):
+            writer.write(chunk)
+    return writer.path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert datasets between CSV and Parquet")
+    parser.add_argument('base_dir', help="Directory holding the datasets")
+    parser.add_argument('names', nargs='+', help="Dataset names, e.g. sales_for_cloud")
+    parser.add_argument('--format', choices=FORMATS, default='parquet')
+    args = parser.parse_args()
+
+    for dataset_name in args.names:
+        print(f" Converted {dataset_name} -> {convert_dataset(dataset_name, args.base_dir, args.format)}")
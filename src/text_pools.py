@@ -0,0 +1,116 @@
+"""
+Pre-generated Faker value pools for synthetic data
+Faker is slow per call, so each text field gets a vocabulary drawn once,
+cached to disk, and sampled with NumPy index draws. Samples come back as
+pandas Categoricals (codes into the pool), which keeps generation and
+the resulting frames/files cheap.
+"""
+
+import json
+import pandas as pd
+import numpy as np
+from faker import Faker
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from config import PATHS
+
+# Faker calls per field; duplicates are dropped, so small vocabularies (states) shrink
+DEFAULT_POOL_SIZE = 10000
+
+# Text fields and how to draw one value of each from Faker
+POOL_FIELDS = {
+    'first_name': lambda fake: fake.first_name(),
+    'last_name': lambda fake: fake.last_name(),
+    'email_domain': lambda fake: fake.free_email_domain(),
+    'phone_number': lambda fake: fake.phone_number(),
+    'state': lambda fake: fake.state(),
+    'city': lambda fake: fake.city(),
+    'zip_code': lambda fake: fake.zipcode(),
+    'address': lambda fake: fake.address().replace('\n', ', '),
+    'sentence': lambda fake: fake.sentence(),
+    'catch_phrase': lambda fake: fake.catch_phrase()[:50],
+    'word': lambda fake: fake.word().capitalize(),
+    'company': lambda fake: fake.company()[:30]
+}
+
+
+class TextPools:
+    """
+    Vocabularies of Faker values, sampled by index
+
+    Example:
+    --------
+    pools = TextPools.load()
+    cities = pools.sample('city', 1000, rng)
+    phones = pools.sample('phone_number', 1000, rng, missing_rate=0.10)
+    """
+
+    def __init__(self, pools):
+        self.pools = {field: np.asarray(values, dtype=object) for field, values in pools.items()}
+
+    @classmethod
+    def build(cls, size=DEFAULT_POOL_SIZE, seed=42):
+        """Draw every pool from a seeded Faker instance"""
+        fake = Faker()
+        fake.seed_instance(seed)
+        pools = {}
+        for field, draw in POOL_FIELDS.items():
+            pools[field] = pd.unique(pd.Series([draw(fake) for _ in range(size)])).tolist()
+        return cls(pools)
+
+    @classmethod
+    def load(cls, size=DEFAULT_POOL_SIZE, seed=42, cache_dir=None):
+        """
+        Load pools from the disk cache, building and caching them on a miss
+
+        Parameters:
+        -----------
+        size : int
+            Faker draws per field
+        seed : int
+            Faker seed; the cache is keyed by seed and size
+        cache_dir : Path
+            Cache directory (defaults to PATHS['data_cache'])
+        """
+        cache_dir = Path(cache_dir or PATHS['data_cache'])
+        cache_path = cache_dir / f'text_pools_seed{seed}_n{size}.json'
+
+        if cache_path.exists():
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if set(cached) == set(POOL_FIELDS):
+                return cls(cached)
+
+        pools = cls.build(size, seed)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump({field: values.tolist() for field, values in pools.pools.items()}, f)
+        return pools
+
+    def sample(self, field, n, rng, missing_rate=0.0):
+        """
+        Draw n values of a field as a Categorical over the pool
+
+        Parameters:
+        -----------
+        field : str
+            Pool name (see POOL_FIELDS)
+        n : int
+            Number of values
+        rng : numpy.random.Generator
+            Random generator used for the index draws
+        missing_rate : float
+            Share of values left missing
+
+        Returns:
+        --------
+        pandas.Categorical
+        """
+        pool = self.pools[field]
+        codes = rng.integers(0, len(pool), size=n)
+        if missing_rate > 0:
+            codes[rng.random(n) < missing_rate] = -1
+        return pd.Categorical.from_codes(codes, categories=pool)
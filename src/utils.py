@@ -6,8 +6,143 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Score bins per RFM dimension (quantiles; 5 = best)
+RFM_BINS = 5
+
+# Segment rules, checked in order (first match wins): segment name and
+# inclusive (min, max) bounds on score columns, None meaning unbounded.
+# The defaults classify rfm_score for RFM_BINS = 5 (scores 3-15).
+RFM_SEGMENT_RULES = [
+    ('Champions', {'rfm_score': (13, None)}),
+    ('Loyal Customers', {'rfm_score': (11, None)}),
+    ('Potential Loyalist', {'rfm_score': (9, None)}),
+    ('At Risk', {'rfm_score': (7, None)}),
+    ('Needs Attention', {'rfm_score': (5, None)}),
+    ('Lost', {})
+]
+
+
+def quantile_edges(values, bins):
+    """Inner quantile edges splitting values into `bins` equal-frequency bins"""
+    return np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]) if len(values) else np.zeros(bins - 1)
+
+
+def quantile_scores(values, edges):
+    """
+    Bin numbers 1..len(edges)+1 for values, bins closed on the right like pd.qcut
+    
+    Repeated edges simply leave bins empty instead of raising.
+    """
+    return np.searchsorted(edges, values, side='left').astype(np.int8) + 1
+
+
+def segment_rfm(rfm, segment_rules=RFM_SEGMENT_RULES, default='Unclassified'):
+    """
+    Assign segments from a rule table with one vectorized np.select
+    
+    Parameters:
+    -----------
+    rfm : DataFrame
+        Scored RFM table (r_score, f_score, m_score, rfm_score)
+    segment_rules : list of (segment, {column: (min, max)})
+        Checked in order; bounds are inclusive, None is unbounded
+    default : str
+        Segment for customers no rule matches
+    
+    Returns:
+    --------
+    numpy array of segment names
+    """
+    conditions = []
+    for _, bounds in segment_rules:
+        condition = np.ones(len(rfm), dtype=bool)
+        for column, (low, high) in bounds.items():
+            values = rfm[column].to_numpy()
+            if low is not None:
+                condition &= values >= low
+            if high is not None:
+                condition &= values <= high
+        conditions.append(condition)
+    return np.select(conditions, [segment for segment, _ in segment_rules], default=default)
+
+
+def score_rfm(rfm, bins=RFM_BINS, segment_rules=RFM_SEGMENT_RULES, edges=None):
+    """
+    Add r/f/m scores (1..bins, higher is better), rfm_score and segment
+    
+    Parameters:
+    -----------
+    rfm : DataFrame
+        One row per customer with recency, frequency and monetary
+    bins : int
+        Quantile bins per dimension
+    segment_rules : list
+        Rule table (see RFM_SEGMENT_RULES)
+    edges : dict
+        Precomputed inner edges for 'recency' and 'monetary' (e.g. from a
+        quantile sketch); computed from rfm when omitted. Frequency is
+        always binned by rank, so ties split evenly across bins.
+    
+    Returns:
+    --------
+    DataFrame (rfm with score columns added)
+    """
+    recency = rfm['recency'].to_numpy()
+    frequency = rfm['frequency'].to_numpy()
+    monetary = rfm['monetary'].to_numpy()
+    
+    if edges is None:
+        edges = {'recency': quantile_edges(recency, bins), 'monetary': quantile_edges(monetary, bins)}
+    
+    # Rank frequency (ties broken by order) so repeated counts still fill every bin
+    frequency_rank = np.empty(len(frequency), dtype=np.float64)
+    frequency_rank[np.argsort(frequency, kind='stable')] = np.arange(1, len(frequency) + 1)
+    
+    # Recent customers score highest
+    rfm['r_score'] = (bins + 1 - quantile_scores(recency, edges['recency'])).astype(np.int8)
+    rfm['f_score'] = quantile_scores(frequency_rank, quantile_edges(frequency_rank, bins))
+    rfm['m_score'] = quantile_scores(monetary, edges['monetary'])
+    rfm['rfm_score'] = rfm['r_score'].astype(np.int16) + rfm['f_score'] + rfm['m_score']
+    rfm['segment'] = segment_rfm(rfm, segment_rules)
+    return rfm
+
+
+def day_number(date):
+    """Days since 1970-01-01 for a date-like value"""
+    return int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64))
+
+
+def rfm_totals(df, customer_col='customer_id', date_col='transaction_date', amount_col='total_amount'):
+    """
+    Per-customer last purchase day, purchase count and amount sum
+    
+    Returns:
+    --------
+    DataFrame with customer_col, last_day (int days since epoch), frequency
+    and monetary, sorted by customer
+    """
+    # Integer day numbers and customer codes; aggregations stay in NumPy/Cython
+    days = pd.to_datetime(df[date_col]).to_numpy().astype('datetime64[D]').astype(np.int64)
+    codes, customers = pd.factorize(df[customer_col], sort=True)
+    valid = codes >= 0
+    
+    grouped = pd.DataFrame({
+        'day': days[valid],
+        'amount': df[amount_col].to_numpy()[valid]
+    }).groupby(codes[valid], sort=True)
+    last_day = grouped['day'].max()
+    
+    return pd.DataFrame({
+        customer_col: customers.take(last_day.index.to_numpy()),
+        'last_day': last_day.to_numpy(),
+        'frequency': grouped.size().to_numpy().astype(np.int32),
+        'monetary': grouped['amount'].sum().to_numpy()
+    })
+
+
 def calculate_rfm(df, customer_col='customer_id', date_col='transaction_date', 
-                  amount_col='total_amount', analysis_date=None):
+                  amount_col='total_amount', analysis_date=None, bins=RFM_BINS,
+                  segment_rules=RFM_SEGMENT_RULES):
     """
     Calculate RFM (Recency, Frequency, Monetary) scores for customers
     
@@ -23,54 +158,30 @@ def calculate_rfm(df, customer_col='customer_id', date_col='transaction_date',
         Transaction amount column name
     analysis_date : datetime
         Reference date for recency calculation (defaults to max date + 1 day)
+    bins : int
+        Quantile bins per score (5 gives scores 1-5, 5 being best)
+    segment_rules : list
+        Segment rule table (see RFM_SEGMENT_RULES)
     
     Returns:
     --------
     DataFrame with RFM scores
     """
-    if analysis_date is None:
-        analysis_date = df[date_col].max() + pd.Timedelta(days=1)
+    totals = rfm_totals(df, customer_col, date_col, amount_col)
     
-    rfm = df.groupby(customer_col).agg({
-        date_col: lambda x: (analysis_date - x.max()).days,  # Recency
-        customer_col: 'count',  # Frequency
-        amount_col: 'sum'  # Monetary
+    if analysis_date is None:
+        analysis_day = totals['last_day'].max() + 1
+    else:
+        analysis_day = day_number(analysis_date)
+    
+    rfm = pd.DataFrame({
+        customer_col: totals[customer_col],
+        'recency': (analysis_day - totals['last_day']).astype(np.int32),
+        'frequency': totals['frequency'],
+        'monetary': totals['monetary']
     })
     
-    rfm.columns = ['recency', 'frequency', 'monetary']
-    rfm = rfm.reset_index()
-    
-    # Calculate RFM scores (1-5 scale, 5 being best)
-    rfm['r_score'] = pd.qcut(rfm['recency'], 5, labels=[5, 4, 3, 2, 1], duplicates='drop')
-    rfm['f_score'] = pd.qcut(rfm['frequency'].rank(method='first'), 5, labels=[1, 2, 3, 4, 5], duplicates='drop')
-    rfm['m_score'] = pd.qcut(rfm['monetary'], 5, labels=[1, 2, 3, 4, 5], duplicates='drop')
-    
-    # Convert to numeric
-    rfm['r_score'] = rfm['r_score'].astype(int)
-    rfm['f_score'] = rfm['f_score'].astype(int)
-    rfm['m_score'] = rfm['m_score'].astype(int)
-    
-    # Calculate RFM score
-    rfm['rfm_score'] = rfm['r_score'] + rfm['f_score'] + rfm['m_score']
-    
-    # Segment customers
-    def segment_customer(row):
-        if row['rfm_score'] >= 13:
-            return 'Champions'
-        elif row['rfm_score'] >= 11:
-            return 'Loyal Customers'
-        elif row['rfm_score'] >= 9:
-            return 'Potential Loyalist'
-        elif row['rfm_score'] >= 7:
-            return 'At Risk'
-        elif row['rfm_score'] >= 5:
-            return 'Needs Attention'
-        else:
-            return 'Lost'
-    
-    rfm['segment'] = rfm.apply(segment_customer, axis=1)
-    
-    return rfm
+    return score_rfm(rfm, bins, segment_rules)
 
 
 def calculate_customer_ltv(df, customer_col='customer_id', amount_col='total_amount',
@@ -120,51 +231,115 @@ def calculate_customer_ltv(df, customer_col='customer_id', amount_col='total_amo
     return customer_metrics
 
 
-def cohort_analysis(df, customer_col='customer_id', date_col='transaction_date'):
+# Cohort period frequencies: label used for the cohort index
+COHORT_FREQUENCIES = {'W': 'week', 'M': 'month', 'Q': 'quarter'}
+
+
+def period_numbers(dates, freq='M'):
+    """
+    Integer period index of each date: consecutive periods differ by 1
+    
+    'M' counts months since 1970-01 (equivalent to year*12 + month), 'Q'
+    quarters since 1970Q1 and 'W' Monday-starting weeks since 1969-12-29.
+    """
+    if freq not in COHORT_FREQUENCIES:
+        raise ValueError(f"freq must be one of {list(COHORT_FREQUENCIES)}, got {freq!r}")
+    dates = pd.to_datetime(dates).to_numpy()
+    if freq == 'W':
+        # 1970-01-01 was a Thursday: shift so weeks start on Monday
+        return (dates.astype('datetime64[D]').astype(np.int64) + 3) // 7
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    return months if freq == 'M' else months // 3
+
+
+def period_labels(numbers, freq='M'):
+    """pandas PeriodIndex for integer period numbers from period_numbers"""
+    numbers = np.asarray(numbers, dtype=np.int64)
+    if freq == 'W':
+        starts = (numbers * 7 - 3).astype('datetime64[D]')
+    else:
+        starts = (numbers * (3 if freq == 'Q' else 1)).astype('datetime64[M]')
+    return pd.DatetimeIndex(starts).to_period(freq)
+
+
+def cohort_counts(df, customer_col='customer_id', date_col='transaction_date', freq='M'):
+    """
+    Active customers per (cohort, periods since first purchase)
+    
+    Works on NumPy arrays taken from the frame; df is neither copied nor
+    modified.
+    
+    Returns:
+    --------
+    (counts, first_cohort)
+        counts: int64 array [cohort - first_cohort, period offset]; column 0
+        holds the cohort sizes. first_cohort: period number of row 0.
+    """
+    periods = period_numbers(df[date_col], freq)
+    codes, _ = pd.factorize(df[customer_col])
+    valid = codes >= 0
+    codes, periods = codes[valid], periods[valid]
+    if len(codes) == 0:
+        return np.zeros((0, 0), dtype=np.int64), 0
+    
+    # First purchase period per customer, then each transaction's offset from it
+    cohort = pd.Series(periods).groupby(codes).min().to_numpy()
+    offsets = periods - cohort[codes]
+    width = int(offsets.max()) + 1
+    
+    # Unique customer-period pairs, counted into a dense cohort x offset grid
+    pairs = np.unique(codes.astype(np.int64) * width + offsets)
+    pair_customers, pair_offsets = pairs // width, pairs % width
+    first_cohort = int(cohort.min())
+    height = int(cohort.max()) - first_cohort + 1
+    cells = (cohort[pair_customers] - first_cohort) * width + pair_offsets
+    counts = np.bincount(cells, minlength=height * width).reshape(height, width)
+    return counts, first_cohort
+
+
+def retention_matrix(counts, first_cohort, freq='M'):
+    """
+    Retention rates (%) from cohort_counts output
+    
+    Rows are cohorts with customers (PeriodIndex), columns are period offsets
+    seen at least once; cells without returning customers are NaN.
+    """
+    name = COHORT_FREQUENCIES[freq]
+    if counts.size == 0:
+        return pd.DataFrame(index=pd.PeriodIndex([], freq=freq, name=f'cohort_{name}'))
+    
+    rows = np.flatnonzero(counts[:, 0])
+    columns = np.flatnonzero(counts.any(axis=0))
+    counts = counts[np.ix_(rows, columns)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(counts > 0, counts / counts[:, :1] * 100, np.nan)
+    
+    return pd.DataFrame(rates,
+                        index=period_labels(rows + first_cohort, freq).rename(f'cohort_{name}'),
+                        columns=pd.Index(columns, name='period_number'))
+
+
+def cohort_analysis(df, customer_col='customer_id', date_col='transaction_date', freq='M'):
     """
     Perform cohort analysis for customer retention
     
     Parameters:
     -----------
     df : DataFrame
-        Transaction data
+        Transaction data (not modified)
     customer_col : str
         Customer ID column name
     date_col : str
         Transaction date column name
+    freq : str
+        Cohort period: 'M' (monthly), 'W' (weekly) or 'Q' (quarterly)
     
     Returns:
     --------
     DataFrame with cohort retention rates
     """
-    # Create cohort month (first purchase month)
-    df[date_col] = pd.to_datetime(df[date_col])
-    df['order_month'] = df[date_col].dt.to_period('M')
-    
-    cohort_data = df.groupby(customer_col).agg({
-        date_col: 'min'
-    }).reset_index()
-    
-    cohort_data.columns = [customer_col, 'cohort_date']
-    cohort_data['cohort_month'] = cohort_data['cohort_date'].dt.to_period('M')
-    
-    # Merge cohort data with transactions
-    df_cohort = df.merge(cohort_data, on=customer_col)
-    
-    # Calculate period number
-    df_cohort['period_number'] = (df_cohort['order_month'] - df_cohort['cohort_month']).apply(lambda x: x.n)
-    
-    # Cohort size
-    cohort_sizes = df_cohort.groupby('cohort_month')[customer_col].nunique()
-    
-    # Retention matrix
-    cohort_matrix = df_cohort.groupby(['cohort_month', 'period_number'])[customer_col].nunique().reset_index()
-    cohort_matrix = cohort_matrix.pivot(index='cohort_month', columns='period_number', values=customer_col)
-    
-    # Calculate retention rates
-    cohort_retention = cohort_matrix.divide(cohort_sizes, axis=0) * 100
-    
-    return cohort_retention
+    counts, first_cohort = cohort_counts(df, customer_col, date_col, freq)
+    return retention_matrix(counts, first_cohort, freq)
 
 
 def calculate_churn_features(df, customer_col='customer_id', date_col='transaction_date',
@@ -0,0 +1,112 @@
+"""
+Shared fixtures for the test suite
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+import src.cohort_store as cohort_store
+import src.rfm_store as rfm_store
+
+
+def make_sales(n=20000, customers=2000, days=365, seed=42):
+    """Synthetic completed sales: sales_key, customer_id, transaction_date, total_amount"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'sales_key': np.arange(1, n + 1),
+        'customer_id': rng.choice([f'CUST{i:06d}' for i in range(customers)], n),
+        'transaction_date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, days, n), unit='D'),
+        'total_amount': rng.uniform(5, 500, n).round(2)
+    })
+
+
+@pytest.fixture
+def sales():
+    return make_sales()
+
+
+@pytest.fixture
+def dated_sales(sales):
+    # sales_key follows load order, which follows transaction dates
+    sales = sales.sort_values('transaction_date', kind='stable').reset_index(drop=True)
+    sales['sales_key'] = range(1, len(sales) + 1)
+    return sales
+
+
+class FakeSales:
+    """Stands in for fact_sales: the rows loaded so far, the table's identity and the rewrite log"""
+
+    def __init__(self, df, table_id='1'):
+        self.df = df
+        self.table_id = table_id
+        # customer_ids logged in etl_rewritten_customers, rewrite_id = position + 1
+        self.rewrites = []
+
+    def table_state(self, engine=None):
+        return self.table_id, int(self.df['sales_key'].max()) if len(self.df) else 0
+
+    def load_sales(self, columns, status='Completed', filters=None, engine=None, after_sales_key=None, **kwargs):
+        rows = self.df[self.df['sales_key'] > (after_sales_key or 0)]
+        if status is not None and 'order_status' in rows:
+            rows = rows[rows['order_status'] == status]
+        for column, value in (filters or {}).items():
+            rows = rows[rows[column].isin(value if isinstance(value, (list, tuple, set)) else [value])]
+        return rows[columns].reset_index(drop=True)
+
+    def rewritten_customers(self, after_rewrite_id=0, engine=None):
+        return sorted(set(self.rewrites[after_rewrite_id:])), max(len(self.rewrites), after_rewrite_id)
+
+    def rewrite(self, sales_keys, **values):
+        """Update existing rows in place (same sales_key) and log their customers, as a merge does"""
+        df = self.df.copy()
+        rows = df['sales_key'].isin(sales_keys)
+        for column, value in values.items():
+            df.loc[rows, column] = value
+        self.df = df
+        self.rewrites.extend(df.loc[rows, 'customer_id'])
+
+
+@pytest.fixture
+def fake_sales(sales):
+    """Empty fake fact_sales; patch its table_state/load_sales into the module under test"""
+    return FakeSales(sales.iloc[:0])
+
+
+class StoreCase:
+    """A state store kind (RFMStore, or CohortStore at a frequency) under the shared refresh tests"""
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def new(self):
+        return rfm_store.RFMStore() if self.kind == 'rfm' else cohort_store.CohortStore(self.kind[-1])
+
+    def load(self, state_dir):
+        if self.kind == 'rfm':
+            return rfm_store.RFMStore.load(state_dir)
+        return cohort_store.CohortStore.load(self.kind[-1], state_dir)
+
+    def result(self, store):
+        return store.scores() if self.kind == 'rfm' else store.retention()
+
+    def expected(self, df):
+        """Result of a store built from df in one update"""
+        store = self.new()
+        store.update(df.sort_values('transaction_date', kind='stable'))
+        return self.result(store)
+
+
+@pytest.fixture(params=['rfm', 'cohort-M', 'cohort-W'])
+def state_store(request, monkeypatch, fake_sales):
+    """A StoreCase whose module reads fake_sales instead of the database"""
+    module = rfm_store if request.param == 'rfm' else cohort_store
+    monkeypatch.setattr(module, 'load_sales', fake_sales.load_sales)
+    monkeypatch.setattr(module, 'sales_table_state', fake_sales.table_state)
+    monkeypatch.setattr(module, 'rewritten_customers', fake_sales.rewritten_customers)
+    return StoreCase(request.param)
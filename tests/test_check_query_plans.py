@@ -0,0 +1,40 @@
+"""
+Tests for plan outlines in the query plan checker (database/check_query_plans.py)
+"""
+
+from database.check_query_plans import plan_shape
+
+
+def scan(partition, index=None):
+    node = {'Node Type': 'Index Scan' if index else 'Seq Scan', 'Relation Name': partition}
+    if index:
+        node['Index Name'] = index
+    return node
+
+
+def test_plan_shape_collapses_partitions():
+    plan = {
+        'Node Type': 'Aggregate', 'Strategy': 'Hashed',
+        'Plans': [{
+            'Node Type': 'Append',
+            'Plans': [scan('fact_sales_2024_01', 'fact_sales_2024_01_transaction_date_idx'),
+                      scan('fact_sales_2024_02', 'fact_sales_2024_02_transaction_date_idx'),
+                      scan('fact_sales_2024_03')]
+        }]
+    }
+    assert plan_shape(plan) == [
+        'Hashed Aggregate',
+        '  Append',
+        '    Index Scan using fact_sales_*_transaction_date_idx on fact_sales_*',
+        '    Seq Scan on fact_sales_*'
+    ]
+
+
+def test_plan_shape_keeps_other_relations():
+    plan = {'Node Type': 'Hash Join', 'Join Type': 'Inner',
+            'Plans': [scan('fact_sales_2024_01'), scan('dim_customers', 'dim_customers_pkey')]}
+    assert plan_shape(plan) == [
+        'Inner Hash Join',
+        '  Seq Scan on fact_sales_*',
+        '  Index Scan using dim_customers_pkey on dim_customers'
+    ]
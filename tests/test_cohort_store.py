@@ -0,0 +1,53 @@
+"""
+Tests for the incremental cohort retention state (src/cohort_store.py)
+"""
+
+import pandas as pd
+import pytest
+
+import src.cohort_store as cohort_store
+from src.cohort_store import CohortStore
+from src.utils import cohort_analysis
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def fake_db(monkeypatch, fake_sales):
+    monkeypatch.setattr(cohort_store, 'load_sales', fake_sales.load_sales)
+    monkeypatch.setattr(cohort_store, 'sales_table_state', fake_sales.table_state)
+    monkeypatch.setattr(cohort_store, 'rewritten_customers', fake_sales.rewritten_customers)
+    return fake_sales
+
+
+@pytest.mark.parametrize('freq', ['M', 'W', 'Q'])
+def test_chunked_updates_match_cohort_analysis(dated_sales, freq):
+    store = CohortStore(freq)
+    for start in range(0, len(dated_sales), 2500):
+        store.update(dated_sales.iloc[start:start + 2500])
+    pd.testing.assert_frame_equal(store.retention(), cohort_analysis(dated_sales, freq=freq))
+
+
+def test_refresh_within_a_load_orders_by_date(fake_db, sales):
+    # Unordered sales in one refresh never close a period that still has rows
+    fake_db.df = sales
+    store = CohortStore()
+    store.refresh()
+    pd.testing.assert_frame_equal(store.retention(), cohort_analysis(sales))
+
+
+def test_sales_in_closed_periods_are_skipped(dated_sales):
+    store = CohortStore()
+    store.update(dated_sales)
+    before = store.retention()
+    store.update(dated_sales.iloc[:100].assign(customer_id='LATE'))
+    pd.testing.assert_frame_equal(store.retention(), before)
+
+
+def test_empty_store():
+    assert len(CohortStore().retention()) == 0
+
+
+def test_unknown_frequency():
+    with pytest.raises(ValueError):
+        CohortStore('D')
@@ -0,0 +1,65 @@
+"""
+Tests for cohort retention (src/utils.py cohort_analysis)
+"""
+
+import pandas as pd
+import pytest
+
+from src.utils import cohort_analysis
+
+
+def reference_cohort_analysis(df, customer_col='customer_id', date_col='transaction_date', freq='M'):
+    """The original Period/merge/apply implementation of cohort_analysis (monthly), generalized to freq"""
+    name = {'W': 'week', 'M': 'month', 'Q': 'quarter'}[freq]
+    df = df.copy()
+    df[date_col] = pd.to_datetime(df[date_col])
+    df['order_period'] = df[date_col].dt.to_period(freq)
+
+    cohort_data = df.groupby(customer_col).agg({date_col: 'min'}).reset_index()
+    cohort_data.columns = [customer_col, 'cohort_date']
+    cohort_data[f'cohort_{name}'] = cohort_data['cohort_date'].dt.to_period(freq)
+
+    df_cohort = df.merge(cohort_data, on=customer_col)
+    df_cohort['period_number'] = (df_cohort['order_period'] - df_cohort[f'cohort_{name}']).apply(lambda x: x.n)
+
+    cohort_sizes = df_cohort.groupby(f'cohort_{name}')[customer_col].nunique()
+    cohort_matrix = df_cohort.groupby([f'cohort_{name}', 'period_number'])[customer_col].nunique().reset_index()
+    cohort_matrix = cohort_matrix.pivot(index=f'cohort_{name}', columns='period_number', values=customer_col)
+    return cohort_matrix.divide(cohort_sizes, axis=0) * 100
+
+
+def assert_same_retention(actual, expected):
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_index_type=False,
+                                  check_column_type=False)
+
+
+@pytest.mark.parametrize('freq', ['M', 'W', 'Q'])
+def test_matches_reference(sales, freq):
+    assert_same_retention(cohort_analysis(sales, freq=freq), reference_cohort_analysis(sales, freq=freq))
+
+
+def test_sparse_cohorts(sales):
+    # Gaps between cohorts and periods without returning customers stay out / NaN
+    sparse = sales[sales['transaction_date'].dt.month.isin([1, 2, 5, 11])]
+    assert_same_retention(cohort_analysis(sparse), reference_cohort_analysis(sparse))
+
+
+def test_input_is_not_modified(sales):
+    before = sales.copy()
+    cohort_analysis(sales)
+    pd.testing.assert_frame_equal(sales, before)
+
+
+def test_first_period_is_full_retention(sales):
+    retention = cohort_analysis(sales)
+    assert (retention[0] == 100).all()
+    assert retention.index.name == 'cohort_month'
+
+
+def test_empty_frame(sales):
+    assert len(cohort_analysis(sales.head(0))) == 0
+
+
+def test_unknown_frequency(sales):
+    with pytest.raises(ValueError):
+        cohort_analysis(sales, freq='D')
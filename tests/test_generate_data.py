@@ -0,0 +1,109 @@
+"""
+Tests for the synthetic data generator (data/generate_data.py)
+"""
+
+import importlib.util
+import sys
+from argparse import Namespace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import DATA_CONFIG, PATHS
+from src.storage import read_dataset
+
+pytest.importorskip('faker')
+
+spec = importlib.util.spec_from_file_location(
+    'generate_data', Path(__file__).parent.parent / 'data' / 'generate_data.py')
+generate_data = importlib.util.module_from_spec(spec)
+sys.modules['generate_data'] = generate_data  # worker processes unpickle shard tasks by module name
+spec.loader.exec_module(generate_data)
+
+
+@pytest.fixture(scope='module')
+def pools_dir(tmp_path_factory):
+    """Text pool cache shared by the module's runs (drawing the pools is the slow part)"""
+    return tmp_path_factory.mktemp('cache')
+
+
+@pytest.fixture
+def raw_dir(monkeypatch, tmp_path, pools_dir):
+    """Small run written under tmp_path (many shards, so most draw no returns per appended day)"""
+    monkeypatch.setitem(PATHS, 'data_raw', tmp_path)
+    monkeypatch.setitem(PATHS, 'data_cache', pools_dir)
+    monkeypatch.setattr(generate_data, 'CUSTOMER_BLOCK_SIZE', 25)
+    monkeypatch.setitem(DATA_CONFIG, 'num_customers', 400)
+    monkeypatch.setitem(DATA_CONFIG, 'num_products', 40)
+    monkeypatch.setitem(DATA_CONFIG, 'num_transactions', 3000)
+    # Customers register 1-3 years before today; end the window at today so they all buy
+    today = datetime.now()
+    monkeypatch.setitem(DATA_CONFIG, 'start_date', f"{today - timedelta(days=2 * 365):%Y-%m-%d}")
+    monkeypatch.setitem(DATA_CONFIG, 'end_date', f"{today:%Y-%m-%d}")
+    return tmp_path
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_append_days_keeps_returns_readable(raw_dir, output_format):
+    args = Namespace(workers=1, seed=7, chunk_size=500, format=output_format, append_days=0)
+    assert generate_data.main(args)
+    first_returns = len(read_dataset('returns', raw_dir))
+
+    for _ in range(2):
+        args.append_days = 10
+        assert generate_data.main(args)
+
+    state = generate_data.load_generation_state()
+    returns = read_dataset('returns', raw_dir, categories=False)
+    transactions = read_dataset('transactions', raw_dir, columns=['transaction_id'], categories=False)
+    assert len(returns) == state['next_return_number'] - 1
+    assert len(returns) >= first_returns
+    assert returns['return_id'].is_unique
+    assert returns['refund_amount'].dtype == np.float64
+    assert returns['transaction_id'].isin(transactions['transaction_id']).all()
+    assert transactions['transaction_id'].is_unique
+    assert len(transactions) == state['next_transaction_number'] - 1
+
+
+def test_same_data_whatever_the_worker_count(raw_dir, monkeypatch, tmp_path_factory):
+    args = Namespace(workers=1, seed=7, chunk_size=500, format='parquet', append_days=0)
+    assert generate_data.main(args)
+    single = read_dataset('transactions', raw_dir, categories=False)
+
+    monkeypatch.setitem(PATHS, 'data_raw', tmp_path_factory.mktemp('raw_workers'))
+    args.workers = 2
+    assert generate_data.main(args)
+    pd.testing.assert_frame_equal(read_dataset('transactions', PATHS['data_raw'], categories=False), single)
+
+
+def test_shard_rngs_do_not_depend_on_worker_order():
+    # A worker draws a shard's values from its index alone, whatever ran before it
+    in_order = [[rng.random(3) for rng in generate_data._shard_rngs(42, shard)] for shard in range(4)]
+    for shard in [3, 1, 0, 2]:
+        for expected, rng in zip(in_order[shard], generate_data._shard_rngs(42, shard)):
+            np.testing.assert_array_equal(rng.random(3), expected)
+
+    # ...which are the children SeedSequence(seed).spawn() hands out
+    shard_seq = np.random.SeedSequence(42).spawn(4)[2]
+    expected = [np.random.default_rng(child).random(3) for child in shard_seq.spawn(3)]
+    np.testing.assert_array_equal(np.array(in_order[2]), np.array(expected))
+    assert not np.array_equal(in_order[0][0], in_order[1][0])
+
+
+def test_basket_products_are_distinct():
+    rng = np.random.default_rng(0)
+    basket_sizes = rng.integers(1, 8, size=5000)
+    basket_id, product_idx = generate_data._draw_basket_products(basket_sizes, 10, rng)
+
+    assert np.bincount(basket_id).tolist() == basket_sizes.tolist()
+    assert product_idx.min() >= 0 and product_idx.max() < 10
+    pairs = np.stack([basket_id, product_idx], axis=1)
+    assert len(np.unique(pairs, axis=0)) == len(pairs)
+
+    # Baskets larger than the catalogue are capped at one of each product
+    basket_id, product_idx = generate_data._draw_basket_products(np.array([15, 3]), 10, rng)
+    assert np.bincount(basket_id).tolist() == [10, 3]
+    assert sorted(product_idx[basket_id == 0]) == list(range(10))
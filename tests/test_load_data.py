@@ -0,0 +1,74 @@
+"""
+Tests for the pure-pandas helpers of the loader (database/load_data.py)
+"""
+
+import pandas as pd
+import pytest
+
+import database.load_data as load_data
+from database.load_data import high_water_mark_filters, latest_id, normalize_geography, resolve_geography_keys
+from src.storage import read_dataset, write_dataset
+
+
+@pytest.fixture
+def returns():
+    return pd.DataFrame({
+        'return_id': ['RET000001', 'RET000002', 'RET999999', 'RET1000000', 'RET000003'],
+        'return_date': pd.to_datetime(['2024-01-01', '2024-03-01', '2024-03-09', '2024-03-10', '2024-01-02']),
+        'refund_amount': [10.0, 20.0, 30.0, 40.0, 50.0]
+    })
+
+
+def test_no_filters_before_first_load():
+    assert high_water_mark_filters((None, None), 'return_date', 'return_id') is None
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_high_water_mark_filters(monkeypatch, tmp_path, returns, output_format):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setitem(load_data.LOAD_CONFIG, 'lookback_days', 3)
+    write_dataset(returns, 'returns', tmp_path, output_format)
+
+    # Rows dated in the lookback window, or numbered past the mark (RET1000000 follows RET999999)
+    filters = high_water_mark_filters(('2024-03-10', 'RET000002'), 'return_date', 'return_id')
+    df = read_dataset('returns', tmp_path, filters=filters, categories=False)
+    assert df['return_id'].tolist() == ['RET999999', 'RET1000000', 'RET000003']
+
+    filters = high_water_mark_filters(('2024-03-10', 'RET999999'), 'return_date', 'return_id')
+    df = read_dataset('returns', tmp_path, filters=filters, categories=False)
+    assert df['return_id'].tolist() == ['RET999999', 'RET1000000']
+
+
+def test_latest_id():
+    assert latest_id(pd.Series(['RET999998', 'RET1000000', 'RET999999'])) == 'RET1000000'
+    assert latest_id(pd.Series(['TXN00000002', 'TXN00000010', None])) == 'TXN00000010'
+
+
+def test_normalize_geography():
+    df = pd.DataFrame({'country': [' USA', 'usa'], 'state': ['CA ', None], 'city': ['San Jose', 'Boston']})
+    keys = normalize_geography(df)
+    assert list(keys.columns) == ['country_key', 'state_key', 'city_key']
+    assert keys['country_key'].tolist() == ['usa', 'usa']
+    assert keys['state_key'].tolist() == ['ca', '']
+    assert keys['city_key'].tolist() == ['san jose', 'boston']
+
+
+def test_resolve_geography_keys():
+    geography = pd.DataFrame({
+        'geography_key': [3, 1, 2, 4],
+        'country': ['USA', 'USA', 'UK', 'UK'],
+        'state': ['CA', 'CA', None, None],
+        'city': ['San Jose', 'San Jose', 'London', 'Leeds']
+    })
+    customers = pd.DataFrame({
+        'customer_id': ['CUST000001', 'CUST000002', 'CUST000003', 'CUST000004'],
+        'country': ['usa', 'UK', 'UK', 'France'],
+        'state': [' ca', None, '', 'IDF'],
+        'city': ['SAN JOSE', 'London', 'Leeds ', 'Paris']
+    })
+    keys = resolve_geography_keys(customers, geography)
+
+    # Several zip codes share a location: the lowest key wins; missing states match NULL ones
+    assert keys.index.tolist() == customers['customer_id'].tolist()
+    assert keys.iloc[:3].tolist() == [1, 2, 4]
+    assert pd.isna(keys['CUST000004'])
@@ -0,0 +1,30 @@
+"""
+Tests for the load pipeline instrumentation (src/pipeline_metrics.py)
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.pipeline_metrics import RunReport, record_bytes, timed
+
+
+def test_concurrent_component_time_is_wall_time(tmp_path):
+    report = RunReport('test', tmp_path)
+
+    def work(_):
+        with timed('database'):
+            time.sleep(0.2)
+        record_bytes(100)
+
+    with report.active(), report.stage('load'):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(work, range(4)))
+        with timed('database'):
+            time.sleep(0.1)
+
+    stage = report.stages[0]
+    # Four overlapping 0.2s calls count once, then 0.1s more on the main thread
+    assert 0.3 <= stage['components']['database'] <= stage['seconds']
+    assert stage['components']['database'] < 0.6
+    assert stage['bytes_written'] == 400
+    assert '_intervals' not in stage
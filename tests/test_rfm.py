@@ -0,0 +1,91 @@
+"""
+Tests for RFM scoring (src/utils.py calculate_rfm)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import calculate_rfm, RFM_SEGMENT_RULES
+
+
+def reference_rfm(df, customer_col='customer_id', date_col='transaction_date',
+                  amount_col='total_amount', analysis_date=None):
+    """The original groupby/qcut/apply implementation of calculate_rfm"""
+    if analysis_date is None:
+        analysis_date = df[date_col].max() + pd.Timedelta(days=1)
+
+    rfm = df.groupby(customer_col).agg({
+        date_col: lambda x: (analysis_date - x.max()).days,
+        customer_col: 'count',
+        amount_col: 'sum'
+    })
+    rfm.columns = ['recency', 'frequency', 'monetary']
+    rfm = rfm.reset_index()
+
+    rfm['r_score'] = pd.qcut(rfm['recency'], 5, labels=[5, 4, 3, 2, 1], duplicates='drop').astype(int)
+    rfm['f_score'] = pd.qcut(rfm['frequency'].rank(method='first'), 5, labels=[1, 2, 3, 4, 5],
+                             duplicates='drop').astype(int)
+    rfm['m_score'] = pd.qcut(rfm['monetary'], 5, labels=[1, 2, 3, 4, 5], duplicates='drop').astype(int)
+    rfm['rfm_score'] = rfm['r_score'] + rfm['f_score'] + rfm['m_score']
+
+    def segment_customer(row):
+        if row['rfm_score'] >= 13:
+            return 'Champions'
+        elif row['rfm_score'] >= 11:
+            return 'Loyal Customers'
+        elif row['rfm_score'] >= 9:
+            return 'Potential Loyalist'
+        elif row['rfm_score'] >= 7:
+            return 'At Risk'
+        elif row['rfm_score'] >= 5:
+            return 'Needs Attention'
+        else:
+            return 'Lost'
+
+    rfm['segment'] = rfm.apply(segment_customer, axis=1)
+    return rfm
+
+
+def assert_same_rfm(actual, expected):
+    assert list(actual.columns) == list(expected.columns)
+    assert actual['customer_id'].tolist() == expected['customer_id'].tolist()
+    for column in ['recency', 'frequency', 'r_score', 'f_score', 'm_score', 'rfm_score', 'segment']:
+        np.testing.assert_array_equal(actual[column].to_numpy(), expected[column].to_numpy(), err_msg=column)
+    np.testing.assert_allclose(actual['monetary'].to_numpy(), expected['monetary'].to_numpy())
+
+
+def test_matches_reference(sales):
+    assert_same_rfm(calculate_rfm(sales), reference_rfm(sales))
+
+
+def test_matches_reference_with_analysis_date(sales):
+    analysis_date = pd.Timestamp('2024-06-30')
+    assert_same_rfm(calculate_rfm(sales, analysis_date=analysis_date),
+                    reference_rfm(sales, analysis_date=analysis_date))
+
+
+def test_input_is_not_modified(sales):
+    before = sales.copy()
+    calculate_rfm(sales)
+    pd.testing.assert_frame_equal(sales, before)
+
+
+def test_scores_and_segments_are_in_range(sales):
+    rfm = calculate_rfm(sales)
+    for column in ['r_score', 'f_score', 'm_score']:
+        assert rfm[column].between(1, 5).all()
+    assert set(rfm['segment']) <= {segment for segment, _ in RFM_SEGMENT_RULES}
+
+
+def test_custom_bins_and_rules(sales):
+    rules = [('High', {'rfm_score': (7, None)}), ('Low', {})]
+    rfm = calculate_rfm(sales, bins=3, segment_rules=rules)
+    assert rfm['f_score'].between(1, 3).all()
+    assert (rfm['segment'] == np.where(rfm['rfm_score'] >= 7, 'High', 'Low')).all()
+
+
+@pytest.mark.parametrize('customer_dtype', ['object', 'category'])
+def test_customer_dtype(sales, customer_dtype):
+    typed = sales.astype({'customer_id': customer_dtype})
+    assert_same_rfm(calculate_rfm(typed), reference_rfm(sales))
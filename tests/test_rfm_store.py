@@ -0,0 +1,66 @@
+"""
+Tests for the incremental RFM state (src/rfm_store.py)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.rfm_store import QuantileSketch, RFMStore, MONETARY_ACCURACY
+from src.utils import calculate_rfm
+
+pytest.importorskip('pyarrow')
+
+
+def test_chunked_updates_match_one_update(sales):
+    incremental = RFMStore()
+    for start in range(0, len(sales), 3000):
+        incremental.update(sales.iloc[start:start + 3000])
+    full = RFMStore()
+    full.update(sales)
+
+    a, b = incremental.state.sort_index(), full.state.sort_index()
+    assert a.index.tolist() == b.index.tolist()
+    np.testing.assert_array_equal(a['last_day'], b['last_day'])
+    np.testing.assert_array_equal(a['frequency'], b['frequency'])
+    np.testing.assert_allclose(a['monetary'], b['monetary'])
+    for column in incremental.sketches:
+        pd.testing.assert_series_equal(incremental.sketches[column].counts.sort_index(),
+                                       full.sketches[column].counts.sort_index())
+
+
+def test_scores_match_calculate_rfm(sales):
+    store = RFMStore()
+    for start in range(0, len(sales), 5000):
+        store.update(sales.iloc[start:start + 5000])
+    actual, expected = store.scores(), calculate_rfm(sales)
+
+    assert list(actual.columns) == list(expected.columns)
+    assert actual['customer_id'].tolist() == expected['customer_id'].tolist()
+    for column in ['recency', 'frequency', 'r_score', 'f_score']:
+        np.testing.assert_array_equal(actual[column].to_numpy(), expected[column].to_numpy(), err_msg=column)
+    np.testing.assert_allclose(actual['monetary'], expected['monetary'])
+    # Monetary edges come from a sketch with 1% relative error: only customers near an edge may move
+    assert (actual['m_score'] != expected['m_score']).mean() < 0.05
+
+
+def test_exact_sketch_quantiles():
+    values = np.arange(1, 101)
+    sketch = QuantileSketch()
+    sketch.update(values)
+    np.testing.assert_array_equal(sketch.quantiles([0, 0.5, 1]), [1, 50, 100])
+
+    sketch.update(values[50:], -1)
+    np.testing.assert_array_equal(sketch.quantiles([1]), [50])
+
+
+def test_sketch_relative_error():
+    values = np.random.default_rng(0).lognormal(4, 1, 10000)
+    sketch = QuantileSketch(MONETARY_ACCURACY)
+    sketch.update(values)
+    qs = np.linspace(0.05, 0.95, 19)
+    expected = np.quantile(values, qs, method='lower')
+    assert np.all(np.abs(sketch.quantiles(qs) - expected) <= MONETARY_ACCURACY * expected * 1.01)
+
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    np.testing.assert_array_equal(restored.quantiles(qs), sketch.quantiles(qs))
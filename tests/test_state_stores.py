@@ -0,0 +1,70 @@
+"""
+Refresh cases shared by the incremental state stores (src/rfm_store.py, src/cohort_store.py)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+
+def test_incremental_refresh_matches_full_refresh(state_store, fake_sales, dated_sales, tmp_path):
+    for loaded in [3000, 3000, 11000, len(dated_sales)]:
+        fake_sales.df = dated_sales.iloc[:loaded]
+        store = state_store.load(tmp_path)
+        store.refresh()
+        store.save(tmp_path)
+    assert store.watermark == len(dated_sales)
+
+    full = state_store.new()
+    full.refresh()
+    pd.testing.assert_frame_equal(state_store.result(store), state_store.result(full))
+    pd.testing.assert_frame_equal(state_store.result(store), state_store.expected(dated_sales))
+
+
+def test_refresh_without_new_sales(state_store, fake_sales, dated_sales):
+    fake_sales.df = dated_sales
+    store = state_store.new()
+    assert store.refresh() == len(dated_sales)
+    assert store.refresh() == 0
+
+
+@pytest.mark.parametrize('reload', ['new_table', 'fewer_sales'])
+def test_rebuilds_after_schema_rebuild(state_store, fake_sales, dated_sales, tmp_path, reload):
+    fake_sales.df = dated_sales
+    store = state_store.new()
+    store.refresh()
+    store.save(tmp_path)
+
+    # Schema rebuilt and a smaller extract reloaded: sales_key restarts at 1
+    fake_sales.df = dated_sales.iloc[:5000]
+    if reload == 'new_table':
+        fake_sales.table_id = '2'
+    store = state_store.load(tmp_path)
+    store.refresh()
+
+    assert store.watermark == 5000
+    pd.testing.assert_frame_equal(state_store.result(store), state_store.expected(dated_sales.iloc[:5000]))
+
+
+def test_refresh_applies_rewritten_sales(state_store, fake_sales, dated_sales, tmp_path):
+    pending = dated_sales.index % 5 == 0
+    fake_sales.df = dated_sales.assign(order_status=np.where(pending, 'Pending', 'Completed'))
+    store = state_store.new()
+    store.refresh()
+    store.save(tmp_path)
+
+    # The lookback merge rewrites rows in place: Pending -> Completed, Completed -> Cancelled
+    fake_sales.rewrite(dated_sales.loc[pending, 'sales_key'].iloc[:800], order_status='Completed')
+    fake_sales.rewrite(dated_sales.loc[~pending, 'sales_key'].iloc[-1500:], order_status='Cancelled')
+    store = state_store.load(tmp_path)
+    assert store.refresh() == 0
+
+    completed = fake_sales.df[fake_sales.df['order_status'] == 'Completed']
+    pd.testing.assert_frame_equal(state_store.result(store), state_store.expected(completed))
+
+    # The rewrite log is consumed once
+    fake_sales.df = fake_sales.df.assign(order_status='Completed')
+    store.refresh()
+    pd.testing.assert_frame_equal(state_store.result(store), state_store.expected(completed))
@@ -0,0 +1,126 @@
+"""
+Tests for the dataset storage layer (src/storage.py)
+"""
+
+import pandas as pd
+import pytest
+
+from src.storage import DatasetWriter, find_dataset, iter_dataset, read_dataset, write_dataset
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        'transaction_id': [f'TXN{i:08d}' for i in range(1, 7)],
+        'customer_id': ['CUST000001', 'CUST000002', 'CUST000001', 'CUST000003', 'CUST000002', 'CUST000004'],
+        'product_id': ['PROD00001'] * 3 + ['PROD00002'] * 3,
+        'transaction_date': pd.to_datetime(['2024-01-03', '2024-01-15', '2024-02-01',
+                                            '2024-02-20', '2024-03-05', '2024-03-31']),
+        'quantity': [1, 2, 3, 1, 2, 5],
+        'total_amount': [10.5, 20.25, 30.0, 5.99, 100.01, 49.95],
+        'order_status': ['Completed', 'Completed', 'Cancelled', 'Completed', 'Returned', 'Completed']
+    })
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_round_trip(tmp_path, transactions, output_format):
+    path = write_dataset(transactions, 'transactions', tmp_path, output_format)
+    assert path.suffix == f'.{output_format}'
+
+    df = read_dataset('transactions', tmp_path)
+    assert list(df.columns) == list(transactions.columns)
+    assert df['transaction_date'].dt.strftime('%Y-%m-%d').tolist() == \
+        transactions['transaction_date'].dt.strftime('%Y-%m-%d').tolist()
+    assert df['total_amount'].tolist() == transactions['total_amount'].tolist()
+    assert df['quantity'].tolist() == transactions['quantity'].tolist()
+    assert df['order_status'].astype(str).tolist() == transactions['order_status'].tolist()
+    assert df['customer_id'].astype(str).tolist() == transactions['customer_id'].tolist()
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_part_files_in_chunks(tmp_path, transactions, output_format):
+    for part, rows in enumerate([slice(0, 2), slice(2, 4), slice(4, 6)]):
+        with DatasetWriter('transactions', tmp_path, output_format, part=part) as writer:
+            writer.write(transactions.iloc[rows])
+
+    found_format, files = find_dataset('transactions', tmp_path)
+    assert found_format == output_format
+    assert len(files) == 3
+
+    chunks = list(iter_dataset('transactions', tmp_path, chunksize=1, columns=['transaction_id', 'total_amount']))
+    assert len(chunks) == len(transactions)
+    df = pd.concat(chunks, ignore_index=True)
+    assert list(df.columns) == ['transaction_id', 'total_amount']
+    assert df['transaction_id'].astype(str).tolist() == transactions['transaction_id'].tolist()
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_read_filters(tmp_path, transactions, output_format):
+    write_dataset(transactions, 'transactions', tmp_path, output_format)
+
+    df = read_dataset('transactions', tmp_path, columns=['transaction_id', 'order_status'],
+                      filters=[('order_status', '==', 'Completed')])
+    assert df['transaction_id'].astype(str).tolist() == \
+        transactions.loc[transactions['order_status'] == 'Completed', 'transaction_id'].tolist()
+
+
+def test_parquet_is_preferred_over_csv(tmp_path, transactions):
+    write_dataset(transactions.head(2), 'transactions', tmp_path, 'csv')
+    write_dataset(transactions, 'transactions', tmp_path, 'parquet')
+
+    assert find_dataset('transactions', tmp_path)[0] == 'parquet'
+    assert len(read_dataset('transactions', tmp_path)) == len(transactions)
+
+
+def test_missing_dataset(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_dataset('transactions', tmp_path)
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_iter_dataset_or_filters(tmp_path, transactions, output_format):
+    # Groups are OR-ed, as in load_data.high_water_mark_filters (dates OR ids past the mark)
+    for part, rows in enumerate([slice(0, 3), slice(3, 6)]):
+        with DatasetWriter('transactions', tmp_path, output_format, part=part) as writer:
+            writer.write(transactions.iloc[rows])
+    filters = [[('transaction_date', '<=', pd.Timestamp('2024-01-03'))], [('transaction_id', '>', 'TXN00000004')]]
+
+    chunks = list(iter_dataset('transactions', tmp_path, chunksize=2, filters=filters))
+    assert all(len(chunk) for chunk in chunks)
+    df = pd.concat(chunks, ignore_index=True)
+    assert df['transaction_id'].astype(str).tolist() == ['TXN00000001', 'TXN00000005', 'TXN00000006']
+
+    nothing = [('transaction_date', '>', pd.Timestamp('2025-01-01'))]
+    assert list(iter_dataset('transactions', tmp_path, filters=nothing)) == []
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_empty_chunk_before_rows(tmp_path, transactions, output_format):
+    # Shards without rows write empty chunks; the header must still be written once
+    with DatasetWriter('transactions', tmp_path, output_format, part=0) as writer:
+        writer.write(transactions.iloc[:0])
+        writer.write(transactions.iloc[:3])
+        writer.write(transactions.iloc[:0])
+        writer.write(transactions.iloc[3:])
+
+    df = read_dataset('transactions', tmp_path)
+    assert writer.rows_written == len(transactions)
+    assert df['transaction_id'].astype(str).tolist() == transactions['transaction_id'].tolist()
+    assert df['total_amount'].tolist() == transactions['total_amount'].tolist()
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_length_filters_order_ids_past_their_padding(tmp_path, output_format):
+    returns = pd.DataFrame({'return_id': ['RET999998', 'RET999999', 'RET1000000', 'RET1000001'],
+                            'return_date': pd.to_datetime(['2024-01-01'] * 4),
+                            'refund_amount': [1.0, 2.0, 3.0, 4.0]})
+    write_dataset(returns, 'returns', tmp_path, output_format)
+
+    # Ids after RET999999 by number: longer ids, or equal-length ids that sort later
+    filters = [[('return_id', 'len==', 9), ('return_id', '>', 'RET999998')], [('return_id', 'len>', 9)]]
+    df = read_dataset('returns', tmp_path, filters=filters)
+    assert df['return_id'].astype(str).tolist() == ['RET999999', 'RET1000000', 'RET1000001']
+    chunks = list(iter_dataset('returns', tmp_path, chunksize=1, filters=filters))
+    assert [str(chunk['return_id'].iloc[0]) for chunk in chunks] == ['RET999999', 'RET1000000', 'RET1000001']
@@ -16,6 +16,29 @@ from datetime import datetime
 sys.path.append(str(Path(__file__).parent))
 from config import DATABASE_URL, PATHS
 from src.models import ChurnPredictionModel, DemandForecastModel, CLVPredictionModel, print_model_metrics
+from src.data_access import load_sales
+
+
+def load_clv_features(engine):
+    """
+    CLV features from the incrementally maintained customer LTV table
+    
+    Same columns as CLVPredictionModel.prepare_features, without re-aggregating
+    every transaction: totals, mean and spread are stored per customer.
+    """
+    ltv = pd.read_sql("SELECT * FROM vw_customer_lifetime_value", engine,
+                      parse_dates=['first_purchase_date', 'last_purchase_date'])
+    totals = pd.DataFrame({
+        'customer_id': ltv['customer_id'],
+        'historical_revenue': ltv['total_revenue'].astype(float),
+        'avg_order_value': ltv['avg_transaction_value'].astype(float),
+        'std_order_value': ltv['std_transaction_value'].astype(float),
+        'num_orders': ltv['total_transactions'],
+        'first_purchase': ltv['first_purchase_date'],
+        'last_purchase': ltv['last_purchase_date']
+    })
+    return CLVPredictionModel.features_from_totals(totals)
+
 
 print("="*70)
 print(" MACHINE LEARNING MODEL TRAINING")
@@ -24,8 +47,7 @@ print("="*70 + "\n")
 # Load data
 print(" Loading data from database...")
 engine = create_engine(DATABASE_URL)
-df = pd.read_sql("SELECT * FROM vw_sales_overview WHERE order_status = 'Completed'", engine)
-df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+df = load_sales(['customer_id', 'product_id', 'transaction_date', 'quantity', 'total_amount'], engine=engine)
 print(f" Loaded {len(df):,} transactions\n")
 
 # =============================================================================
@@ -127,12 +149,7 @@ print("="*70)
 clv_model = CLVPredictionModel(random_state=42)
 
 print("\n Preparing CLV features...")
-clv_features = clv_model.prepare_features(
-    df,
-    customer_col='customer_id',
-    date_col='transaction_date',
-    amount_col='total_amount'
-)
+clv_features = load_clv_features(engine)
 
 print(f" Features prepared for {len(clv_features):,} customers")
 print(f"   Average 12-month CLV: ${clv_features['clv_12m'].mean():,.2f}")